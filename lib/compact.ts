@@ -0,0 +1,60 @@
+// lib/compact.ts
+// Loader for the compact publish format written by scrapper/compact_export.py
+import type { Listing } from './data'
+
+type CompactRow = [
+  string,         // title
+  number,         // price
+  number | null,  // bedrooms
+  number,         // location index
+  number,         // area index
+  string,         // url (relative to url_prefix)
+  number | null,  // page
+];
+
+export interface CompactListingFile {
+  format: 'listings-compact';
+  version: number;
+  scraped_at: string;
+  total_listings: number;
+  url_prefix: string;
+  defaults: {
+    source?: string;
+    price_period?: string;
+    property_type?: string;
+    scraped_at: string;
+  };
+  locations: string[];
+  areas: string[];
+  columns: string[];
+  rows: CompactRow[];
+}
+
+function formatPriceText(price: number, pricePeriod?: string): string {
+  const amount = `GH₵${price.toLocaleString('en-US')}`;
+  return pricePeriod === 'month' ? `${amount}/month` : amount;
+}
+
+// Expand the compact rows back into full Listing objects
+export function expandCompact(data: CompactListingFile): Listing[] {
+  if (data.format !== 'listings-compact' || data.version !== 1) {
+    throw new Error(`Unsupported listings file: ${data.format} v${data.version}`);
+  }
+
+  const { defaults, locations, areas, url_prefix } = data;
+
+  return data.rows.map(([title, price, bedrooms, locationIdx, areaIdx, url, page]) => ({
+    title,
+    price,
+    price_text: formatPriceText(price, defaults.price_period),
+    price_period: defaults.price_period,
+    property_type: defaults.property_type,
+    bedrooms,
+    location: locations[locationIdx],
+    area: areas[areaIdx],
+    url: url && !url.startsWith('http') ? `${url_prefix}${url}` : url,
+    source: defaults.source ?? '',
+    scraped_at: defaults.scraped_at,
+    page: page ?? undefined,
+  }));
+}
@@ -1,5 +1,6 @@
 // lib/data.ts
-import rentalData from '@/public/meqasa_data.json'
+import compactData from '@/public/meqasa_data.compact.json'
+import { expandCompact, type CompactListingFile } from './compact'
 
 export interface Listing {
   title: string;
@@ -103,9 +104,14 @@ export interface LocationStats {
   priceByBedroom: Record<number, number>;
 }
 
-// Load rental data from scraped JSON
+// Load rental data from the compact scraped JSON (expanded once, then cached)
+let cachedListings: Listing[] | null = null;
+
 export function getListings(): Listing[] {
-  return rentalData.listings;
+  if (!cachedListings) {
+    cachedListings = expandCompact(compactData as unknown as CompactListingFile);
+  }
+  return cachedListings;
 }
 
 export function estimatePrice(
@@ -0,0 +1,457 @@
+"""
+Aggregate Store - Incrementally maintained market statistics
+Keeps count, sum, sum of squares, min/max and a quantile sketch per
+(location, bedrooms) cell, the numbers behind getLocationStats and
+estimatePrice. Each crawl's changeset (see changefeed.py) is applied as
+add/remove/price-change deltas, so a refresh costs O(changes) instead of a pass
+over every listing. Every few runs the store is checked against a full
+recompute and rebuilt if they disagree.
+
+The saved file only holds the per-cell numbers, so its size grows with the
+number of cells, not listings. Which cell and price each changed URL was
+counted with is looked up in the previous output when a changeset is applied.
+"""
+
+import json
+import math
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from changefeed import changed_urls, load_output
+from listing import canonical_url
+
+
+STORE_FORMAT = 'listing-aggregates'
+STORE_VERSION = 2
+
+# Relative accuracy of the quantile sketch (estimates are within 1% of the true value)
+SKETCH_ACCURACY = 0.01
+
+# Full recompute check every this many applied changesets
+VERIFY_EVERY = 7
+
+
+def get_aggregates_path(output_path):
+    """Get the aggregate store path for a scraper JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.aggregates.json")
+
+
+def cell_key(location, bedrooms):
+    """JSON-safe key for a (location, bedrooms) cell, e.g. 'East Legon|2'."""
+    return f"{location or ''}|{'' if bedrooms is None else bedrooms}"
+
+
+def split_cell_key(key):
+    location, _, bedrooms = key.rpartition('|')
+    return location, int(bedrooms) if bedrooms else None
+
+
+class QuantileSketch:
+    def __init__(self, accuracy=SKETCH_ACCURACY, buckets=None):
+        """Log-bucketed histogram (DDSketch-style); supports removal and merging."""
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = Counter(buckets or {})
+
+    def _index(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value, count=1):
+        if value > 0:
+            self.buckets[self._index(value)] += count
+
+    def remove(self, value):
+        if value > 0:
+            index = self._index(value)
+            self.buckets[index] -= 1
+            if self.buckets[index] <= 0:
+                del self.buckets[index]
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+
+    def quantile(self, q):
+        total = sum(self.buckets.values())
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return None
+
+
+class CellStats:
+    def __init__(self):
+        """Running statistics for one (location, bedrooms) cell."""
+        self.count = 0
+        self.total = 0
+        self.total_sq = 0
+        self.min = None
+        self.max = None
+        self.stale = False  # min/max removed, recompute from the members
+        self.sketch = QuantileSketch()
+
+    def add(self, price):
+        self.count += 1
+        self.total += price
+        self.total_sq += price * price
+        if not self.stale:
+            self.min = price if self.min is None else min(self.min, price)
+            self.max = price if self.max is None else max(self.max, price)
+        self.sketch.add(price)
+
+    def remove(self, price):
+        self.count -= 1
+        self.total -= price
+        self.total_sq -= price * price
+        if price == self.min or price == self.max:
+            self.stale = True
+        self.sketch.remove(price)
+
+    def summary(self):
+        if not self.count:
+            return None
+        mean = self.total / self.count
+        variance = max(self.total_sq / self.count - mean * mean, 0.0)
+        return {
+            'count': self.count,
+            'mean': round(mean),
+            'std': round(math.sqrt(variance)),
+            'min': self.min,
+            'max': self.max,
+            'p25': round(self.sketch.quantile(0.25)),
+            'median': round(self.sketch.quantile(0.5)),
+            'p75': round(self.sketch.quantile(0.75)),
+        }
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'sumsq': self.total_sq,
+            'min': self.min,
+            'max': self.max,
+            'sketch': {str(i): n for i, n in sorted(self.sketch.buckets.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        cell = cls()
+        cell.count = data['count']
+        cell.total = data['sum']
+        cell.total_sq = data['sumsq']
+        cell.min = data['min']
+        cell.max = data['max']
+        cell.sketch = QuantileSketch(buckets={int(i): n for i, n in data['sketch'].items()})
+        return cell
+
+
+class AggregateStore:
+    def __init__(self):
+        """Per-cell stats plus the URL -> (cell, price) membership they were built from (not saved)."""
+        self.cells = {}
+        self.members = {}
+        self.applied = 0
+        self.last_verified = None
+
+    # -- building and deltas ---------------------------------------------------
+
+    def _member(self, url, listing):
+        price = listing.get('price')
+        if not url or not price or price <= 0 or url in self.members:
+            return None
+        return [cell_key(listing.get('location'), listing.get('bedrooms')), price]
+
+    def _add(self, url, listing):
+        member = self._member(url, listing)
+        if member is not None:
+            self.cells.setdefault(member[0], CellStats()).add(member[1])
+            self.members[url] = member
+
+    def index_members(self, listings, urls=None):
+        """
+        Rebuild the URL membership from the output the stored cells describe
+        (only for urls, if given).
+        """
+        self.members = {}
+        for listing in listings:
+            url = canonical_url(listing.get('url'))
+            if urls is not None and url not in urls:
+                continue
+            member = self._member(url, listing)
+            if member is not None:
+                self.members[url] = member
+
+    def _refresh_extremes(self, listings=None):
+        """
+        Exact min/max of cells that lost their min or max, from the members,
+        or from the new listings when only the changed URLs are indexed.
+        """
+        stale = {key: cell for key, cell in self.cells.items() if cell.stale}
+        if not stale:
+            return
+        for cell in stale.values():
+            cell.min = cell.max = None
+        if listings is None:
+            prices = self.members.values()
+        else:
+            prices = ((cell_key(l.get('location'), l.get('bedrooms')), l['price'])
+                      for l in listings if l.get('price') and l['price'] > 0)
+        for key, price in prices:
+            cell = stale.get(key)
+            if cell is not None:
+                cell.min = price if cell.min is None else min(cell.min, price)
+                cell.max = price if cell.max is None else max(cell.max, price)
+        for cell in stale.values():
+            cell.stale = False
+
+    def _remove(self, url):
+        member = self.members.pop(url, None)
+        if member is None:
+            return None
+        key, price = member
+        cell = self.cells[key]
+        cell.remove(price)
+        if not cell.count:
+            del self.cells[key]
+        return member
+
+    @classmethod
+    def build(cls, listings):
+        """Full recompute from listing dicts."""
+        store = cls()
+        for listing in listings:
+            store._add(canonical_url(listing.get('url')), listing)
+        return store
+
+    def apply_changeset(self, changeset, listings=None):
+        """
+        Apply one changefeed changeset; touches only the listed URLs (and the
+        members of cells whose min or max was removed). Needs index_members()
+        first, at least for the changeset's URLs; with only those indexed,
+        pass the new listings so stale min/max can be recomputed.
+        """
+        for url in changeset['removed']:
+            self._remove(url)
+
+        for item in changeset['price_changed']:
+            member = self._remove(item['url'])
+            if member is not None:
+                location, bedrooms = split_cell_key(member[0])
+                self._add(item['url'], {'location': location, 'bedrooms': bedrooms,
+                                        'price': item['new']})
+
+        for item in changeset['updated']:
+            changes = item['changes']
+            if 'location' not in changes and 'bedrooms' not in changes:
+                continue
+            member = self._remove(item['url'])
+            if member is not None:
+                location, bedrooms = split_cell_key(member[0])
+                self._add(item['url'], {
+                    'location': changes.get('location', [None, location])[1],
+                    'bedrooms': changes.get('bedrooms', [None, bedrooms])[1],
+                    'price': member[1],
+                })
+
+        for listing in changeset['added']:
+            self._add(listing['url'], listing)
+
+        self._refresh_extremes(listings)
+        self.applied += 1
+
+    # -- verification ----------------------------------------------------------
+
+    def diff(self, other):
+        """Cell keys whose exact statistics differ between two stores."""
+        mismatched = []
+        for key in sorted(set(self.cells) | set(other.cells)):
+            mine, theirs = self.cells.get(key), other.cells.get(key)
+            if mine is None or theirs is None:
+                mismatched.append(key)
+            elif (mine.count, mine.total, mine.total_sq, mine.min, mine.max) != \
+                    (theirs.count, theirs.total, theirs.total_sq, theirs.min, theirs.max):
+                mismatched.append(key)
+        return mismatched
+
+    def verify(self, listings):
+        """Compare against a full recompute; returns the mismatched cell keys."""
+        mismatched = self.diff(AggregateStore.build(listings))
+        self.last_verified = datetime.now().isoformat(timespec='seconds')
+        return mismatched
+
+    # -- queries ---------------------------------------------------------------
+
+    def cell(self, location, bedrooms):
+        cell = self.cells.get(cell_key(location, bedrooms))
+        return cell.summary() if cell else None
+
+    def location(self, location):
+        """Stats over all bedroom counts of a location (cells merged)."""
+        merged = CellStats()
+        for key, cell in self.cells.items():
+            if split_cell_key(key)[0] == location:
+                merged.count += cell.count
+                merged.total += cell.total
+                merged.total_sq += cell.total_sq
+                merged.min = cell.min if merged.min is None else min(merged.min, cell.min)
+                merged.max = cell.max if merged.max is None else max(merged.max, cell.max)
+                merged.sketch.merge(cell.sketch)
+        return merged.summary()
+
+    def summaries(self):
+        """{cell key: summary} for every cell."""
+        return {key: self.cells[key].summary() for key in sorted(self.cells)}
+
+    # -- persistence -----------------------------------------------------------
+
+    def save(self, path):
+        output = {
+            'format': STORE_FORMAT,
+            'version': STORE_VERSION,
+            'sketch_accuracy': SKETCH_ACCURACY,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'applied_changesets': self.applied,
+            'last_verified': self.last_verified,
+            'total_listings': sum(cell.count for cell in self.cells.values()),
+            'stats': self.summaries(),
+            'cells': {key: self.cells[key].to_dict() for key in sorted(self.cells)},
+        }
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, separators=(',', ':'))
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path, listings=None, urls=None):
+        """
+        Load a saved store; pass the output it describes to rebuild the
+        membership (only for urls, if given).
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != STORE_FORMAT or data.get('version') != STORE_VERSION:
+            raise ValueError(f"{path} is not a version {STORE_VERSION} aggregate store")
+        store = cls()
+        store.cells = {key: CellStats.from_dict(cell) for key, cell in data['cells'].items()}
+        if listings is not None:
+            store.index_members(listings, urls)
+        store.applied = data.get('applied_changesets', 0)
+        store.last_verified = data.get('last_verified')
+        return store
+
+
+def update_aggregates(changeset, listings, output_path, previous=None,
+                      verify_every=VERIFY_EVERY):
+    """
+    Scraper hook: apply the run's changeset to the stored aggregates, with a
+    full recompute check every verify_every runs (or a rebuild if there is no
+    usable store yet). previous is the listings of the output the store
+    describes (None on a first run); only the changed URLs are looked up in
+    it. Returns the store.
+    """
+    path = get_aggregates_path(output_path)
+    store = None
+    if path.exists() and previous is not None:
+        try:
+            store = AggregateStore.load(path, previous, changed_urls(changeset))
+        except (ValueError, KeyError, json.JSONDecodeError) as e:
+            print(f"  ⚠️  Rebuilding aggregates: {e}")
+
+    if store is None:
+        store = AggregateStore.build(listings)
+        store.last_verified = datetime.now().isoformat(timespec='seconds')
+        print(f"\n📊 AGGREGATES: built {len(store.cells)} cells from {len(store.members)} listings")
+    else:
+        store.apply_changeset(changeset, listings)
+        print(f"\n📊 AGGREGATES: applied changeset #{store.applied} to {len(store.cells)} cells")
+        if store.applied % verify_every == 0:
+            mismatched = store.verify(listings)
+            if mismatched:
+                print(f"  ⚠️  {len(mismatched)} cells drifted from a full recompute, rebuilding")
+                applied = store.applied
+                store = AggregateStore.build(listings)
+                store.applied = applied
+                store.last_verified = datetime.now().isoformat(timespec='seconds')
+            else:
+                print("  ✓ Verified against a full recompute")
+
+    print(f"✓ Saved {store.save(path)}")
+    return store
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Incremental per-cell market statistics')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = sub.add_parser('build', help='Full recompute from a scraper output')
+    build_parser.add_argument('input', type=str, help='Scraper JSON output')
+
+    apply_parser = sub.add_parser('apply', help='Apply a changeset to a store')
+    apply_parser.add_argument('store', type=str, help='Aggregate store')
+    apply_parser.add_argument('previous', type=str, help='Scraper JSON output the store describes')
+    apply_parser.add_argument('changes', type=str, help='Changeset JSON from changefeed.py')
+
+    verify_parser = sub.add_parser('verify', help='Check a store against a full recompute')
+    verify_parser.add_argument('store', type=str, help='Aggregate store')
+    verify_parser.add_argument('input', type=str, help='Scraper JSON output')
+
+    show_parser = sub.add_parser('show', help='Print the stats of a store')
+    show_parser.add_argument('store', type=str, help='Aggregate store')
+    show_parser.add_argument('--location', type=str, help='Only this location')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        with open(args.input, 'r', encoding='utf-8') as f:
+            listings = json.load(f).get('listings', [])
+        start = time.perf_counter()
+        store = AggregateStore.build(listings)
+        elapsed = time.perf_counter() - start
+        print(f"Built {len(store.cells)} cells from {len(store.members)} listings "
+              f"in {elapsed * 1000:.1f}ms")
+        print(f"✓ Saved {store.save(get_aggregates_path(args.input))}")
+
+    elif args.command == 'apply':
+        store = AggregateStore.load(args.store, load_output(args.previous).get('listings', []))
+        with open(args.changes, 'r', encoding='utf-8') as f:
+            changeset = json.load(f)
+        start = time.perf_counter()
+        store.apply_changeset(changeset)
+        elapsed = time.perf_counter() - start
+        changes = sum(changeset['summary'][k] for k in ('added', 'removed', 'price_changed', 'updated'))
+        print(f"Applied {changes} changes in {elapsed * 1000:.2f}ms")
+        print(f"✓ Saved {store.save(args.store)}")
+
+    elif args.command == 'verify':
+        store = AggregateStore.load(args.store)
+        with open(args.input, 'r', encoding='utf-8') as f:
+            listings = json.load(f).get('listings', [])
+        mismatched = store.verify(listings)
+        if mismatched:
+            print(f"❌ {len(mismatched)} cells differ: {', '.join(mismatched[:10])}")
+            exit(1)
+        print(f"✓ All {len(store.cells)} cells match a full recompute")
+
+    else:
+        store = AggregateStore.load(args.store)
+        if args.location:
+            print(f"{args.location}: {store.location(args.location)}")
+        for key, stats in store.summaries().items():
+            location, bedrooms = split_cell_key(key)
+            if args.location and location != args.location:
+                continue
+            print(f"  {location:25s} {bedrooms or '?':>2}BR  n={stats['count']:4d}  "
+                  f"median GH₵{stats['median']:>8,}  mean GH₵{stats['mean']:>8,}  "
+                  f"[{stats['min']:,} - {stats['max']:,}]")
@@ -0,0 +1,313 @@
+"""
+Area Overlap - Prune search areas whose listings other areas already return
+GREATER_ACCRA_AREAS has the catch-all "Accra" search plus ~80 neighbourhood
+searches, and many overlap heavily (La/Labadi, Legon/North Legon/West Legon),
+so their pages are mostly fetched to be thrown away as duplicates. Every run
+records each area's full URL set (before dedup). From the recent full sweeps
+this module computes pairwise containment and plans a small set of areas
+(greedy set cover) that still returns TARGET_COVERAGE of all listings.
+
+Pruned runs crawl only the planned areas. Every FULL_SWEEP_EVERY runs every
+area is crawled again, which refreshes the URL sets and checks how much the
+previous plan would actually have covered. Areas that are new, or failed in
+the last sweep, are always crawled. Listings that only pruned areas return are
+carried over from the previous output, so a pruned run doesn't report them
+as removed.
+"""
+
+import json
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from listing import canonical_url
+
+
+COVERAGE_FORMAT = 'area-coverage'
+COVERAGE_VERSION = 1
+
+# Share of all recorded listings the planned areas must still return
+TARGET_COVERAGE = 0.99
+
+# Every Nth run crawls every area, and how many full sweeps the plan uses
+FULL_SWEEP_EVERY = 7
+SWEEPS_KEPT = 3
+
+# Pairs at least this contained are listed in the report
+MIN_CONTAINMENT = 0.9
+
+
+def get_coverage_path(output_path):
+    """Get the area coverage history path for a scraper JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.areas.json")
+
+
+class AreaRecorder:
+    def __init__(self):
+        """Every canonical URL each area returned this run, duplicates included."""
+        self.urls = {}
+        self.pages = Counter()
+        self.failed = set()
+
+    def start(self, area):
+        """An area being crawled; it counts as empty until a page records URLs."""
+        self.urls.setdefault(area, set())
+
+    def record_page(self, area, urls):
+        self.urls.setdefault(area, set()).update(canonical_url(url) for url in urls if url)
+        self.pages[area] += 1
+
+    def fail(self, area):
+        """A page of this area failed, so its URL set is incomplete."""
+        self.failed.add(area)
+
+
+def greedy_cover(area_sets, target=TARGET_COVERAGE):
+    """
+    Areas, in pick order, whose union covers target of all URLs. Each step
+    takes the area adding the most uncovered URLs. Returns (picks, coverage)
+    with picks as (area, new URLs) pairs.
+    """
+    universe = set().union(*area_sets.values()) if area_sets else set()
+    if not universe:
+        return [], 1.0
+    needed = target * len(universe)
+    covered = set()
+    remaining = dict(area_sets)
+    picks = []
+    while len(covered) < needed and remaining:
+        # Ties go to the name, so the plan is stable between runs
+        area = max(sorted(remaining), key=lambda name: len(remaining[name] - covered))
+        gain = remaining.pop(area) - covered
+        if not gain:
+            break
+        covered |= gain
+        picks.append((area, len(gain)))
+    return picks, len(covered) / len(universe)
+
+
+def containment_pairs(area_sets, threshold=MIN_CONTAINMENT):
+    """(a, b, share) for every pair where share of a's URLs are also in b."""
+    pairs = []
+    names = sorted(name for name, urls in area_sets.items() if urls)
+    for a in names:
+        for b in names:
+            if a == b:
+                continue
+            share = len(area_sets[a] & area_sets[b]) / len(area_sets[a])
+            if share >= threshold:
+                pairs.append((a, b, share))
+    pairs.sort(key=lambda p: (-p[2], -len(area_sets[p[0]]), p[0], p[1]))
+    return pairs
+
+
+class AreaCoverage:
+    def __init__(self):
+        """Recent full sweeps plus the current plan."""
+        self.sweeps = []       # [{'at', 'areas': {name: {'urls': [...], 'pages': n}}}]
+        self.runs_since_sweep = 0
+        self.plan = None       # area names of the last plan
+        self.validations = []  # [{'at', 'planned', 'coverage'}]
+
+    @classmethod
+    def load(cls, path):
+        coverage = cls()
+        path = Path(path)
+        if not path.exists():
+            return coverage
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != COVERAGE_FORMAT or data.get('version') != COVERAGE_VERSION:
+            raise ValueError(f"{path} is not a version {COVERAGE_VERSION} area coverage file")
+        coverage.sweeps = data['sweeps']
+        coverage.runs_since_sweep = data.get('runs_since_sweep', 0)
+        coverage.plan = data.get('plan')
+        coverage.validations = data.get('validations', [])
+        return coverage
+
+    def save(self, path):
+        output = {
+            'format': COVERAGE_FORMAT,
+            'version': COVERAGE_VERSION,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'runs_since_sweep': self.runs_since_sweep,
+            'plan': self.plan,
+            'validations': self.validations[-20:],
+            'sweeps': self.sweeps,
+        }
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, separators=(',', ':'))
+        tmp_path.replace(path)
+        return path
+
+    def area_sets(self):
+        """URLs per area across the kept sweeps."""
+        sets = {}
+        for sweep in self.sweeps:
+            for name, area in sweep['areas'].items():
+                sets.setdefault(name, set()).update(area['urls'])
+        return sets
+
+    def known_areas(self):
+        """Areas the latest sweep crawled completely."""
+        return set(self.sweeps[-1]['areas']) if self.sweeps else set()
+
+    def area_pages(self):
+        return self.sweeps[-1]['areas'] if self.sweeps else {}
+
+    def full_sweep_due(self):
+        return not self.sweeps or self.runs_since_sweep + 1 >= FULL_SWEEP_EVERY
+
+    def build_plan(self, target=TARGET_COVERAGE):
+        picks, coverage = greedy_cover(self.area_sets(), target)
+        return [area for area, _ in picks], coverage
+
+    def select(self, area_names, target=TARGET_COVERAGE):
+        """
+        Areas to crawl this run, in their original order, and whether it is
+        a full sweep.
+        """
+        if self.full_sweep_due():
+            return list(area_names), True
+        planned, _ = self.build_plan(target)
+        keep = set(planned) | (set(area_names) - self.known_areas())
+        return [name for name in area_names if name in keep], False
+
+    def record_run(self, recorder, full, target=TARGET_COVERAGE):
+        """Fold a finished run in; full sweeps replace the URL sets the plan uses."""
+        if not full:
+            self.runs_since_sweep += 1
+            return None
+
+        areas = {name: {'urls': sorted(urls), 'pages': recorder.pages[name]}
+                 for name, urls in recorder.urls.items() if name not in recorder.failed}
+        validation = None
+        if self.plan is not None:
+            # How much would the previous plan have returned of this sweep?
+            fresh = {name: set(area['urls']) for name, area in areas.items()}
+            universe = set().union(*fresh.values()) if fresh else set()
+            planned = set().union(*(fresh.get(name, set()) for name in self.plan))
+            validation = {
+                'at': datetime.now().isoformat(timespec='seconds'),
+                'planned': len(self.plan),
+                'coverage': round(len(planned) / len(universe), 4) if universe else 1.0,
+            }
+            self.validations.append(validation)
+
+        self.sweeps = (self.sweeps + [{
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'areas': areas,
+        }])[-SWEEPS_KEPT:]
+        self.runs_since_sweep = 0
+        self.plan, _ = self.build_plan(target)
+        return validation
+
+    def unseen_only_in(self, crawled):
+        """URLs that, in the kept sweeps, only areas outside crawled returned."""
+        crawled = set(crawled)
+        inside, outside = set(), set()
+        for name, urls in self.area_sets().items():
+            (inside if name in crawled else outside).update(urls)
+        return outside - inside
+
+
+def carry_forward(previous_output, found_urls, coverage, crawled):
+    """
+    Listing dicts from the previous output that this pruned run couldn't
+    have seen: missing now, and only returned by areas it skipped.
+    """
+    if not previous_output:
+        return []
+    skipped_only = coverage.unseen_only_in(crawled)
+    carried = {}
+    for listing in previous_output.get('listings', []):
+        key = canonical_url(listing.get('url'))
+        if key in skipped_only and key not in found_urls:
+            carried.setdefault(key, listing)
+    return list(carried.values())
+
+
+def plan_run(output_path, area_names):
+    """
+    Load the coverage history and pick this run's areas.
+    Returns (coverage, areas to crawl, full sweep?).
+    """
+    try:
+        coverage = AreaCoverage.load(get_coverage_path(output_path))
+    except (ValueError, KeyError, json.JSONDecodeError) as e:
+        print(f"  ⚠️  Starting a new area coverage history: {e}")
+        coverage = AreaCoverage()
+
+    selected, full = coverage.select(area_names)
+    if full:
+        print(f"🗺️  AREAS: full sweep of {len(selected)} areas")
+    else:
+        pages = coverage.area_pages()
+        skipped = [name for name in area_names if name not in set(selected)]
+        saved = sum(pages.get(name, {}).get('pages', 0) for name in skipped)
+        print(f"🗺️  AREAS: crawling {len(selected)} of {len(area_names)} areas "
+              f"(~{saved} page loads saved; full sweep in "
+              f"{FULL_SWEEP_EVERY - coverage.runs_since_sweep - 1} runs)")
+    return coverage, selected, full
+
+
+def finish_run(coverage, recorder, full, output_path):
+    """Record the run's URL sets and save the history."""
+    validation = coverage.record_run(recorder, full)
+    if validation:
+        status = '✓' if validation['coverage'] >= TARGET_COVERAGE else '⚠️ '
+        print(f"\n{status} Previous area plan ({validation['planned']} areas) would have "
+              f"returned {validation['coverage']:.2%} of this sweep")
+    print(f"✓ Saved {coverage.save(get_coverage_path(output_path))}")
+
+
+def print_overlap_report(coverage, target=TARGET_COVERAGE, top=25):
+    sets = coverage.area_sets()
+    pages = coverage.area_pages()
+    universe = set().union(*sets.values()) if sets else set()
+    print("=" * 70)
+    print(f"AREA OVERLAP ({len(coverage.sweeps)} sweeps, {len(sets)} areas, "
+          f"{len(universe):,} listings)")
+    print("=" * 70)
+
+    pairs = containment_pairs(sets)
+    print(f"\n🔁 CONTAINED AREAS (≥{MIN_CONTAINMENT:.0%} of A's listings also in B)")
+    for a, b, share in pairs[:top]:
+        print(f"  {a:25s} ⊂ {b:25s} {share:6.1%}  ({len(sets[a])} listings)")
+    if len(pairs) > top:
+        print(f"  ... and {len(pairs) - top} more")
+
+    picks, achieved = greedy_cover(sets, target)
+    total_pages = sum(area.get('pages', 0) for area in pages.values())
+    plan_pages = sum(pages.get(area, {}).get('pages', 0) for area, _ in picks)
+    print(f"\n🗺️  PLAN: {len(picks)} of {len(sets)} areas cover {achieved:.2%} "
+          f"(target {target:.0%})")
+    print(f"  Pages per run: {plan_pages} instead of {total_pages}")
+    for area, gain in picks:
+        print(f"  {area:25s} +{gain}")
+
+    if coverage.validations:
+        print(f"\n✅ FULL-SWEEP CHECKS")
+        for v in coverage.validations[-5:]:
+            print(f"  {v['at']}  {v['planned']} planned areas returned {v['coverage']:.2%}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Area overlap report and pruned crawl plan')
+    parser.add_argument('input', type=str,
+                        help='Scraper JSON output (reads <output>.areas.json next to it)')
+    parser.add_argument('--target', type=float, default=TARGET_COVERAGE,
+                        help=f'Coverage the plan must keep (default: {TARGET_COVERAGE})')
+    parser.add_argument('--top', type=int, default=25, help='Contained pairs to list')
+    args = parser.parse_args()
+
+    path = get_coverage_path(args.input)
+    coverage = AreaCoverage.load(path)
+    if not coverage.sweeps:
+        print(f"No full sweeps recorded in {path} yet; run the scraper with --prune-areas")
+        exit(1)
+    print_overlap_report(coverage, args.target, args.top)
@@ -0,0 +1,221 @@
+"""
+Change Feed - Diff consecutive scrapes by listing URL
+Compares a new crawl with the previous output and emits a compact changeset
+(added, removed, price-changed, updated) in stable URL order. The published
+JSON is also stabilized: listings are keyed by canonical URL, sorted, and
+stripped of per-listing fields that change on every crawl (scraped_at, page),
+so a run where the market did not move produces no data diff at all. The area
+tag depends on which search found a listing first, so a listing keeps the area
+it was first published with.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from listing import canonical_url
+
+
+CHANGESET_FORMAT = 'listings-changeset'
+CHANGESET_VERSION = 1
+
+# Per-listing fields that change on every crawl without the listing changing
+VOLATILE_FIELDS = ('scraped_at', 'page')
+
+# Fields compared for the 'updated' section (price has its own section).
+# 'area' is left out: it is whichever search returned the listing first, which
+# changes with crawl order and area pruning, not with the listing
+TRACKED_FIELDS = ('title', 'bedrooms', 'location', 'price_period', 'property_type')
+
+
+def get_changes_path(output_path):
+    """Get the changeset path for a scraper JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.changes.json")
+
+
+def stable_listing(listing):
+    """Listing dict without volatile fields, with its canonical URL."""
+    stable = {key: value for key, value in listing.items() if key not in VOLATILE_FIELDS}
+    stable['url'] = canonical_url(listing.get('url'))
+    return stable
+
+
+def stable_listings(listings):
+    """Deduplicated, URL-sorted stable listing dicts (first occurrence wins)."""
+    by_url = {}
+    for listing in listings:
+        stable = stable_listing(listing)
+        if stable['url'] and stable['url'] not in by_url:
+            by_url[stable['url']] = stable
+    return [by_url[url] for url in sorted(by_url)]
+
+
+def _index(listings):
+    return {listing['url']: listing for listing in stable_listings(listings)}
+
+
+def diff_listings(old_listings, new_listings):
+    """Changeset sections between two lists of listing dicts, sorted by URL."""
+    old = _index(old_listings)
+    new = _index(new_listings)
+
+    added = [new[url] for url in sorted(new.keys() - old.keys())]
+    removed = sorted(old.keys() - new.keys())
+    price_changed = []
+    updated = []
+    unchanged = 0
+    for url in sorted(old.keys() & new.keys()):
+        before, after = old[url], new[url]
+        changed = False
+        if before.get('price') != after.get('price'):
+            price_changed.append({'url': url, 'old': before.get('price'),
+                                  'new': after.get('price')})
+            changed = True
+        fields = {name: [before.get(name), after.get(name)] for name in TRACKED_FIELDS
+                  if before.get(name) != after.get(name)}
+        if fields:
+            updated.append({'url': url, 'changes': fields})
+            changed = True
+        if not changed:
+            unchanged += 1
+
+    return {
+        'added': added,
+        'removed': removed,
+        'price_changed': price_changed,
+        'updated': updated,
+        'unchanged': unchanged,
+    }
+
+
+def build_changeset(old_data, new_data):
+    """Full changeset document for two scraper outputs (old_data may be None)."""
+    old_data = old_data or {}
+    sections = diff_listings(old_data.get('listings', []), new_data.get('listings', []))
+    unchanged = sections.pop('unchanged')
+    return {
+        'format': CHANGESET_FORMAT,
+        'version': CHANGESET_VERSION,
+        'source': new_data.get('source'),
+        'from': old_data.get('scraped_at'),
+        'to': new_data.get('scraped_at'),
+        'summary': {
+            'added': len(sections['added']),
+            'removed': len(sections['removed']),
+            'price_changed': len(sections['price_changed']),
+            'updated': len(sections['updated']),
+            'unchanged': unchanged,
+        },
+        **sections,
+    }
+
+
+def keep_areas(listings, old_listings):
+    """Give stable listings that were already published their previous area tag."""
+    old_areas = {canonical_url(listing.get('url')): listing.get('area')
+                 for listing in old_listings if listing.get('area')}
+    for listing in listings:
+        area = old_areas.get(listing['url'])
+        if area:
+            listing['area'] = area
+
+
+def changed_urls(changeset):
+    """Canonical URLs a changeset adds, removes or modifies."""
+    urls = set(changeset['removed'])
+    urls.update(listing['url'] for listing in changeset['added'])
+    urls.update(item['url'] for item in changeset['price_changed'])
+    urls.update(item['url'] for item in changeset['updated'])
+    return urls
+
+
+def has_changes(changeset):
+    summary = changeset['summary']
+    return any(summary[key] for key in ('added', 'removed', 'price_changed', 'updated'))
+
+
+def apply_changeset(listings, changeset):
+    """Apply a changeset to stable listing dicts; returns the new URL-sorted list."""
+    by_url = {listing['url']: dict(listing) for listing in listings}
+    for url in changeset['removed']:
+        by_url.pop(url, None)
+    for item in changeset['price_changed']:
+        by_url[item['url']]['price'] = item['new']
+    for item in changeset['updated']:
+        for name, (_, value) in item['changes'].items():
+            by_url[item['url']][name] = value
+    for listing in changeset['added']:
+        by_url[listing['url']] = listing
+    return [by_url[url] for url in sorted(by_url)]
+
+
+def load_output(path):
+    """Previous scraper output (checked by listing_io), or None if there is none yet."""
+    from listing_io import read_output
+
+    path = Path(path)
+    if not path.exists():
+        return None
+    return read_output(path)
+
+
+def write_changeset(changeset, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(changeset, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def print_changeset(changeset):
+    summary = changeset['summary']
+    print(f"\n🔁 CHANGES since {changeset['from'] or 'first run'}")
+    print(f"  Added:          {summary['added']:5d}")
+    print(f"  Removed:        {summary['removed']:5d}")
+    print(f"  Price changed:  {summary['price_changed']:5d}")
+    print(f"  Other updates:  {summary['updated']:5d}")
+    print(f"  Unchanged:      {summary['unchanged']:5d}")
+
+
+def record_changes(output_data, output_path, old_data=None):
+    """
+    Diff output_data against the output still at output_path (old_data, if
+    the caller already loaded it), write the changeset next to it and
+    stabilize output_data['listings'] in place. Returns the changeset.
+    """
+    if old_data is None:
+        old_data = load_output(output_path)
+    changeset = build_changeset(old_data, output_data)
+    output_data['listings'] = stable_listings(output_data.get('listings', []))
+    keep_areas(output_data['listings'], (old_data or {}).get('listings', []))
+    output_data['total_listings'] = len(output_data['listings'])
+    write_changeset(changeset, get_changes_path(output_path))
+    print_changeset(changeset)
+    return changeset
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Diff scraper outputs by listing URL')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    diff_parser = sub.add_parser('diff', help='Write the changeset between two outputs')
+    diff_parser.add_argument('old', type=str, help='Previous scraper JSON output')
+    diff_parser.add_argument('new', type=str, help='New scraper JSON output')
+    diff_parser.add_argument('--output', '-o', type=str,
+                             help='Changeset path (default: <new>.changes.json)')
+
+    check_parser = sub.add_parser('check', help='Exit 0 if a changeset has changes, 1 if not')
+    check_parser.add_argument('changes', type=str, help='Changeset JSON')
+
+    args = parser.parse_args()
+
+    if args.command == 'diff':
+        changeset = build_changeset(load_output(args.old), load_output(args.new))
+        path = write_changeset(changeset, args.output or get_changes_path(args.new))
+        print_changeset(changeset)
+        print(f"\n✓ Saved {path}")
+    else:
+        with open(args.changes, 'r', encoding='utf-8') as f:
+            changeset = json.load(f)
+        print_changeset(changeset)
+        sys.exit(0 if has_changes(changeset) else 1)
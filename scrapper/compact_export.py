@@ -0,0 +1,239 @@
+"""
+Compact Export - Small publish format for meqasa_data.json
+Hoists constant fields, dictionary-encodes locations/areas and writes
+precompressed .gz/.br siblings for static hosting.
+"""
+
+import json
+import gzip
+import time
+from pathlib import Path
+
+from listing import format_price_text
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, .br siblings are skipped without it
+    brotli = None
+
+
+COMPACT_FORMAT = 'listings-compact'
+COMPACT_VERSION = 1
+
+# Per-listing fields that are constant for a whole scrape and get hoisted
+HOISTED_FIELDS = ['source', 'price_period', 'property_type']
+
+# Row layout for each listing (location/area are indexes into lookup tables)
+ROW_COLUMNS = ['title', 'price', 'bedrooms', 'location', 'area', 'url', 'page']
+
+URL_PREFIXES = {
+    'meqasa': 'https://meqasa.com',
+    'tonaton': 'https://tonaton.com',
+    'jiji': 'https://jiji.com.gh',
+}
+
+
+def get_compact_path(output_path):
+    """Get the compact sibling path for a full JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.compact.json")
+
+
+def to_compact(data):
+    """Convert a full scraper output dict to the compact layout."""
+    listings = data.get('listings', [])
+    source = data.get('source') or (listings[0].get('source') if listings else None)
+    url_prefix = URL_PREFIXES.get(source, '')
+
+    # Only hoist values that really are constant across the listings
+    defaults = {}
+    for field in HOISTED_FIELDS:
+        values = {l.get(field) for l in listings}
+        if len(values) > 1:
+            raise ValueError(
+                f"Listing field '{field}' varies and cannot be hoisted")
+        value = values.pop() if values else None
+        if value is not None:
+            defaults[field] = value
+    defaults['scraped_at'] = data.get('scraped_at')
+
+    locations = {}
+    areas = {}
+    rows = []
+    for listing in listings:
+        url = listing.get('url') or ''
+        if url_prefix and url.startswith(url_prefix):
+            url = url[len(url_prefix):]
+
+        location_idx = locations.setdefault(listing.get('location'), len(locations))
+        area_idx = areas.setdefault(listing.get('area'), len(areas))
+
+        rows.append([
+            listing.get('title'),
+            listing.get('price'),
+            listing.get('bedrooms'),
+            location_idx,
+            area_idx,
+            url,
+            listing.get('page'),
+        ])
+
+    compact = {
+        key: value for key, value in data.items() if key != 'listings'
+    }
+    compact.update({
+        'format': COMPACT_FORMAT,
+        'version': COMPACT_VERSION,
+        'url_prefix': url_prefix,
+        'defaults': defaults,
+        'locations': list(locations),
+        'areas': list(areas),
+        'columns': ROW_COLUMNS,
+        'rows': rows,
+    })
+    return compact
+
+
+def expand_compact(compact):
+    """Expand a compact dict back to the full scraper output layout."""
+    if compact.get('format') != COMPACT_FORMAT:
+        raise ValueError("Not a compact listings file")
+    if compact.get('version') != COMPACT_VERSION:
+        raise ValueError(f"Unsupported compact version: {compact.get('version')}")
+
+    defaults = compact['defaults']
+    url_prefix = compact.get('url_prefix', '')
+    locations = compact['locations']
+    areas = compact['areas']
+    price_period = defaults.get('price_period')
+
+    listings = []
+    for title, price, bedrooms, location_idx, area_idx, url, page in compact['rows']:
+        if url and not url.startswith('http'):
+            url = f"{url_prefix}{url}"
+        listing = {
+            'title': title,
+            'price': price,
+            'price_text': format_price_text(price, price_period),
+        }
+        for field in HOISTED_FIELDS:
+            if field in defaults:
+                listing[field] = defaults[field]
+        listing.update({
+            'bedrooms': bedrooms,
+            'location': locations[location_idx],
+            'area': areas[area_idx],
+            'url': url,
+            'scraped_at': defaults.get('scraped_at'),
+            'page': page,
+        })
+        listings.append(listing)
+
+    skipped = {'format', 'version', 'url_prefix', 'defaults', 'locations',
+               'areas', 'columns', 'rows'}
+    data = {key: value for key, value in compact.items() if key not in skipped}
+    data['listings'] = listings
+    return data
+
+
+def write_compact(data, compact_path):
+    """Write the compact JSON plus .gz/.br siblings. Returns written paths."""
+    compact_path = Path(compact_path)
+    payload = json.dumps(
+        to_compact(data), ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+    written = [compact_path]
+    compact_path.write_bytes(payload)
+
+    gz_path = compact_path.with_name(compact_path.name + '.gz')
+    # mtime=0 keeps the .gz byte-identical when the data has not changed
+    gz_path.write_bytes(gzip.compress(payload, compresslevel=9, mtime=0))
+    written.append(gz_path)
+
+    if brotli is not None:
+        br_path = compact_path.with_name(compact_path.name + '.br')
+        br_path.write_bytes(brotli.compress(payload, quality=11))
+        written.append(br_path)
+
+    return written
+
+
+def load_compact(compact_path):
+    """Load a compact file (plain, .gz or .br) and expand it."""
+    compact_path = Path(compact_path)
+    raw = compact_path.read_bytes()
+    if compact_path.suffix == '.gz':
+        raw = gzip.decompress(raw)
+    elif compact_path.suffix == '.br':
+        if brotli is None:
+            raise RuntimeError("brotli is not installed (pip install brotli)")
+        raw = brotli.decompress(raw)
+    return expand_compact(json.loads(raw))
+
+
+def _time_parse(payload, repeats=5):
+    """Best-of-N json.loads time in milliseconds."""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        json.loads(payload)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare_formats(full_path):
+    """Print size and parse-time comparison of full vs compact output."""
+    full_path = Path(full_path)
+    full_bytes = full_path.read_bytes()
+    data = json.loads(full_bytes)
+
+    compact_bytes = json.dumps(
+        to_compact(data), ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+    rows = [
+        ('full (indent=2)', full_bytes),
+        ('compact', compact_bytes),
+    ]
+
+    print("=" * 70)
+    print("COMPACT FORMAT COMPARISON")
+    print("=" * 70)
+    print(f"\nSource: {full_path} ({len(data.get('listings', []))} listings)\n")
+    print(f"  {'format':20s} {'raw':>12s} {'gzip':>12s} {'brotli':>12s} {'parse':>10s}")
+
+    for name, payload in rows:
+        gz_size = len(gzip.compress(payload, compresslevel=9, mtime=0))
+        br_size = len(brotli.compress(payload, quality=11)) if brotli else None
+        parse_ms = _time_parse(payload)
+        br_text = f"{br_size:>12,}" if br_size is not None else f"{'n/a':>12s}"
+        print(f"  {name:20s} {len(payload):>12,} {gz_size:>12,} {br_text} {parse_ms:>8.1f}ms")
+
+    parsed = json.loads(compact_bytes)
+    start = time.perf_counter()
+    expand_compact(parsed)
+    expand_ms = (time.perf_counter() - start) * 1000
+    print(f"\n  compact parse + expand: {_time_parse(compact_bytes) + expand_ms:.1f}ms")
+    print(f"  size reduction (raw):   {(1 - len(compact_bytes) / len(full_bytes)) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Write or inspect compact listing files')
+    parser.add_argument('input', type=str, help='Full scraper JSON output')
+    parser.add_argument('--output', '-o', type=str,
+                        help='Compact output path (default: <input>.compact.json)')
+    parser.add_argument('--compare', action='store_true',
+                        help='Print size and parse-time comparison only')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_formats(args.input)
+    else:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            full_data = json.load(f)
+        target = args.output or get_compact_path(args.input)
+        for path in write_compact(full_data, target):
+            print(f"✓ Wrote {path} ({path.stat().st_size:,} bytes)")
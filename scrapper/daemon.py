@@ -0,0 +1,464 @@
+"""
+Scrape Daemon - Long-running scraper with per-area refresh cadences
+Instead of a cold full crawl per run (Python start, browser launch, every area),
+the daemon keeps one warm fetcher (Chromium page or HTTP session) and refreshes
+areas from a priority queue ordered by when each area is due. Cadences adapt to
+how much each area changes: busy areas converge on hourly refreshes, quiet ones
+back off to weekly. Schedule state survives restarts, and a small local HTTP
+endpoint serves /health and /metrics.
+
+After each cycle the source's outputs go through the same stages as a normal
+run: outliers, change feed, aggregates and every output format.
+"""
+
+import heapq
+import json
+import signal
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from changefeed import load_output
+from listing import Listing, canonical_url
+from pipeline import Pipeline
+
+
+HOUR = 3600
+
+# Refresh interval bounds and starting point for areas with no history
+MIN_INTERVAL = 1 * HOUR
+MAX_INTERVAL = 7 * 24 * HOUR
+DEFAULT_INTERVAL = 12 * HOUR
+
+# Share of an area's listings added or removed in one refresh that counts as busy
+BUSY_CHURN = 0.10
+
+# Recreate the browser after this many consecutive fetch errors
+RESTART_AFTER_ERRORS = 3
+
+
+def get_state_path(output_path):
+    """Get the daemon state path for a scraper JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.daemon.json")
+
+
+@dataclass(slots=True)
+class AreaSchedule:
+    name: str
+    url: str
+    interval: float = DEFAULT_INTERVAL
+    next_due: float = 0.0
+    last_run: float | None = None
+    last_churn: float | None = None
+    listings: int = 0
+    runs: int = 0
+    failures: int = 0
+
+
+class Scheduler:
+    def __init__(self, areas, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        """Priority queue of areas keyed by next due time."""
+        self.areas = {a.name: a for a in areas}
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._heap = [(a.next_due, -(a.last_churn or 0), a.name) for a in areas]
+        heapq.heapify(self._heap)
+
+    def pop_due(self, now, limit):
+        """Up to limit due areas, most overdue first (busier areas win ties)."""
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < limit:
+            due.append(self.areas[heapq.heappop(self._heap)[2]])
+        return due
+
+    def next_due(self):
+        return self._heap[0][0] if self._heap else None
+
+    def reschedule(self, area, now, churn=None, ok=True):
+        """Adapt the area's cadence to its churn and queue its next refresh."""
+        if not ok:
+            area.failures += 1
+            # Retry failed areas soon, but back off if they keep failing
+            delay = min(self.min_interval * 2 ** min(area.failures - 1, 6), area.interval)
+        else:
+            area.failures = 0
+            area.runs += 1
+            area.last_run = now
+            area.last_churn = churn
+            # churn is None on an area's first refresh after a restart without saved URL sets
+            if churn is not None and churn >= BUSY_CHURN:
+                area.interval /= 2
+            elif churn == 0:
+                area.interval *= 2
+            area.interval = min(max(area.interval, self.min_interval), self.max_interval)
+            delay = area.interval
+        area.next_due = now + delay
+        heapq.heappush(self._heap, (area.next_due, -(area.last_churn or 0), area.name))
+
+    def requeue(self, area):
+        """Put an area back unchanged (cycle interrupted before it ran)."""
+        heapq.heappush(self._heap, (area.next_due, -(area.last_churn or 0), area.name))
+
+    def overdue(self, now):
+        return sum(1 for a in self.areas.values() if a.next_due <= now)
+
+
+class ScrapeDaemon:
+    def __init__(self, adapter, output_path=None, state_path=None, areas_per_cycle=10,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 formats=('json', 'compact', 'snapshot'), outliers='flag', max_pages=None,
+                 hedge=False):
+        """Warm-fetcher crawl loop for one source adapter."""
+        self.adapter = adapter
+        self.output_path = Path(output_path or adapter.output_path())
+        self.state_path = Path(state_path or get_state_path(self.output_path))
+        self.areas_per_cycle = areas_per_cycle
+        self.formats = formats
+        self.outliers = outliers
+        self.pipeline = Pipeline(adapter, max_pages=max_pages, hedge=hedge)
+
+        self.listings = {}       # canonical URL -> Listing
+        self.area_urls = {}      # area -> set of canonical URLs last seen there
+        self._fetcher = None
+        self._consecutive_errors = 0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.status = {
+            'cycles': 0,
+            'areas_refreshed': 0,
+            'area_failures': 0,
+            'browser_restarts': 0,
+            'last_cycle_at': None,
+            'last_cycle_seconds': None,
+            'last_cycle_ok': None,
+            'last_error': None,
+        }
+
+        state = self._read_state()
+        self._load_listings(state.get('area_urls', {}))
+        self.scheduler = Scheduler(self._load_schedule(state.get('areas', {})),
+                                   min_interval, max_interval)
+
+    # -- state -----------------------------------------------------------------
+
+    def _area_key(self, area):
+        return area or self.adapter.name
+
+    def _read_state(self):
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load_listings(self, saved_urls):
+        """
+        Start from the last published output so the first save is not a wipe.
+        Each area's URL set comes from the saved state; an area without one is
+        unknown until its first refresh, since a listing's area tag only names
+        one of the areas that return it.
+        """
+        data = load_output(self.output_path)
+        if data is None:
+            return
+        for row in data.get('listings', []):
+            listing = Listing.from_dict(row)
+            self.listings.setdefault(canonical_url(listing.url), listing)
+        for name, urls in saved_urls.items():
+            self.area_urls[name] = {url for url in urls if url in self.listings}
+        print(f"Loaded {len(self.listings)} listings from {self.output_path} "
+              f"({len(self.area_urls)} areas with known URLs)")
+
+    def _load_schedule(self, saved):
+        areas = []
+        for name, url in self.adapter.areas():
+            name = self._area_key(name)
+            if name in saved:
+                areas.append(AreaSchedule(**{**saved[name], 'name': name, 'url': url}))
+            else:
+                areas.append(AreaSchedule(name, url,
+                                          listings=len(self.area_urls.get(name, ()))))
+        return areas
+
+    def save_state(self):
+        state = {
+            'source': self.adapter.name,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'areas': {name: asdict(area) for name, area in sorted(self.scheduler.areas.items())},
+        }
+        with self._lock:
+            state['area_urls'] = {name: sorted(urls) for name, urls in sorted(self.area_urls.items())}
+        tmp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        tmp_path.replace(self.state_path)
+
+    # -- crawling --------------------------------------------------------------
+
+    def _get_fetcher(self):
+        if self._fetcher is None:
+            self._fetcher = self.pipeline._make_fetcher()
+        return self._fetcher
+
+    def _restart_fetcher(self):
+        if self._fetcher is not None:
+            try:
+                self._fetcher.close()
+            except Exception:
+                pass
+        self._fetcher = None
+        self._consecutive_errors = 0
+        self.status['browser_restarts'] += 1
+
+    def refresh_area(self, area):
+        """Crawl one area; returns (ok, churn)."""
+        area_name = None if area.name == self.adapter.name else area.name
+        found = {}
+        first_page_ok = False
+        complete = True
+        # fetch_area retries and decides when a failing area is abandoned
+        for task in self.pipeline.fetch_area(self._get_fetcher(), area_name, area.url):
+            if task.error:
+                self._consecutive_errors += 1
+                self.status['last_error'] = f"{area.name} page {task.page_num}: {task.error}"
+                complete = False
+                continue
+            self._consecutive_errors = 0
+            if task.status != 200 or not task.html:
+                break
+            first_page_ok = first_page_ok or task.page_num == 1
+            for listing in self.adapter.parse(task, task.fetched_at):
+                listing = self.adapter.normalize(listing)
+                if listing is not None:
+                    found.setdefault(canonical_url(listing.url), listing)
+
+        if self._consecutive_errors >= RESTART_AFTER_ERRORS:
+            self._restart_fetcher()
+        if not first_page_ok:
+            return False, None
+
+        known = area.name in self.area_urls
+        before = self.area_urls.get(area.name, set())
+        after = set(found)
+        if not complete:
+            # A page failed, so listings missing from this pass may just be unseen
+            after |= before
+        with self._lock:
+            for key in before - after:
+                # Gone from this area; drop it unless another area still lists it
+                if not any(key in urls for name, urls in self.area_urls.items()
+                           if name != area.name):
+                    self.listings.pop(key, None)
+            for key, listing in found.items():
+                self.listings[key] = listing
+            self.area_urls[area.name] = after
+            if not known and self.area_urls.keys() >= self.scheduler.areas.keys():
+                # Every area has been refreshed; loaded listings none of them return are gone
+                owned = set().union(*self.area_urls.values())
+                for key in self.listings.keys() - owned:
+                    del self.listings[key]
+        area.listings = len(after)
+        if not known:
+            return True, None
+        return True, len(before ^ after) / max(len(before | after), 1)
+
+    def run_cycle(self):
+        """Refresh the areas that are due, then publish. Returns areas refreshed."""
+        now = time.time()
+        due = self.scheduler.pop_due(now, self.areas_per_cycle)
+        if not due:
+            return 0
+
+        start = time.time()
+        refreshed = 0
+        print(f"\n[{datetime.now():%Y-%m-%d %H:%M}] Cycle: {len(due)} areas due")
+        for area in due:
+            if self._stop.is_set():
+                self.scheduler.requeue(area)
+                continue
+            try:
+                ok, churn = self.refresh_area(area)
+            except Exception as e:
+                # A parse or browser error costs this area, not the daemon
+                self.status['last_error'] = f"{area.name}: {type(e).__name__}: {e}"
+                self._consecutive_errors += 1
+                if self._consecutive_errors >= RESTART_AFTER_ERRORS:
+                    self._restart_fetcher()
+                ok, churn = False, None
+            self.scheduler.reschedule(area, time.time(), churn, ok=ok)
+            if ok:
+                refreshed += 1
+                self.status['areas_refreshed'] += 1
+                churn_text = 'unknown' if churn is None else f"{churn:.0%}"
+                print(f"  {area.name}: {area.listings} listings, churn {churn_text}, "
+                      f"next in {area.interval / HOUR:.0f}h")
+            else:
+                self.status['area_failures'] += 1
+                print(f"  {area.name}: failed ({self.status['last_error'] or 'no listings page'})")
+
+        try:
+            self.publish()
+            published = True
+        except Exception as e:
+            # Keep the refreshed listings in memory; the next cycle publishes again
+            self.status['last_error'] = f"publish: {type(e).__name__}: {e}"
+            print(f"  ⚠️  Publish failed: {self.status['last_error']}")
+            published = False
+        self.save_state()
+        self.status['cycles'] += 1
+        self.status['last_cycle_ok'] = refreshed > 0 and published
+        self.status['last_cycle_at'] = datetime.now().isoformat(timespec='seconds')
+        self.status['last_cycle_seconds'] = round(time.time() - start, 1)
+        return len(due)
+
+    def publish(self):
+        """Run the normal output stages over the current listing set."""
+        pipeline = self.pipeline
+        with self._lock:
+            pipeline.listings = list(self.listings.values())
+            pipeline.area_stats = {name: len(urls) for name, urls in self.area_urls.items()}
+        if not pipeline.listings:
+            return
+        previous_output = load_output(self.output_path)
+        pipeline.filter_outliers(self.output_path, self.outliers, previous_output)
+        for path in pipeline.save(self.output_path, self.formats, previous_output):
+            print(f"✓ Saved {path}")
+
+    def run_forever(self, poll_seconds=60):
+        print(f"Daemon started for {self.adapter.name}: {len(self.scheduler.areas)} areas")
+        try:
+            while not self._stop.is_set():
+                self.run_cycle()
+                next_due = self.scheduler.next_due()
+                wait = poll_seconds if next_due is None else next_due - time.time()
+                self._stop.wait(min(max(wait, 1), poll_seconds))
+        finally:
+            self.close()
+            print("Daemon stopped")
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def close(self):
+        if self._fetcher is not None:
+            self._fetcher.close()
+            self._fetcher = None
+        self.save_state()
+
+    # -- health and metrics ----------------------------------------------------
+
+    def health(self):
+        now = time.time()
+        with self._lock:
+            listings = len(self.listings)
+        return {
+            'status': 'degraded' if self.status['last_cycle_ok'] is False else 'ok',
+            'source': self.adapter.name,
+            'uptime_seconds': round(now - self.started),
+            'listings': listings,
+            'areas': len(self.scheduler.areas),
+            'areas_overdue': self.scheduler.overdue(now),
+            **self.status,
+        }
+
+    def metrics_text(self):
+        """Prometheus text exposition of the daemon counters."""
+        health = self.health()
+        fetch = self.pipeline.metrics
+        source = self.adapter.name
+        lines = []
+
+        def metric(name, value, kind='gauge'):
+            lines.append(f"# TYPE scraper_{name} {kind}")
+            lines.append(f'scraper_{name}{{source="{source}"}} {value}')
+
+        metric('uptime_seconds', health['uptime_seconds'])
+        metric('listings', health['listings'])
+        metric('areas_overdue', health['areas_overdue'])
+        metric('cycles_total', health['cycles'], 'counter')
+        metric('areas_refreshed_total', health['areas_refreshed'], 'counter')
+        metric('area_failures_total', health['area_failures'], 'counter')
+        metric('browser_restarts_total', health['browser_restarts'], 'counter')
+        metric('pages_fetched_total', fetch.counts['pages_fetched'], 'counter')
+        metric('fetch_errors_total', fetch.counts['fetch_errors'], 'counter')
+        metric('fetch_seconds_total', round(fetch.seconds['fetch'], 3), 'counter')
+        if health['last_cycle_seconds'] is not None:
+            metric('last_cycle_seconds', health['last_cycle_seconds'])
+        return '\n'.join(lines) + '\n'
+
+    def start_http(self, port, host='127.0.0.1'):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/health':
+                    body = json.dumps(daemon.health()).encode('utf-8')
+                    content_type = 'application/json'
+                elif self.path == '/metrics':
+                    body = daemon.metrics_text().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='http', daemon=True).start()
+        print(f"Health: http://{host}:{port}/health  Metrics: http://{host}:{port}/metrics")
+        return server
+
+
+if __name__ == "__main__":
+    import argparse
+    from source_adapters import ADAPTERS
+
+    parser = argparse.ArgumentParser(description='Run a source as a long-lived scrape daemon')
+    parser.add_argument('source', choices=sorted(ADAPTERS), help='Source to keep fresh')
+    parser.add_argument('--output', '-o', type=str, help='Custom output path')
+    parser.add_argument('--state', type=str, help='Schedule state path (default: <output>.daemon.json)')
+    parser.add_argument('--port', type=int, default=8787, help='Health/metrics port (0 to disable)')
+    parser.add_argument('--areas-per-cycle', type=int, default=10,
+                        help='Areas refreshed before each publish (default: 10)')
+    parser.add_argument('--min-hours', type=float, default=MIN_INTERVAL / HOUR,
+                        help='Fastest refresh cadence for busy areas (default: 1)')
+    parser.add_argument('--max-hours', type=float, default=MAX_INTERVAL / HOUR,
+                        help='Slowest refresh cadence for quiet areas (default: 168)')
+    parser.add_argument('--pages', '-p', type=int, help='Max pages per area')
+    parser.add_argument('--outliers', choices=['off', 'flag', 'quarantine'], default='flag')
+    parser.add_argument('--once', action='store_true', help='Run one cycle and exit')
+    parser.add_argument('--hedge', action='store_true',
+                        help='Re-request pages still loading after the p95 latency')
+    args = parser.parse_args()
+
+    daemon = ScrapeDaemon(
+        ADAPTERS[args.source](),
+        output_path=args.output,
+        state_path=args.state,
+        areas_per_cycle=args.areas_per_cycle,
+        min_interval=args.min_hours * HOUR,
+        max_interval=args.max_hours * HOUR,
+        outliers=args.outliers,
+        max_pages=args.pages,
+        hedge=args.hedge,
+    )
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+
+    if args.port:
+        daemon.start_http(args.port)
+    if args.once:
+        daemon.run_cycle()
+        daemon.close()
+    else:
+        daemon.run_forever()
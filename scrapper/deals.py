@@ -0,0 +1,313 @@
+"""
+Deal Index - Listings ranked by how far below their market they are priced
+Each listing is scored right after the crawl against the robust baseline of
+its (location, bedrooms) cell from the outlier stage: the deal score is the
+negated modified z-score, so 2.0 means "two robust deviations cheaper than
+the median". Listings are kept in a per-cell sorted index, and the top N of
+every cell is published, so "best 2BR deals in Madina" is a lookup instead of
+a scan. After each crawl only the cells touched by the changeset, or whose
+baseline moved, are re-ranked. Only the published deals are saved; the
+ranking and baselines are rebuilt from the previous output on load.
+
+Listings scored below -Z_THRESHOLD are left out: that far under the median
+is almost always a daily, yearly or USD price, not a bargain.
+"""
+
+import heapq
+import json
+from bisect import bisect_left, insort
+from datetime import datetime
+from pathlib import Path
+
+from aggregates import cell_key, split_cell_key
+from changefeed import changed_urls
+from listing import canonical_url
+from locations import normalize_location
+from outliers import Z_THRESHOLD, score_listings
+
+
+DEALS_FORMAT = 'listing-deals'
+DEALS_VERSION = 2
+
+# Deals published per (location, bedrooms) cell
+TOP_N = 10
+
+
+def get_deals_path(output_path):
+    """Get the deal index path for a scraper JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.deals.json")
+
+
+class DealIndex:
+    def __init__(self, top_n=TOP_N):
+        """Per-cell sorted (-score, url) lists plus each cell's baseline (not saved)."""
+        self.top_n = top_n
+        self.ranked = {}      # cell key -> sorted [(-score, url)]
+        self.members = {}     # url -> [cell key, score]
+        self.baselines = {}   # cell key -> [median, mad, level]
+        self.deals = {}       # cell key -> published top entries
+        self.applied = 0
+
+    def _insert(self, url, key, score):
+        self.members[url] = [key, score]
+        insort(self.ranked.setdefault(key, []), (-score, url))
+
+    def _rank(self, url, key, score):
+        if score < -Z_THRESHOLD or key.endswith('|'):
+            return
+        self._insert(url, key, round(score, 4))
+
+    def _remove(self, url):
+        member = self.members.pop(url, None)
+        if member is None:
+            return None
+        key, score = member
+        ranked = self.ranked[key]
+        del ranked[bisect_left(ranked, (-score, url))]
+        if not ranked:
+            del self.ranked[key]
+        return key
+
+    def _score(self, listings):
+        """Priced rows, their URLs and cell keys, the scores and each cell's baseline."""
+        rows = [l for l in listings if l.get('price')]
+        scores = score_listings(rows) if rows else None
+        urls = [canonical_url(l['url']) for l in rows]
+        keys = [cell_key(location, bedrooms) for location, bedrooms in
+                (scores['cells'] if rows else [])]
+
+        baselines = {}
+        for i, key in enumerate(keys):
+            if key not in baselines:
+                baselines[key] = [round(float(scores['median'][i]), 2),
+                                  round(float(scores['mad'][i]), 2),
+                                  scores['level'][i].item()]
+        return rows, urls, keys, scores, baselines
+
+    def index_members(self, listings):
+        """Rebuild the ranking and baselines from the output the stored deals describe."""
+        self.ranked = {}
+        self.members = {}
+        _, urls, keys, scores, self.baselines = self._score(listings)
+        for i, (url, key) in enumerate(zip(urls, keys)):
+            if url not in self.members:
+                self._rank(url, key, -float(scores['z'][i]))
+
+    @classmethod
+    def build(cls, listings, top_n=TOP_N):
+        index = cls(top_n)
+        index.update(listings)
+        return index
+
+    def update(self, listings, changeset=None):
+        """
+        Re-score a crawl. With a changeset, only its URLs and the cells whose
+        baseline changed are re-ranked; without one, everything is.
+        Returns the number of cells re-published.
+        """
+        rows, urls, keys, scores, baselines = self._score(listings)
+
+        if changeset is None:
+            touched_urls = set(self.members) | set(urls)
+        else:
+            touched_urls = changed_urls(changeset)
+        moved = {key for key in baselines.keys() | self.baselines.keys()
+                 if baselines.get(key) != self.baselines.get(key)}
+
+        touched_cells = set(moved)
+        for url in touched_urls:
+            key = self._remove(url)
+            if key is not None:
+                touched_cells.add(key)
+        if changeset is not None:
+            # Cells with a new baseline re-rank every member
+            for url, (key, _) in list(self.members.items()):
+                if key in moved:
+                    self._remove(url)
+
+        for i, (url, key) in enumerate(zip(urls, keys)):
+            if key in moved or url in touched_urls:
+                if url in self.members:
+                    continue
+                touched_cells.add(key)
+                self._rank(url, key, -float(scores['z'][i]))
+
+        self.baselines = baselines
+        by_url = dict(zip(urls, rows))
+        for key in touched_cells:
+            self._publish(key, by_url)
+        if changeset is not None:
+            self.applied += 1
+        return len(touched_cells)
+
+    def _publish(self, key, by_url):
+        entries = []
+        missing = []
+        baseline = self.baselines.get(key)
+        for neg_score, url in self.ranked.get(key, []):
+            if neg_score >= 0 or len(entries) == self.top_n:
+                break
+            listing = by_url.get(url)
+            if listing is None:
+                # Ranked from an output that drifted from this crawl's
+                missing.append(url)
+                continue
+            median = baseline[0]
+            entries.append({
+                'url': url,
+                'title': listing.get('title'),
+                'location': listing.get('location'),
+                'bedrooms': listing.get('bedrooms'),
+                'price': listing['price'],
+                'median': round(median),
+                'discount': round((median - listing['price']) / median * 100, 1),
+                'score': -neg_score,
+            })
+        for url in missing:
+            self._remove(url)
+        if entries:
+            self.deals[key] = entries
+        else:
+            self.deals.pop(key, None)
+
+    # -- queries ---------------------------------------------------------------
+
+    def top(self, location, bedrooms, n=None):
+        """Best published deals for a location and bedroom count."""
+        entries = self.deals.get(cell_key(normalize_location(location), bedrooms), [])
+        return entries[:n or self.top_n]
+
+    def best(self, n=10, bedrooms=None):
+        """Best deals across every cell (optionally one bedroom count)."""
+        candidates = (entry for key, entries in self.deals.items()
+                      if bedrooms is None or split_cell_key(key)[1] == bedrooms
+                      for entry in entries)
+        return heapq.nlargest(n, candidates, key=lambda e: e['score'])
+
+    def verify(self, listings):
+        """Cells whose published deals differ from a full rebuild."""
+        fresh = DealIndex.build(listings, self.top_n)
+        return sorted(key for key in self.deals.keys() | fresh.deals.keys()
+                      if self.deals.get(key) != fresh.deals.get(key))
+
+    # -- persistence -----------------------------------------------------------
+
+    def save(self, path):
+        output = {
+            'format': DEALS_FORMAT,
+            'version': DEALS_VERSION,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'top_n': self.top_n,
+            'applied_changesets': self.applied,
+            'scored_listings': len(self.members),
+            'deals': dict(sorted(self.deals.items())),
+        }
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, separators=(',', ':'))
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path, listings=None):
+        """Load saved deals; pass the output they describe to rebuild the ranking."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != DEALS_FORMAT or data.get('version') != DEALS_VERSION:
+            raise ValueError(f"{path} is not a version {DEALS_VERSION} deal index")
+        index = cls(data.get('top_n', TOP_N))
+        if listings is not None:
+            index.index_members(listings)
+        index.deals = data['deals']
+        index.applied = data.get('applied_changesets', 0)
+        return index
+
+
+def print_deals(entries, heading):
+    print(f"\n{heading}")
+    for e in entries:
+        print(f"  {e['location'][:22]:22s} {e['bedrooms']}BR  GH₵{e['price']:>8,}  "
+              f"{e['discount']:5.1f}% below GH₵{e['median']:,}  (score {e['score']:.2f})")
+
+
+def update_deals(changeset, listings, output_path, previous=None, top_n=TOP_N):
+    """
+    Scraper hook: re-rank the cells a crawl's changeset touched and save the
+    deal index next to the output. previous is the listings of the output the
+    saved deals describe (None on a first run); the ranking is rebuilt from
+    it. Returns the index.
+    """
+    path = get_deals_path(output_path)
+    index = None
+    if path.exists() and previous is not None:
+        try:
+            index = DealIndex.load(path, previous)
+        except (ValueError, KeyError, json.JSONDecodeError) as e:
+            print(f"  ⚠️  Rebuilding deal index: {e}")
+
+    if index is None or index.top_n != top_n:
+        index = DealIndex.build(listings, top_n)
+        print(f"\n🏷️  DEALS: ranked {len(index.members)} listings, "
+              f"{len(index.deals)} cells with deals")
+    else:
+        refreshed = index.update(listings, changeset)
+        print(f"\n🏷️  DEALS: re-ranked {refreshed} of {len(index.ranked)} cells")
+
+    print(f"✓ Saved {index.save(path)}")
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Best-deal index per location and bedroom count')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = sub.add_parser('build', help='Score every listing in a scraper output')
+    build_parser.add_argument('input', type=str, help='Scraper JSON output')
+    build_parser.add_argument('--top', type=int, default=TOP_N,
+                              help=f'Deals kept per cell (default: {TOP_N})')
+
+    verify_parser = sub.add_parser('verify', help='Check an index against a full rebuild')
+    verify_parser.add_argument('index', type=str, help='Deal index')
+    verify_parser.add_argument('input', type=str, help='Scraper JSON output')
+
+    show_parser = sub.add_parser('show', help='Print deals from an index')
+    show_parser.add_argument('index', type=str, help='Deal index')
+    show_parser.add_argument('--location', type=str, help='Location (with --bedrooms)')
+    show_parser.add_argument('--bedrooms', type=int)
+    show_parser.add_argument('-n', type=int, default=10, help='How many (default: 10)')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        with open(args.input, 'r', encoding='utf-8') as f:
+            listings = json.load(f).get('listings', [])
+        start = time.perf_counter()
+        index = DealIndex.build(listings, args.top)
+        elapsed = time.perf_counter() - start
+        print(f"Ranked {len(index.members)} listings into {len(index.deals)} cells "
+              f"in {elapsed * 1000:.1f}ms")
+        print(f"✓ Saved {index.save(get_deals_path(args.input))}")
+
+    elif args.command == 'verify':
+        index = DealIndex.load(args.index)
+        with open(args.input, 'r', encoding='utf-8') as f:
+            listings = json.load(f).get('listings', [])
+        mismatched = index.verify(listings)
+        if mismatched:
+            print(f"❌ {len(mismatched)} cells differ: {', '.join(mismatched[:10])}")
+            exit(1)
+        print(f"✓ All {len(index.deals)} cells match a full rebuild")
+
+    else:
+        index = DealIndex.load(args.index)
+        if args.location:
+            entries = index.top(args.location, args.bedrooms, args.n)
+            print_deals(entries, f"Best deals in {args.location}, {args.bedrooms}BR:")
+        else:
+            label = f"{args.bedrooms}BR " if args.bedrooms else ''
+            print_deals(index.best(args.n, args.bedrooms), f"Best {label}deals overall:")
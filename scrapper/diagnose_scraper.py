@@ -5,6 +5,24 @@ Diagnostic script to check if Meqasa scraping is working
 from playwright.sync_api import sync_playwright
 import time
 
+from health import evaluate_probe
+
+
+SELECTORS_TO_TEST = [
+    'div.mqs-prop-dt-wrapper',
+    'div.mqs-featured-prop-inner-wrap',
+    'div[class*="prop"]',
+    'div[class*="listing"]',
+    'article',
+    '.property-card',
+    '.listing-card',
+    'a[href*="for-rent"]',
+    'h2 a',
+    '.price',
+    '[class*="price"]',
+]
+
+
 def diagnose():
     print("=" * 70)
     print("MEQASA SCRAPER DIAGNOSTIC")
@@ -36,36 +54,19 @@ def diagnose():
             f.write(html)
         print(f"   Saved {len(html)} characters")
 
-        # Check for different possible selectors
+        # Selector counts and the first 100 links in one evaluate call
         print("\n4. Testing CSS selectors...")
+        probed = evaluate_probe(page, SELECTORS_TO_TEST)
 
-        selectors_to_test = [
-            'div.mqs-prop-dt-wrapper',
-            'div.mqs-featured-prop-inner-wrap',
-            'div[class*="prop"]',
-            'div[class*="listing"]',
-            'article',
-            '.property-card',
-            '.listing-card',
-            'a[href*="for-rent"]',
-            'h2 a',
-            '.price',
-            '[class*="price"]',
-        ]
-
-        for selector in selectors_to_test:
-            elements = page.query_selector_all(selector)
-            count = len(elements)
+        for selector in SELECTORS_TO_TEST:
+            count = probed['counts'][selector]
             status = "✓" if count > 0 else "✗"
             print(f"   {status} '{selector}': {count} elements")
 
         # Try to find any links with rental info
         print("\n5. Looking for rental links...")
-        links = page.query_selector_all('a')
         rental_links = []
-        for link in links[:100]:  # Check first 100 links
-            href = link.get_attribute('href') or ''
-            text = link.text_content() or ''
+        for href, text in probed['links']:  # First 100 links
             if 'rent' in href.lower() or 'bedroom' in text.lower():
                 rental_links.append((href[:60], text[:40]))
 
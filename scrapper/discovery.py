@@ -0,0 +1,459 @@
+"""
+Listing Discovery - Enumerate listings from sitemaps and feeds instead of search pages
+A full crawl walks up to 10 search pages x ~80 areas of ~300 KB HTML just to
+learn which listings exist. Where a source publishes them, discovery reads
+that list from robots.txt sitemaps, sitemap indexes (plain or gzipped), RSS /
+Atom feeds or JSON-LD embedded in a page, with each URL's lastmod. The list
+is diffed against the URLs known from the last run, and only new or changed
+listings are fetched (one detail page each). Listings missing from the feed
+are dropped.
+
+Sources without a usable feed fall back to the search crawl, as does a feed
+that returns too few of the listings we already know (a partial sitemap would
+otherwise look like mass removals). Run it offline with --fixtures, which
+serves saved files laid out as <dir>/<host>/<path>.
+"""
+
+import gzip
+import json
+import re
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from listing import Listing, canonical_url, now_epoch
+from resilience import FetchError
+
+try:
+    import requests
+except ImportError:  # falls back to urllib
+    requests = None
+
+
+DISCOVERY_FORMAT = 'listing-discovery'
+DISCOVERY_VERSION = 1
+
+# Feed documents read per run (robots.txt, sitemap indexes, child sitemaps)
+MAX_FEED_DOCUMENTS = 50
+
+# A feed must list at least this share of the listings we already know,
+# or it is treated as partial and the search crawl runs instead
+MIN_KNOWN_COVERAGE = 0.5
+
+# Detail pages fetched per run; the rest are picked up on the next run
+MAX_DETAIL_FETCHES = 300
+
+FEED_TIMEOUT = 30
+
+
+def get_discovery_path(output_path):
+    """Get the discovery state path for a scraper JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.discovery.json")
+
+
+def normalize_lastmod(value):
+    """ISO 8601 (sitemaps, Atom) or RFC 822 (RSS) date as a UTC ISO string."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat(timespec='seconds')
+
+
+class HttpFeedFetcher:
+    def __init__(self):
+        """Raw bytes (sitemaps may be gzipped), one connection pool."""
+        from pipeline import DEFAULT_HEADERS
+        self.headers = DEFAULT_HEADERS
+        self.session = requests.Session() if requests is not None else None
+
+    def fetch(self, url, timeout=FEED_TIMEOUT):
+        """Return (status, body bytes)."""
+        if self.session is not None:
+            response = self.session.get(url, headers=self.headers, timeout=timeout)
+            return response.status_code, response.content
+
+        import urllib.error
+        import urllib.request
+        request = urllib.request.Request(url, headers=self.headers)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, b''
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+
+class FixtureFetcher:
+    def __init__(self, directory, text=False):
+        """
+        Serve saved files: https://host/a/b.xml -> <directory>/host/a/b.xml.
+        Bytes for feeds; text=True for pages, like the pipeline fetchers.
+        """
+        self.directory = Path(directory)
+        self.text = text
+        self.requested = []
+
+    def _path(self, url):
+        parts = urlsplit(url)
+        path = parts.path.lstrip('/') or 'index.html'
+        return self.directory / parts.netloc / path
+
+    def fetch(self, url, timeout=FEED_TIMEOUT, wait_seconds=0):
+        self.requested.append(url)
+        path = self._path(url)
+        if not path.is_file():
+            return 404, '' if self.text else b''
+        if self.text:
+            return 200, path.read_text(encoding='utf-8')
+        return 200, path.read_bytes()
+
+    def close(self):
+        pass
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1].lower()
+
+
+def _child_text(element, name):
+    for child in element:
+        if _local_name(child.tag) == name:
+            return (child.text or '').strip()
+    return None
+
+
+def parse_feed(body):
+    """
+    Parse one feed document. Returns (entries, children): entries are
+    (url, lastmod) pairs and children are further sitemaps to read.
+    """
+    if body[:2] == b'\x1f\x8b':
+        body = gzip.decompress(body)
+    text = body.decode('utf-8', errors='replace')
+    stripped = text.lstrip()
+
+    if re.match(r'(?i)(user-agent|sitemap|disallow|allow|#)', stripped):
+        # robots.txt
+        children = re.findall(r'(?im)^\s*sitemap:\s*(\S+)', text)
+        return [], children
+
+    if stripped.startswith('<?xml') or re.match(r'<(urlset|sitemapindex|rss|feed)\b', stripped):
+        try:
+            root = ET.fromstring(body)
+        except ET.ParseError:
+            return [], []
+        kind = _local_name(root.tag)
+        if kind == 'sitemapindex':
+            return [], [_child_text(s, 'loc') for s in root if _child_text(s, 'loc')]
+        if kind == 'urlset':
+            return [(_child_text(u, 'loc'), normalize_lastmod(_child_text(u, 'lastmod')))
+                    for u in root if _child_text(u, 'loc')], []
+        if kind == 'rss':
+            items = [item for item in root.iter() if _local_name(item.tag) == 'item']
+            return [(_child_text(i, 'link'), normalize_lastmod(_child_text(i, 'pubdate')))
+                    for i in items if _child_text(i, 'link')], []
+        if kind == 'feed':
+            entries = []
+            for entry in root:
+                if _local_name(entry.tag) != 'entry':
+                    continue
+                link = next((l.get('href') for l in entry if _local_name(l.tag) == 'link'), None)
+                if link:
+                    entries.append((link, normalize_lastmod(_child_text(entry, 'updated'))))
+            return entries, []
+        return [], []
+
+    return embedded_entries(text), []
+
+
+def embedded_entries(html):
+    """(url, lastmod) pairs from JSON-LD blocks in an HTML page."""
+    entries = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            url = node.get('url') or node.get('@id')
+            if isinstance(url, str) and url.startswith('http'):
+                entries.append((url, normalize_lastmod(node.get('dateModified')
+                                                       or node.get('datePosted'))))
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    for block in re.findall(r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>',
+                            html, re.DOTALL | re.IGNORECASE):
+        try:
+            walk(json.loads(block))
+        except json.JSONDecodeError:
+            continue
+    return entries
+
+
+@dataclass(slots=True)
+class Discovery:
+    entries: dict = field(default_factory=dict)   # canonical URL -> lastmod or None
+    feeds: list = field(default_factory=list)     # documents that listed entries
+    requests: int = 0
+    bytes: int = 0
+
+
+def discover(adapter, fetcher, max_documents=MAX_FEED_DOCUMENTS):
+    """Listing URLs from an adapter's feeds, or None if it has no usable feed."""
+    result = Discovery()
+    pending = list(adapter.feed_urls)
+    visited = set()
+    while pending and result.requests < max_documents:
+        url = pending.pop(0)
+        if url in visited:
+            continue
+        visited.add(url)
+        try:
+            status, body = fetcher.fetch(url, FEED_TIMEOUT)
+        except Exception as e:
+            print(f"  {url}: {type(e).__name__}")
+            continue
+        result.requests += 1
+        result.bytes += len(body or b'')
+        if status != 200 or not body:
+            continue
+
+        entries, children = parse_feed(body)
+        pending.extend(children)
+        found = 0
+        for entry_url, lastmod in entries:
+            key = canonical_url(entry_url)
+            if adapter.is_listing_url(key):
+                previous = result.entries.get(key)
+                result.entries[key] = max(filter(None, (previous, lastmod)), default=None)
+                found += 1
+        if found:
+            result.feeds.append(url)
+    return result if result.entries else None
+
+
+def diff_entries(entries, state, known_urls):
+    """
+    (new, changed, gone) canonical URLs. A listing is changed when its
+    lastmod moved past the one recorded last run; gone when it was known
+    but the feed no longer lists it.
+    """
+    new, changed = [], []
+    for url, lastmod in entries.items():
+        if url not in known_urls:
+            new.append(url)
+        elif lastmod and state.get(url) and lastmod > state[url]:
+            changed.append(url)
+    gone = sorted(known_urls - entries.keys())
+    return sorted(new), sorted(changed), gone
+
+
+def load_state(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') != DISCOVERY_FORMAT or data.get('version') != DISCOVERY_VERSION:
+        raise ValueError(f"{path} is not a version {DISCOVERY_VERSION} discovery state")
+    return data['entries']
+
+
+def save_state(path, entries, feeds):
+    output = {
+        'format': DISCOVERY_FORMAT,
+        'version': DISCOVERY_VERSION,
+        'updated_at': datetime.now().isoformat(timespec='seconds'),
+        'feeds': feeds,
+        'entries': dict(sorted(entries.items())),
+    }
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, separators=(',', ':'))
+    tmp_path.replace(path)
+    return path
+
+
+def fetch_details(adapter, urls, fetcher, resilience, limit=MAX_DETAIL_FETCHES):
+    """
+    Fetch and parse detail pages. Returns (listings by URL, skipped URLs,
+    URLs still to fetch); skipped ones parsed to None (not an apartment...).
+    """
+    listings, skipped, failed = {}, set(), []
+    for i, url in enumerate(urls[:limit]):
+        try:
+            status, html = resilience.call(
+                url, 'discovery', lambda: fetcher.fetch(url, adapter.timeout, adapter.wait_seconds))
+        except FetchError as e:
+            print(f"  {url}: {e}")
+            failed.append(url)
+            if resilience.area_open('discovery') or resilience.host_open(url):
+                failed.extend(urls[i + 1:limit])
+                break
+            continue
+        if status != 200 or not html:
+            failed.append(url)
+            continue
+        listing = adapter.parse_detail(html, url, now_epoch())
+        listing = listing and adapter.normalize(listing)
+        if listing is None:
+            skipped.add(url)
+        else:
+            listings[url] = listing
+        if i + 1 < min(len(urls), limit):
+            time.sleep(adapter.page_delay)
+    return listings, skipped, failed + urls[limit:]
+
+
+def run_discovery(adapter, previous_output, state_path, feed_fetcher, page_fetcher,
+                  resilience, dry_run=False, limit=MAX_DETAIL_FETCHES):
+    """
+    Discovery pass for one source. Returns the merged Listing records, or
+    None when the source has no usable feed and should be crawled instead.
+    """
+    start = time.time()
+    result = discover(adapter, feed_fetcher)
+    if result is None:
+        print(f"  No listing feed for {adapter.name}")
+        return None
+
+    previous = {}
+    for listing in (previous_output or {}).get('listings', []):
+        previous.setdefault(canonical_url(listing.get('url')), listing)
+    known = set(previous)
+    if known:
+        listed = len(known & result.entries.keys()) / len(known)
+        if listed < MIN_KNOWN_COVERAGE:
+            print(f"  Feed lists only {listed:.0%} of the {len(known):,} known listings; "
+                  f"treating it as partial")
+            return None
+
+    try:
+        state = load_state(state_path)
+    except (ValueError, KeyError, json.JSONDecodeError) as e:
+        print(f"  ⚠️  Starting a new discovery state: {e}")
+        state = {}
+    # Ruled out on an earlier run (not apartments...): only refetch if they change
+    ruled_out = {url for url in state if url not in known}
+    new, changed, gone = diff_entries(result.entries, state, known | ruled_out)
+    changed_ruled_out = [url for url in changed if url in ruled_out]
+    changed = [url for url in changed if url not in ruled_out]
+
+    print(f"\n🛰️  DISCOVERY ({adapter.name}): {len(result.entries):,} listings in "
+          f"{len(result.feeds)} feeds, {result.requests} requests, {result.bytes / 1024:,.0f} KB "
+          f"in {time.time() - start:.1f}s")
+    print(f"  New: {len(new)}  Changed: {len(changed) + len(changed_ruled_out)}  "
+          f"Gone: {len([u for u in gone if u in known])}")
+    if dry_run:
+        return []
+
+    to_fetch = new + changed + changed_ruled_out
+    fetched, skipped, pending = fetch_details(adapter, to_fetch, page_fetcher, resilience, limit)
+    print(f"  Fetched {len(fetched) + len(skipped)} detail pages "
+          f"({len(fetched)} listings, {len(skipped)} skipped, {len(pending)} left for next run)")
+
+    # Record lastmods only for URLs handled this run; the rest are retried
+    pending = set(pending)
+    handled = known | ruled_out | skipped | fetched.keys()
+    entries = {}
+    for url, lastmod in result.entries.items():
+        if url not in pending:
+            if url in handled:
+                entries[url] = lastmod
+        elif url in state:
+            entries[url] = state[url]
+    save_state(state_path, entries, result.feeds)
+
+    listings = []
+    for url, listing in previous.items():
+        if url in result.entries:
+            listings.append(fetched.pop(url, None) or Listing.from_dict(listing))
+    listings.extend(fetched.values())
+    return listings
+
+
+if __name__ == "__main__":
+    import argparse
+    from changefeed import load_output
+    from pipeline import Pipeline, print_listing_stats
+    from source_adapters import ADAPTERS
+
+    parser = argparse.ArgumentParser(
+        description='Update a source from its sitemap/feed; falls back to the search crawl')
+    parser.add_argument('source', choices=sorted(ADAPTERS), help='Source to update')
+    parser.add_argument('--output', '-o', type=str, help='Custom output path')
+    parser.add_argument('--fixtures', type=str,
+                        help='Serve feeds and pages from saved files (<dir>/<host>/<path>)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only report what the feed says is new, changed or gone')
+    parser.add_argument('--max-fetch', type=int, default=MAX_DETAIL_FETCHES,
+                        help=f'Detail pages fetched per run (default: {MAX_DETAIL_FETCHES})')
+    parser.add_argument('--no-fallback', action='store_true',
+                        help='Exit instead of running the search crawl when there is no feed')
+    parser.add_argument('--formats', type=str, default='json,compact,snapshot',
+                        help='Comma-separated output formats')
+    parser.add_argument('--outliers', choices=['off', 'flag', 'quarantine'], default='flag')
+    args = parser.parse_args()
+    if args.fixtures and not (args.dry_run or args.output):
+        parser.error('--fixtures needs --dry-run or --output, so the real data is left alone')
+
+    adapter = ADAPTERS[args.source]()
+    output_path = Path(args.output or adapter.output_path())
+    previous_output = load_output(output_path)
+    pipeline = Pipeline(adapter)
+
+    print("=" * 70)
+    print(f"{adapter.name.upper()} DISCOVERY")
+    print("=" * 70)
+    if args.fixtures:
+        feed_fetcher = FixtureFetcher(args.fixtures)
+        page_fetcher = FixtureFetcher(args.fixtures, text=True)
+    else:
+        feed_fetcher = HttpFeedFetcher()
+        page_fetcher = pipeline._make_fetcher()
+    try:
+        listings = run_discovery(adapter, previous_output,
+                                 get_discovery_path(output_path), feed_fetcher, page_fetcher,
+                                 pipeline.resilience, dry_run=args.dry_run, limit=args.max_fetch)
+    finally:
+        feed_fetcher.close()
+        page_fetcher.close()
+
+    if args.dry_run:
+        exit(0 if listings is not None else 1)
+    if listings is None:
+        if args.no_fallback or args.fixtures:
+            exit(1)
+        print(f"\n→ Falling back to the search crawl\n")
+        listings = pipeline.run()
+    else:
+        pipeline.listings = listings
+
+    if not listings:
+        print("\n❌ No listings!")
+        exit(1)
+    pipeline.filter_outliers(output_path, args.outliers, previous_output)
+    formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+    for path in pipeline.save(output_path, formats, previous_output):
+        print(f"✓ Saved {path}")
+    print_listing_stats(pipeline.listings)
+    pipeline.resilience.print_report()
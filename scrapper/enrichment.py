@@ -0,0 +1,250 @@
+"""
+Listing Enrichment - Detail-page attributes for scraped listings
+Runs after a crawl: fetches the detail page of every listing that has not been
+enriched yet with a bounded asyncio worker pool, rate-limited per host, and
+stores bathrooms, size, furnishing and coordinates keyed by URL. Already
+enriched URLs are never fetched again, so the cost follows new listings only.
+"""
+
+import asyncio
+import json
+import re
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+from listing import canonical_url
+
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Failed URLs are retried on later runs until they hit this many attempts
+MAX_ATTEMPTS = 3
+
+
+def get_enrichment_path(output_path):
+    """Get the enrichment store path for a scraper JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.enrichment.json")
+
+
+def _first_int(patterns, text):
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            try:
+                return int(match.group(1).replace(',', ''))
+            except ValueError:
+                continue
+    return None
+
+
+def _first_int_or(value, patterns, text):
+    """value unless it is None (a parsed 0 is kept), else the first match in text."""
+    return _first_int(patterns, text) if value is None else value
+
+
+def extract_details(html):
+    """Extract extra attributes from a listing detail page."""
+    text = re.sub(r'<[^>]+>', ' ', html)
+    text = re.sub(r'\s+', ' ', text)
+
+    details = {
+        'bedrooms': _first_int_or(_first_int([
+            r'<li class="bed"><span>(\d+)</span>',
+        ], html), [r'(\d+)\s*bed(?:room)?s?\b'], text),
+        'bathrooms': _first_int_or(_first_int([
+            r'<li class="shower"><span>(\d+)</span>',
+        ], html), [r'(\d+)\s*(?:bath(?:room)?s?|washrooms?)\b'], text),
+        'size_sqm': _first_int([
+            r'([\d,]+)\s*(?:sqm|sq\.?\s*m\b|m²|square\s*met)',
+        ], text),
+        'furnishing': None,
+        'latitude': None,
+        'longitude': None,
+    }
+
+    lower = text.lower()
+    if 'semi-furnished' in lower or 'semi furnished' in lower:
+        details['furnishing'] = 'semi'
+    elif 'unfurnished' in lower:
+        details['furnishing'] = 'unfurnished'
+    elif 'furnished' in lower:
+        details['furnishing'] = 'furnished'
+
+    # Coordinates: JSON-LD geo, data attributes or an embedded map link
+    geo_patterns = [
+        r'"latitude"\s*:\s*"?(-?\d+\.\d+)"?\s*,\s*"longitude"\s*:\s*"?(-?\d+\.\d+)',
+        r'data-lat(?:itude)?="(-?\d+\.\d+)"[^>]*data-(?:lng|lon|longitude)="(-?\d+\.\d+)"',
+        r'maps[^"\']*[?&](?:q|ll|center)=(-?\d+\.\d+),(-?\d+\.\d+)',
+    ]
+    for pattern in geo_patterns:
+        match = re.search(pattern, html)
+        if match:
+            details['latitude'] = float(match.group(1))
+            details['longitude'] = float(match.group(2))
+            break
+
+    return {key: value for key, value in details.items() if value is not None}
+
+
+class EnrichmentStore:
+    def __init__(self, path):
+        """Enrichment results keyed by canonical listing URL, persisted as JSON."""
+        self.path = Path(path)
+        self.records = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.records = json.load(f).get('listings', {})
+
+    def needs_fetch(self, url):
+        """True for URLs never enriched, or failed fewer than MAX_ATTEMPTS times."""
+        record = self.records.get(url)
+        if record is None:
+            return True
+        return 'error' in record and record.get('attempts', 0) < MAX_ATTEMPTS
+
+    def set_result(self, url, details):
+        self.records[url] = {
+            **details,
+            'enriched_at': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def set_error(self, url, error, permanent=False):
+        attempts = self.records.get(url, {}).get('attempts', 0) + 1
+        if permanent:
+            attempts = MAX_ATTEMPTS
+        self.records[url] = {'error': str(error)[:200], 'attempts': attempts}
+
+    def save(self):
+        output = {
+            'updated_at': datetime.now().isoformat(),
+            'total_enriched': sum(1 for r in self.records.values() if 'error' not in r),
+            'listings': dict(sorted(self.records.items())),
+        }
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
+        tmp_path.replace(self.path)
+
+
+class HostRateLimiter:
+    def __init__(self, min_interval):
+        """Allow at most one request start per host every min_interval seconds."""
+        self.min_interval = min_interval
+        self._locks = {}
+        self._next_slot = {}
+
+    async def wait(self, host):
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def fetch_html(url, timeout=30):
+    """Blocking fetch of one page (run in a worker thread)."""
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        charset = response.headers.get_content_charset() or 'utf-8'
+        return response.read().decode(charset, errors='replace')
+
+
+async def enrich_urls(urls, store, workers=8, min_interval=1.0, save_every=50):
+    """Fetch and extract details for urls with a bounded worker pool."""
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+
+    limiter = HostRateLimiter(min_interval)
+    stats = {'done': 0, 'failed': 0}
+
+    async def worker():
+        while True:
+            try:
+                url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await limiter.wait(urlparse(url).netloc)
+                html = await asyncio.to_thread(fetch_html, url)
+                store.set_result(url, extract_details(html))
+                stats['done'] += 1
+            except urllib.error.HTTPError as e:
+                # A removed listing will not come back, so don't retry 404/410
+                store.set_error(url, e, permanent=e.code in (404, 410))
+                stats['failed'] += 1
+            except Exception as e:
+                # Network errors, but also a page extract_details chokes on:
+                # one bad URL must not stop the pool before store.save()
+                store.set_error(url, e)
+                stats['failed'] += 1
+            finally:
+                queue.task_done()
+
+            processed = stats['done'] + stats['failed']
+            if processed % save_every == 0:
+                store.save()
+                print(f"  {processed}/{len(urls)} processed ({stats['failed']} failed)")
+
+    await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+    store.save()
+    return stats
+
+
+def enrich_listings(listings, store_path, workers=8, min_interval=1.0, max_new=None):
+    """Enrich listings that are not in the store yet. Returns run stats."""
+    store = EnrichmentStore(store_path)
+
+    seen = set()
+    pending = []
+    for listing in listings:
+        url = canonical_url(listing.get('url'))
+        if url and url not in seen and store.needs_fetch(url):
+            seen.add(url)
+            pending.append(url)
+    if max_new is not None:
+        pending = pending[:max_new]
+
+    print(f"{len(store.records)} URLs already in store, {len(pending)} to fetch")
+    if not pending:
+        return {'done': 0, 'failed': 0}
+
+    return asyncio.run(enrich_urls(pending, store, workers, min_interval))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Enrich scraped listings from their detail pages')
+    parser.add_argument('input', type=str, help='Scraper JSON output')
+    parser.add_argument('--store', type=str,
+                        help='Enrichment store path (default: <input>.enrichment.json)')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent fetches (default: 8)')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Minimum seconds between requests to one host (default: 1.0)')
+    parser.add_argument('--max-new', type=int, help='Cap on URLs fetched this run')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("LISTING ENRICHMENT")
+    print("=" * 70)
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        scraped = json.load(f)
+
+    start = time.time()
+    result = enrich_listings(
+        scraped.get('listings', []),
+        args.store or get_enrichment_path(args.input),
+        workers=args.workers,
+        min_interval=args.interval,
+        max_new=args.max_new,
+    )
+    print(f"\n✓ Enriched {result['done']} listings, {result['failed']} failed "
+          f"in {time.time() - start:.0f}s")
@@ -0,0 +1,361 @@
+"""
+Site Health Probe - Pre-crawl check of every source
+Fetches the first page of a sample of areas for each source, in parallel,
+and checks each one for listing containers, parseable listings, bot-challenge
+pages and page weight. Plain HTTP is probed first. Sources that fail over
+HTTP are probed in Chromium, where a single page.evaluate call returns
+selector counts, page weight and HTML together.
+
+The result is one verdict per source: crawl it over 'http', over 'browser',
+or 'fail' (don't crawl). A layout change or a block then costs seconds before
+the run instead of the whole crawl.
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from pipeline import USER_AGENT, HttpFetcher, PageTask
+from resilience import find_challenge_markers
+
+
+# Shorter than a crawl timeout: a probe that slow is already a failure
+PROBE_TIMEOUT = 15
+
+# Areas probed per source (the first area, usually the catch-all search,
+# is always included)
+SAMPLE_AREAS = 3
+
+# A results page needs this many listing containers to count as healthy
+MIN_LISTINGS = 3
+
+# Share of a source's probes that must be healthy for a fetch mode to be used
+HEALTHY_SHARE = 0.5
+
+# One round-trip per probed page: selector counts, page weight, links and HTML
+PROBE_JS = """
+(selectors) => {
+    const counts = {};
+    for (const selector of selectors) {
+        try {
+            counts[selector] = document.querySelectorAll(selector).length;
+        } catch (e) {
+            counts[selector] = -1;
+        }
+    }
+    const navigation = performance.getEntriesByType('navigation')[0];
+    const resources = performance.getEntriesByType('resource');
+    let transfer = navigation ? navigation.transferSize : 0;
+    for (const r of resources) transfer += r.transferSize || 0;
+    const links = Array.from(document.querySelectorAll('a'), a =>
+        [a.getAttribute('href') || '', (a.textContent || '').trim().slice(0, 80)]);
+    return {
+        counts: counts,
+        title: document.title,
+        html: document.documentElement.outerHTML,
+        transfer_bytes: transfer,
+        resources: resources.length,
+        links: links.slice(0, 100),
+    };
+}
+"""
+
+
+@dataclass(slots=True)
+class ProbeResult:
+    source: str
+    area: str | None
+    url: str
+    mode: str
+    status: int | None = None
+    seconds: float = 0.0
+    html_bytes: int = 0
+    transfer_bytes: int | None = None
+    title: str | None = None
+    selector_counts: dict = field(default_factory=dict)
+    listing_containers: int = 0
+    parsed_listings: int = 0
+    challenge: list = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def healthy(self):
+        return (self.status == 200 and not self.error and not self.challenge
+                and self.listing_containers >= MIN_LISTINGS and self.parsed_listings > 0)
+
+
+def count_selectors_in_html(html, selectors):
+    """Selector counts for a fetched page (HTTP probes, no browser)."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    counts = {}
+    for selector in selectors:
+        try:
+            counts[selector] = len(soup.select(selector))
+        except ValueError:  # selector soupsieve can't handle
+            counts[selector] = -1
+    title = soup.title.get_text(strip=True) if soup.title else None
+    return counts, title
+
+
+def _finish(result, adapter, html):
+    """Fill in the checks that don't depend on how the page was fetched."""
+    result.html_bytes = len(html.encode('utf-8'))
+    result.challenge = find_challenge_markers(html)
+    result.listing_containers = next(
+        (result.selector_counts.get(s, 0) for s in adapter.listing_selectors
+         if result.selector_counts.get(s, 0) > 0), 0)
+    if result.status == 200 and html:
+        try:
+            task = PageTask(adapter.name, result.area, 1, result.url, html=html, status=200)
+            result.parsed_listings = len(adapter.parse(task, 0))
+        except Exception as e:
+            result.error = f"parse: {str(e)[:200]}"
+    return result
+
+
+def _selectors(adapter):
+    return list(dict.fromkeys([*adapter.listing_selectors, *adapter.probe_selectors]))
+
+
+def probe_http(adapter, area, url, fetcher):
+    result = ProbeResult(adapter.name, area, url, 'http')
+    start = time.perf_counter()
+    try:
+        result.status, html = fetcher.fetch(url, PROBE_TIMEOUT)
+    except Exception as e:
+        result.error = str(e)[:200]
+        html = ''
+    result.seconds = time.perf_counter() - start
+    result.selector_counts, result.title = count_selectors_in_html(html, _selectors(adapter))
+    return _finish(result, adapter, html)
+
+
+class BrowserProber:
+    def __init__(self):
+        """One Chromium page, owned by the thread that creates it."""
+        from playwright.sync_api import sync_playwright
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=True)
+        context = self._browser.new_context(user_agent=USER_AGENT)
+        self.page = context.new_page()
+
+    def probe(self, adapter, area, url):
+        result = ProbeResult(adapter.name, area, url, 'browser')
+        start = time.perf_counter()
+        html = ''
+        try:
+            response = self.page.goto(url, wait_until='domcontentloaded',
+                                      timeout=PROBE_TIMEOUT * 1000)
+            result.status = response.status if response else None
+            if adapter.wait_seconds:
+                time.sleep(min(adapter.wait_seconds, 3))
+            probed = evaluate_probe(self.page, _selectors(adapter))
+            html = probed['html']
+            result.selector_counts = probed['counts']
+            result.title = probed['title']
+            result.transfer_bytes = probed['transfer_bytes']
+        except Exception as e:
+            result.error = str(e)[:200]
+        result.seconds = time.perf_counter() - start
+        return _finish(result, adapter, html)
+
+    def close(self):
+        self._browser.close()
+        self._playwright.stop()
+
+
+def evaluate_probe(page, selectors):
+    """Run PROBE_JS on a loaded page (counts, title, html, weight, first 100 links)."""
+    return page.evaluate(PROBE_JS, list(selectors))
+
+
+def sample_areas(adapter, count=SAMPLE_AREAS, rng=random):
+    areas = adapter.areas()
+    if len(areas) <= count:
+        return areas
+    return [areas[0]] + rng.sample(areas[1:], count - 1)
+
+
+def run_http_probes(jobs, workers):
+    """jobs: [(adapter, area, url)]; one HTTP session per worker thread."""
+    local = threading.local()
+    fetchers = []
+
+    def run(job):
+        if not hasattr(local, 'fetcher'):
+            local.fetcher = HttpFetcher()
+            fetchers.append(local.fetcher)
+        adapter, area, url = job
+        return probe_http(adapter, area, url, local.fetcher)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(run, jobs))
+    finally:
+        for fetcher in fetchers:
+            fetcher.close()
+
+
+def run_browser_probes(jobs, workers):
+    """Split jobs over a few Chromium instances, each driven by its own thread."""
+    def run_chunk(chunk):
+        try:
+            prober = BrowserProber()
+        except Exception as e:
+            return [ProbeResult(adapter.name, area, url, 'browser', error=f"launch: {str(e)[:200]}")
+                    for adapter, area, url in chunk]
+        try:
+            return [prober.probe(adapter, area, url) for adapter, area, url in chunk]
+        finally:
+            prober.close()
+
+    chunks = [jobs[i::workers] for i in range(workers) if jobs[i::workers]]
+    with ThreadPoolExecutor(max_workers=max(1, len(chunks))) as pool:
+        return [result for results in pool.map(run_chunk, chunks) for result in results]
+
+
+def _healthy_share(results):
+    return sum(r.healthy for r in results) / len(results) if results else 0.0
+
+
+def decide(http_results, browser_results):
+    """Verdict for one source: 'http', 'browser' or 'fail', with a reason."""
+    http_share = _healthy_share(http_results)
+    if http_share >= HEALTHY_SHARE:
+        return 'http', f"{http_share:.0%} of HTTP probes healthy"
+    if browser_results:
+        browser_share = _healthy_share(browser_results)
+        if browser_share >= HEALTHY_SHARE:
+            return 'browser', f"HTTP {http_share:.0%} healthy, browser {browser_share:.0%}"
+
+    probes = http_results + browser_results
+    reasons = []
+    if any(r.challenge for r in probes):
+        reasons.append('bot challenge')
+    if any(r.status not in (None, 200) for r in probes):
+        reasons.append('HTTP ' + ','.join(sorted({str(r.status) for r in probes
+                                                  if r.status not in (None, 200)})))
+    errors = sorted({r.error.split(':')[0] for r in probes if r.error})
+    if errors:
+        reasons.append('errors: ' + ', '.join(errors))
+    if any(r.status == 200 and r.listing_containers < MIN_LISTINGS for r in probes):
+        reasons.append('listing containers missing (layout change?)')
+    elif any(r.status == 200 and not r.parsed_listings for r in probes):
+        reasons.append('nothing parsed')
+    return 'fail', '; '.join(reasons) or 'no healthy probes'
+
+
+def run_health_check(adapters, areas_per_source=SAMPLE_AREAS, workers=8,
+                     browser_workers=2, use_browser=True, seed=None):
+    """Probe every adapter and return the report dict."""
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    jobs = [(adapter, area, url) for adapter in adapters
+            for area, url in sample_areas(adapter, areas_per_source, rng)]
+
+    http_results = run_http_probes(jobs, workers)
+    by_source = {adapter.name: {'http': [], 'browser': []} for adapter in adapters}
+    for result in http_results:
+        by_source[result.source]['http'].append(result)
+
+    # Only sources that HTTP can't serve need a browser
+    failing = {adapter.name for adapter in adapters
+               if _healthy_share(by_source[adapter.name]['http']) < HEALTHY_SHARE}
+    browser_jobs = [job for job in jobs if job[0].name in failing]
+    if use_browser and browser_jobs:
+        for result in run_browser_probes(browser_jobs, browser_workers):
+            by_source[result.source]['browser'].append(result)
+
+    sources = {}
+    for adapter in adapters:
+        results = by_source[adapter.name]
+        verdict, reason = decide(results['http'], results['browser'])
+        sources[adapter.name] = {
+            'verdict': verdict,
+            'configured_mode': adapter.fetch_mode,
+            'reason': reason,
+            'probes': [dict(asdict(r), healthy=r.healthy)
+                       for r in results['http'] + results['browser']],
+        }
+
+    return {
+        'checked_at': datetime.now().isoformat(timespec='seconds'),
+        'seconds': round(time.perf_counter() - started, 2),
+        'sources': sources,
+    }
+
+
+def apply_verdict(adapter, report):
+    """Route an adapter to the mode its probe chose; False if it must not be crawled."""
+    verdict = report['sources'][adapter.name]['verdict']
+    if verdict == 'fail':
+        return False
+    adapter.fetch_mode = verdict
+    return True
+
+
+def print_health_report(report):
+    print("=" * 70)
+    print(f"SITE HEALTH ({report['seconds']:.1f}s)")
+    print("=" * 70)
+    icons = {'http': '✓', 'browser': '✓', 'fail': '❌'}
+    for name, source in report['sources'].items():
+        print(f"\n{icons[source['verdict']]} {name}: {source['verdict']} "
+              f"(configured {source['configured_mode']}) - {source['reason']}")
+        for probe in source['probes']:
+            weight = f"{probe['html_bytes'] / 1024:,.0f}KB"
+            if probe['transfer_bytes']:
+                weight += f" / {probe['transfer_bytes'] / 1024:,.0f}KB transferred"
+            flags = ''
+            if probe['challenge']:
+                flags += f"  ⚠️  challenge: {', '.join(probe['challenge'])}"
+            if probe['error']:
+                flags += f"  ⚠️  {probe['error'][:80]}"
+            print(f"   {'✓' if probe['healthy'] else '✗'} [{probe['mode']:7s}] "
+                  f"{(probe['area'] or name)[:22]:22s} status {probe['status']}  "
+                  f"{probe['listing_containers']:3d} containers  "
+                  f"{probe['parsed_listings']:3d} parsed  {probe['seconds']:5.1f}s  {weight}{flags}")
+
+
+def write_health_report(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+    from source_adapters import ADAPTERS
+
+    parser = argparse.ArgumentParser(description='Probe every source before a crawl')
+    parser.add_argument('sources', nargs='*',
+                        help=f"Sources to probe (default: all of {', '.join(sorted(ADAPTERS))})")
+    parser.add_argument('--areas', type=int, default=SAMPLE_AREAS,
+                        help=f'Areas sampled per source (default: {SAMPLE_AREAS})')
+    parser.add_argument('--workers', type=int, default=8, help='Parallel HTTP probes')
+    parser.add_argument('--browser-workers', type=int, default=2,
+                        help='Chromium instances for sources HTTP cannot serve')
+    parser.add_argument('--no-browser', action='store_true', help='HTTP probes only')
+    parser.add_argument('--report', type=str, default='site_health.json',
+                        help='Where to write the JSON report')
+    args = parser.parse_args()
+    unknown = set(args.sources) - set(ADAPTERS)
+    if unknown:
+        parser.error(f"unknown source: {', '.join(sorted(unknown))}")
+
+    adapters = [ADAPTERS[name]() for name in (args.sources or sorted(ADAPTERS))]
+    report = run_health_check(adapters, args.areas, args.workers,
+                              args.browser_workers, use_browser=not args.no_browser)
+    print_health_report(report)
+    print(f"\n✓ Saved {write_health_report(report, args.report)}")
+
+    # Non-zero exit gates the crawl when any probed source is down
+    failed = [name for name, s in report['sources'].items() if s['verdict'] == 'fail']
+    if failed:
+        print(f"\n❌ Unhealthy: {', '.join(failed)}")
+        exit(1)
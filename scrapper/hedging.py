@@ -0,0 +1,210 @@
+"""
+Hedged Fetching - Cut tail latency on slow page loads
+A few navigations per run hang until the page timeout and dominate crawl
+time. A HedgedFetcher drives a few independent fetchers (browser instances or
+HTTP sessions), each on its own thread. When a page hasn't come back by the
+run's observed p95 latency, the same URL is requested on an idle one and
+whichever answers first wins. The loser's result is thrown away; its lane is
+reused once it finishes, so a hung request never blocks the next page.
+
+Hedges are capped by a budget (5% of requests by default), and the run report
+compares page latency as observed with what the first request alone would have
+taken.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+# At most this share of requests may be hedged
+HEDGE_BUDGET = 0.05
+
+# Latency samples needed before hedging starts, and how many recent ones the
+# p95 trigger is computed from
+MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# Never hedge sooner than this (seconds), whatever the p95 says
+MIN_HEDGE_DELAY = 0.5
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class HedgeStats:
+    def __init__(self, budget=HEDGE_BUDGET, window=LATENCY_WINDOW):
+        """Latency samples and hedge counters, shared by every fetch worker."""
+        self.budget = budget
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=window)
+        self.observed = []   # what each fetch() took, hedging included
+        self.unhedged = []   # what the first request alone took (or would have)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging, or None while there is too little data."""
+        with self._lock:
+            if len(self.recent) < MIN_SAMPLES:
+                return None
+            return max(MIN_HEDGE_DELAY, percentile(self.recent, 0.95))
+
+    def start_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def take_hedge(self):
+        """Spend one hedge from the budget if there is any left."""
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def record_attempt(self, seconds, first):
+        with self._lock:
+            self.recent.append(seconds)
+            if first:
+                self.unhedged.append(seconds)
+
+    def record_fetch(self, seconds, hedge_won):
+        with self._lock:
+            self.observed.append(seconds)
+            self.hedge_wins += hedge_won
+
+    def summary(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hedges': self.hedges,
+                'hedge_rate': round(self.hedges / self.requests, 4) if self.requests else 0.0,
+                'hedge_wins': self.hedge_wins,
+                'p50': round(percentile(self.observed, 0.50), 3),
+                'p95': round(percentile(self.observed, 0.95), 3),
+                'p99': round(percentile(self.observed, 0.99), 3),
+                'p99_unhedged': round(percentile(self.unhedged, 0.99), 3),
+                'p95_unhedged': round(percentile(self.unhedged, 0.95), 3),
+            }
+
+    def print_report(self):
+        s = self.summary()
+        print(f"\n⏱️  HEDGING ({s['hedges']} hedges for {s['requests']} pages, "
+              f"{s['hedge_rate']:.1%} of budget {self.budget:.0%}; {s['hedge_wins']} won)")
+        print(f"  {'':16s} {'p95':>8s} {'p99':>8s}")
+        print(f"  {'with hedging':16s} {s['p95']:>7.2f}s {s['p99']:>7.2f}s")
+        print(f"  {'first request':16s} {s['p95_unhedged']:>7.2f}s {s['p99_unhedged']:>7.2f}s")
+
+
+class _Lane:
+    def __init__(self, make_fetcher):
+        """One fetcher, created and used only on this lane's own thread."""
+        self._make_fetcher = make_fetcher
+        self._fetcher = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hedge-lane')
+        self.future = None
+
+    @property
+    def idle(self):
+        return self.future is None or self.future.done()
+
+    def _run(self, url, timeout, wait_seconds):
+        if self._fetcher is None:
+            self._fetcher = self._make_fetcher()
+        start = time.perf_counter()
+        try:
+            return self._fetcher.fetch(url, timeout, wait_seconds), time.perf_counter() - start
+        except Exception as e:
+            e.seconds = time.perf_counter() - start
+            raise
+
+    def submit(self, url, timeout, wait_seconds):
+        self.future = self._executor.submit(self._run, url, timeout, wait_seconds)
+        return self.future
+
+    def _close(self):
+        if self._fetcher is not None:
+            self._fetcher.close()
+
+    def close(self):
+        # Runs after any abandoned request on this lane has finished
+        self._executor.submit(self._close)
+        self._executor.shutdown(wait=True)
+
+
+def _succeeded(future):
+    if future.exception() is not None:
+        return False
+    (status, html), _ = future.result()
+    return status == 200 and bool(html)
+
+
+class HedgedFetcher:
+    def __init__(self, make_fetcher, stats, lanes=3):
+        """
+        make_fetcher() builds one underlying fetcher (HttpFetcher, BrowserFetcher);
+        it is called on each lane's thread, since Playwright objects are
+        bound to the thread that created them.
+        """
+        self.stats = stats
+        self._lanes = [_Lane(make_fetcher) for _ in range(max(2, lanes))]
+
+    def _idle_lane(self, exclude=None):
+        for lane in self._lanes:
+            if lane is not exclude and lane.idle:
+                return lane
+        return None
+
+    def _wait_for_lane(self):
+        lane = self._idle_lane()
+        while lane is None:
+            wait([l.future for l in self._lanes], return_when=FIRST_COMPLETED)
+            lane = self._idle_lane()
+        return lane
+
+    def _track(self, future, first):
+        def done(f):
+            error = f.exception()
+            seconds = getattr(error, 'seconds', 0.0) if error else f.result()[1]
+            self.stats.record_attempt(seconds, first)
+        future.add_done_callback(done)
+
+    def fetch(self, url, timeout, wait_seconds=0):
+        """Return (status, html), hedging the request if it runs past the p95."""
+        self.stats.start_request()
+        start = time.perf_counter()
+        primary = self._wait_for_lane()
+        first = primary.submit(url, timeout, wait_seconds)
+        self._track(first, first=True)
+
+        winner = first
+        delay = self.stats.hedge_delay()
+        if delay is not None and not wait([first], timeout=delay).done:
+            lane = self._idle_lane(exclude=primary)
+            if lane is not None and self.stats.take_hedge():
+                hedge = lane.submit(url, timeout, wait_seconds)
+                self._track(hedge, first=False)
+                pending = {first, hedge}
+                winner = None
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    # Prefer the first good page; fall back to the primary's outcome
+                    good = [f for f in done if _succeeded(f)]
+                    if good:
+                        winner = first if first in good else good[0]
+                        break
+                winner = winner or first
+
+        (status, html), _ = winner.result()
+        self.stats.record_fetch(time.perf_counter() - start, hedge_won=winner is not first)
+        return status, html
+
+    def close(self):
+        for lane in self._lanes:
+            lane.close()
@@ -0,0 +1,163 @@
+"""
+Listing Record - Shared compact listing type for the scrapers
+Scrapers keep thousands of listings in memory until the final save. A slotted
+dataclass with interned low-cardinality strings and an integer timestamp is a
+fraction of the size of the equivalent dict of a dozen string keys.
+"""
+
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Query parameters that change between crawls without changing the listing
+# (Meqasa appends a random ?y=... to every card link)
+VOLATILE_URL_PARAMS = {'y', 'utm_source', 'utm_medium', 'utm_campaign'}
+
+
+def format_price_text(price, price_period=None):
+    """Display price string, e.g. GH₵5,000/month."""
+    if price_period == 'month':
+        return f"GH₵{price:,}/month"
+    return f"GH₵{price:,}"
+
+
+def now_epoch():
+    """Current time as integer epoch seconds (take once per page, not per listing)."""
+    return int(time.time())
+
+
+def canonical_url(url):
+    """Stable identity for a listing URL (drops volatile query params and fragments)."""
+    if not url:
+        return url
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k not in VOLATILE_URL_PARAMS]
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip('/') or '/',
+                       urlencode(query), ''))
+
+
+def _intern(value):
+    return sys.intern(value) if value is not None else None
+
+
+@dataclass(slots=True)
+class Listing:
+    title: str
+    price: int
+    bedrooms: int | None
+    location: str
+    url: str
+    source: str
+    scraped_at: int  # epoch seconds
+    area: str | None = None
+    page: int | None = None
+    price_period: str | None = None
+    property_type: str | None = None
+
+    def __post_init__(self):
+        # Few distinct values across thousands of listings: share one copy
+        self.location = _intern(self.location)
+        self.area = _intern(self.area)
+        self.source = _intern(self.source)
+        self.price_period = _intern(self.price_period)
+        self.property_type = _intern(self.property_type)
+
+    def to_dict(self):
+        """JSON output shape (same keys and order the scrapers always wrote)."""
+        data = {
+            'title': self.title,
+            'price': self.price,
+            'price_text': format_price_text(self.price, self.price_period),
+        }
+        if self.price_period is not None:
+            data['price_period'] = self.price_period
+        if self.property_type is not None:
+            data['property_type'] = self.property_type
+        data['bedrooms'] = self.bedrooms
+        data['location'] = self.location
+        if self.area is not None:
+            data['area'] = self.area
+        data['url'] = self.url
+        data['source'] = self.source
+        data['scraped_at'] = datetime.fromtimestamp(self.scraped_at).isoformat()
+        if self.page is not None:
+            data['page'] = self.page
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Listing from a JSON listing dict."""
+        scraped_at = data.get('scraped_at')
+        if isinstance(scraped_at, str):
+            scraped_at = int(datetime.fromisoformat(scraped_at).timestamp())
+        return cls(
+            title=data.get('title') or '',
+            price=data.get('price'),
+            bedrooms=data.get('bedrooms'),
+            location=data.get('location') or '',
+            url=data.get('url') or '',
+            source=data.get('source') or '',
+            scraped_at=scraped_at or 0,
+            area=data.get('area'),
+            page=data.get('page'),
+            price_period=data.get('price_period'),
+            property_type=data.get('property_type'),
+        )
+
+
+def listings_to_dicts(listings):
+    """Convert Listing records to JSON dicts for saving."""
+    return [listing.to_dict() for listing in listings]
+
+
+def measure_memory(json_path):
+    """Print bytes per listing held as dicts vs Listing records."""
+    import json
+    import tracemalloc
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        raw = f.read()
+
+    def build_dicts():
+        # What the scrapers used to hold: fresh dicts with per-listing timestamps
+        rows = json.loads(raw)['listings']
+        for row in rows:
+            row['scraped_at'] = datetime.now().isoformat()
+        return rows
+
+    def build_records():
+        rows = json.loads(raw)['listings']
+        return [Listing.from_dict(row) for row in rows]
+
+    results = {}
+    for name, builder in (('dict', build_dicts), ('Listing', build_records)):
+        tracemalloc.start()
+        items = builder()
+        # The JSON parse buffers are gone by now; only the kept objects count
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results[name] = (len(items), current)
+        del items
+
+    print("=" * 70)
+    print("LISTING MEMORY BENCHMARK")
+    print("=" * 70)
+    for name, (count, current) in results.items():
+        print(f"  {name:10s} {count:6,} listings  {current / 1024:10,.0f} KB  "
+              f"{current / count:6,.0f} bytes/listing")
+    dict_bytes = results['dict'][1]
+    record_bytes = results['Listing'][1]
+    print(f"\n  Saving: {(1 - record_bytes / dict_bytes) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Listing record memory benchmark')
+    parser.add_argument('input', type=str, help='Scraper JSON output')
+    args = parser.parse_args()
+
+    measure_memory(args.input)
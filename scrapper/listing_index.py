@@ -0,0 +1,298 @@
+"""
+Listing Index - In-memory query index over scraped listings
+Answers compound queries (locations x bedroom range x price range, top-k
+cheapest) without scanning every listing, and saves to a file that can be
+memory-mapped for instant load.
+
+Layout: listings are sorted by (location, bedrooms, price). A hash map on the
+canonical location points at its bedroom buckets, and each bucket is a
+contiguous slice of the sorted price/id arrays, so a price range is two
+bisects.
+"""
+
+import heapq
+import json
+import mmap
+import random
+import struct
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from pathlib import Path
+
+from locations import normalize_location
+
+
+INDEX_MAGIC = b'LIDX'
+INDEX_VERSION = 2
+
+# magic, version, row count, cell count, location table bytes
+HEADER = struct.Struct('<4sIIII')
+# location id, bedrooms, start, end
+CELL = struct.Struct('<IiII')
+
+# Bucket for listings without a bedroom count (0 is studios). It only matches
+# queries without a bedroom bound.
+UNKNOWN_BEDROOMS = -1
+
+
+class ListingIndex:
+    def __init__(self, locations, cells, prices, ids, source=None):
+        """Use ListingIndex.build() or ListingIndex.load() instead."""
+        self.locations = locations
+        self.location_ids = {name: idx for idx, name in enumerate(locations)}
+        # {location_id: {bedrooms: (start, end)}}
+        self.cells = cells
+        self.prices = prices
+        self.ids = ids
+        self._source = source  # keeps the mmap alive for loaded indexes
+
+    @classmethod
+    def build(cls, listings):
+        """Build an index; ids are positions in the given listings list."""
+        location_ids = {}
+        rows = []
+        for row_id, listing in enumerate(listings):
+            price = listing.get('price')
+            if not price:
+                continue
+            location = normalize_location(listing.get('location') or '')
+            loc_id = location_ids.setdefault(location, len(location_ids))
+            bedrooms = listing.get('bedrooms')
+            if bedrooms is None:
+                bedrooms = UNKNOWN_BEDROOMS
+            rows.append((loc_id, bedrooms, price, row_id))
+
+        rows.sort()
+
+        prices = array('i', (row[2] for row in rows))
+        ids = array('I', (row[3] for row in rows))
+        cells = {}
+        start = 0
+        for idx in range(1, len(rows) + 1):
+            if idx == len(rows) or rows[idx][:2] != rows[start][:2]:
+                loc_id, bedrooms = rows[start][:2]
+                cells.setdefault(loc_id, {})[bedrooms] = (start, idx)
+                start = idx
+
+        # memoryview slices are zero-copy, so queries never copy whole buckets
+        return cls(list(location_ids), cells, memoryview(prices), memoryview(ids))
+
+    def __len__(self):
+        return len(self.prices)
+
+    def _matching_slices(self, locations=None, min_bedrooms=None,
+                         max_bedrooms=None, min_price=None, max_price=None):
+        """Yield (start, end) slices of the sorted arrays that match."""
+        if locations is None:
+            loc_ids = self.cells.keys()
+        else:
+            loc_ids = []
+            for location in locations:
+                loc_id = self.location_ids.get(normalize_location(location))
+                if loc_id is not None:
+                    loc_ids.append(loc_id)
+
+        bedroom_bound = min_bedrooms is not None or max_bedrooms is not None
+        prices = self.prices
+        for loc_id in loc_ids:
+            for bedrooms, (start, end) in self.cells.get(loc_id, {}).items():
+                if bedrooms == UNKNOWN_BEDROOMS and bedroom_bound:
+                    continue
+                if min_bedrooms is not None and bedrooms < min_bedrooms:
+                    continue
+                if max_bedrooms is not None and bedrooms > max_bedrooms:
+                    continue
+                if min_price is not None:
+                    start = bisect_left(prices, min_price, start, end)
+                if max_price is not None:
+                    end = bisect_right(prices, max_price, start, end)
+                if start < end:
+                    yield start, end
+
+    def count(self, **criteria):
+        """Count matching listings without materializing them."""
+        return sum(end - start for start, end in self._matching_slices(**criteria))
+
+    def query(self, limit=None, **criteria):
+        """
+        Return (price, listing id) pairs for matching listings, cheapest first.
+
+        Criteria: locations (iterable), min_bedrooms, max_bedrooms, min_price,
+        max_price. With a limit this is a k-way merge of the matching buckets,
+        so top-k cost depends on k, not on how many listings match.
+        """
+        prices = self.prices
+        ids = self.ids
+        buckets = [
+            zip(prices[start:end], ids[start:end])
+            for start, end in self._matching_slices(**criteria)
+        ]
+        merged = heapq.merge(*buckets)
+        if limit is not None:
+            return list(islice(merged, limit))
+        return list(merged)
+
+    def cheapest(self, k, **criteria):
+        """Top-k cheapest matching listings as (price, listing id) pairs."""
+        return self.query(limit=k, **criteria)
+
+    def save(self, path):
+        """Write the index in a flat binary layout suitable for mmap."""
+        location_bytes = json.dumps(self.locations, ensure_ascii=False).encode('utf-8')
+        cell_rows = [
+            (loc_id, bedrooms, start, end)
+            for loc_id, buckets in self.cells.items()
+            for bedrooms, (start, end) in buckets.items()
+        ]
+
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self.prices),
+                                len(cell_rows), len(location_bytes)))
+            f.write(location_bytes)
+            # Pad so the numeric arrays start 4-byte aligned
+            f.write(b'\0' * (-len(location_bytes) % 4))
+            for cell in cell_rows:
+                f.write(CELL.pack(*cell))
+            f.write(self.prices)
+            f.write(self.ids)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a saved index; price/id arrays are zero-copy views."""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(mapped)
+        magic, version, row_count, cell_count, location_len = HEADER.unpack_from(view)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{path} is not a listing index (v{INDEX_VERSION})")
+
+        offset = HEADER.size
+        locations = json.loads(bytes(view[offset:offset + location_len]))
+        offset += location_len + (-location_len % 4)
+
+        cells = {}
+        for loc_id, bedrooms, start, end in CELL.iter_unpack(
+                view[offset:offset + cell_count * CELL.size]):
+            cells.setdefault(loc_id, {})[bedrooms] = (start, end)
+        offset += cell_count * CELL.size
+
+        prices = view[offset:offset + row_count * 4].cast('i')
+        offset += row_count * 4
+        ids = view[offset:offset + row_count * 4].cast('I')
+
+        return cls(locations, cells, prices, ids, source=mapped)
+
+
+def generate_synthetic_listings(count, seed=42):
+    """Random listings shaped like scraper output, for benchmarking."""
+    rng = random.Random(seed)
+    try:
+        from meqasa_working_scraper import GREATER_ACCRA_AREAS
+        names = [area['name'] for area in GREATER_ACCRA_AREAS]
+    except ImportError:  # scraper needs playwright; fall back to a few names
+        names = ['Osu', 'East Legon', 'Madina', 'Spintex', 'Dansoman', 'Tema']
+
+    listings = []
+    for _ in range(count):
+        bedrooms = rng.choice([None, 1, 1, 2, 2, 2, 3, 3, 4, 5])
+        base = 2500 * (bedrooms or 1)
+        listings.append({
+            'location': rng.choice(names),
+            'bedrooms': bedrooms,
+            'price': int(base * rng.uniform(0.5, 3.0)),
+        })
+    return listings
+
+
+def run_benchmark(count, queries=1000):
+    """Build a synthetic index and time typical compound queries."""
+    print("=" * 70)
+    print(f"LISTING INDEX BENCHMARK ({count:,} listings)")
+    print("=" * 70)
+
+    listings = generate_synthetic_listings(count)
+
+    start = time.perf_counter()
+    index = ListingIndex.build(listings)
+    print(f"\n  Build:            {time.perf_counter() - start:8.2f}s")
+
+    path = Path('listing_index_benchmark.idx')
+    index.save(path)
+    start = time.perf_counter()
+    loaded = ListingIndex.load(path)
+    print(f"  mmap load:        {(time.perf_counter() - start) * 1000:8.2f}ms")
+
+    cases = [
+        ('top-10 cheapest, Osu 2BR',
+         dict(limit=10, locations=['Osu'], min_bedrooms=2, max_bedrooms=2)),
+        ('top-10, 3 areas 2-3BR <=8000',
+         dict(limit=10, locations=['Osu', 'East Legon', 'Madina'],
+              min_bedrooms=2, max_bedrooms=3, max_price=8000)),
+        ('top-10, all areas 1BR 2-4k',
+         dict(limit=10, min_bedrooms=1, max_bedrooms=1, min_price=2000, max_price=4000)),
+    ]
+
+    for label, criteria in cases:
+        for name, idx in (('memory', index), ('mmap', loaded)):
+            start = time.perf_counter()
+            for _ in range(queries):
+                idx.query(**criteria)
+            per_query = (time.perf_counter() - start) / queries * 1000
+            print(f"  {label:32s} [{name:6s}] {per_query:8.3f}ms/query")
+
+        naive = time.perf_counter()
+        wanted = {normalize_location(l) for l in criteria.get('locations', [])}
+        low_beds = criteria.get('min_bedrooms', 0)
+        high_beds = criteria.get('max_bedrooms', 99)
+        bedroom_bound = 'min_bedrooms' in criteria or 'max_bedrooms' in criteria
+        sorted(
+            l['price'] for l in listings
+            if (not wanted or l['location'] in wanted)
+            and (low_beds <= l['bedrooms'] <= high_beds if l['bedrooms'] is not None
+                 else not bedroom_bound)
+            and criteria.get('min_price', 0) <= l['price'] <= criteria.get('max_price', 10**9)
+        )[:10]
+        print(f"  {label:32s} [linear] {(time.perf_counter() - naive) * 1000:8.3f}ms/query")
+
+    del loaded
+    path.unlink()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Build or query a listing index')
+    parser.add_argument('input', nargs='?', type=str,
+                        help='Scraper JSON output or a saved .idx file')
+    parser.add_argument('--output', '-o', type=str, help='Where to save the built index')
+    parser.add_argument('--location', action='append', help='Location filter (repeatable)')
+    parser.add_argument('--min-bedrooms', type=int)
+    parser.add_argument('--max-bedrooms', type=int)
+    parser.add_argument('--min-price', type=int)
+    parser.add_argument('--max-price', type=int)
+    parser.add_argument('--top', type=int, default=10, help='Number of results (default: 10)')
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help='Benchmark on N synthetic listings instead')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.benchmark)
+    elif args.input and args.input.endswith('.idx'):
+        index = ListingIndex.load(args.input)
+        criteria = dict(locations=args.location, min_bedrooms=args.min_bedrooms,
+                        max_bedrooms=args.max_bedrooms, min_price=args.min_price,
+                        max_price=args.max_price)
+        print(f"Matched {index.count(**criteria)} listings")
+        for price, listing_id in index.cheapest(args.top, **criteria):
+            print(f"  #{listing_id:<8d} GH₵{price:,}")
+    elif args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            scraped = json.load(f)
+        index = ListingIndex.build(scraped.get('listings', []))
+        target = args.output or Path(args.input).with_suffix('.idx')
+        index.save(target)
+        print(f"✓ Indexed {len(index)} listings across {len(index.locations)} locations -> {target}")
+    else:
+        parser.print_help()
@@ -0,0 +1,274 @@
+"""
+Listing I/O - Typed, fast encode/decode of scraper output files
+Every scraper output is the same shape: a few header fields plus a list of
+listing dicts. The listing fields are declared once in LISTING_FIELDS. Decoding
+checks each listing against them, so a price scraped as a string or a listing
+without a URL fails on load with its position, instead of deep inside the
+analysis.
+
+The codec is picked by what is installed: orjson, then msgspec, then the
+stdlib json module. Validation uses a msgspec Struct built from LISTING_FIELDS
+when msgspec is available, and a plain Python check otherwise. All codecs
+write the same bytes as json.dump(indent=2, ensure_ascii=False).
+"""
+
+import json
+from pathlib import Path
+from typing import Annotated
+
+from changefeed import get_changes_path
+
+try:
+    import orjson
+except ImportError:  # optional, faster encode/decode
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional, faster decode and validation
+    msgspec = None
+
+
+# Listing JSON fields: (name, type, required). Required fields must be present
+# and not null; the others may be null or missing. Unknown fields are kept.
+LISTING_FIELDS = (
+    ('title', str, True),
+    ('price', int, True),
+    ('url', str, True),
+    ('price_text', str, False),
+    ('price_period', str, False),
+    ('property_type', str, False),
+    ('bedrooms', int, False),
+    ('location', str, False),
+    ('area', str, False),
+    ('source', str, False),
+    ('scraped_at', str, False),
+    ('page', int, False),
+)
+
+# Fields that must also be non-empty
+NON_EMPTY_FIELDS = ('url',)
+
+if orjson is not None:
+    CODEC = 'orjson'
+elif msgspec is not None:
+    CODEC = 'msgspec'
+else:
+    CODEC = 'json'
+
+
+class ListingSchemaError(ValueError):
+    """Scraper output that doesn't match LISTING_FIELDS."""
+
+
+def _output_type():
+    """msgspec Struct for an output file, built from LISTING_FIELDS."""
+    fields = []
+    for name, kind, required in LISTING_FIELDS:
+        if name in NON_EMPTY_FIELDS:
+            kind = Annotated[kind, msgspec.Meta(min_length=1)]
+        fields.append((name, kind) if required else (name, kind | None, None))
+    record = msgspec.defstruct('ListingRecord', fields)
+    return msgspec.defstruct('ScraperOutput', [('listings', list[record]),
+                                               ('total_listings', int | None, None)])
+
+
+_OUTPUT_TYPE = _output_type() if msgspec is not None else None
+
+_TYPE_NAMES = {str: 'str', int: 'int', bool: 'bool', float: 'float', list: 'array',
+               dict: 'object', type(None): 'null'}
+
+
+def _type_name(value):
+    return _TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def _check_listings(data):
+    """Pure-Python version of the msgspec check, with the same messages."""
+    if not isinstance(data, dict):
+        raise ListingSchemaError(f"Expected `object`, got `{_type_name(data)}`")
+    listings = data.get('listings')
+    if not isinstance(listings, list):
+        if 'listings' not in data:
+            raise ListingSchemaError("Object missing required field `listings`")
+        raise ListingSchemaError(f"Expected `array`, got `{_type_name(listings)}` - at `$.listings`")
+    for i, listing in enumerate(listings):
+        where = f"$.listings[{i}]"
+        if not isinstance(listing, dict):
+            raise ListingSchemaError(f"Expected `object`, got `{_type_name(listing)}` - at `{where}`")
+        for name, kind, required in LISTING_FIELDS:
+            if name not in listing:
+                if required:
+                    raise ListingSchemaError(
+                        f"Object missing required field `{name}` - at `{where}`")
+                continue
+            value = listing[name]
+            if value is None:
+                if required:
+                    raise ListingSchemaError(
+                        f"Expected `{kind.__name__}`, got `null` - at `{where}.{name}`")
+                continue
+            # bool is an int subclass, but never a valid price or count
+            if type(value) is not kind:
+                expected = kind.__name__ if required else f"{kind.__name__} | null"
+                raise ListingSchemaError(
+                    f"Expected `{expected}`, got `{_type_name(value)}` - at `{where}.{name}`")
+            if name in NON_EMPTY_FIELDS and not value:
+                raise ListingSchemaError(
+                    f"Expected `{kind.__name__}` of length >= 1 - at `{where}.{name}`")
+
+
+def validate_output(data):
+    """Raise ListingSchemaError if a decoded output's listings don't match LISTING_FIELDS."""
+    if msgspec is None:
+        _check_listings(data)
+        return
+    try:
+        msgspec.convert(data, _OUTPUT_TYPE)
+    except msgspec.ValidationError as e:
+        raise ListingSchemaError(str(e)) from None
+
+
+def _loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    if msgspec is not None:
+        return msgspec.json.decode(raw)
+    return json.loads(raw)
+
+
+def decode_output(raw, validate=True):
+    """Parse output JSON (bytes or str) into a dict, checking listings by default."""
+    data = _loads(raw)
+    if validate:
+        validate_output(data)
+    return data
+
+
+def encode_output(data):
+    """Output dict as UTF-8 JSON bytes, 2-space indented like the files always were."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    if msgspec is not None:
+        return msgspec.json.format(msgspec.json.encode(data), indent=2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def read_output(path, validate=True):
+    """Load a scraper JSON output file; errors name the file and the bad listing."""
+    raw = Path(path).read_bytes()
+    try:
+        return decode_output(raw, validate)
+    except ListingSchemaError as e:
+        raise ListingSchemaError(f"{path}: {e}") from None
+
+
+def write_output(data, path):
+    """Write a scraper JSON output file. Returns the path."""
+    path = Path(path)
+    path.write_bytes(encode_output(data))
+    return path
+
+
+def read_json(path):
+    """Any JSON file through the selected codec, without listing checks."""
+    return _loads(Path(path).read_bytes())
+
+
+def print_summary(path):
+    """Markdown run summary of an output (and its changeset) for the workflow."""
+    data = read_output(path, validate=False)
+    print("- **Region:** Greater Accra")
+    print(f"- **Areas Scraped:** {data.get('areas_scraped', 'N/A')}")
+    print(f"- **Total Listings:** {data['total_listings']} apartments")
+    print(f"- **Scraped At:** {data['scraped_at']}")
+    changes_path = get_changes_path(path)
+    if changes_path.exists():
+        s = read_json(changes_path)['summary']
+        print(f"- **Changes:** +{s['added']} / -{s['removed']} / {s['price_changed']} price changes")
+    print()
+    print("### Top 10 Areas by Listings")
+    stats = data.get('area_stats', {})
+    for area, count in sorted(stats.items(), key=lambda x: x[1], reverse=True)[:10]:
+        if count > 0:
+            print(f"- {area}: {count} listings")
+
+
+def run_benchmark(path, repeats=10):
+    """Best-of-N load and save times of one output file for each available codec."""
+    import time
+
+    raw = Path(path).read_bytes()
+    data = json.loads(raw)
+
+    def best_ms(fn):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best * 1000
+
+    print("=" * 70)
+    print(f"LISTING I/O BENCHMARK ({len(raw) / 1024 / 1024:.1f} MB, "
+          f"{len(data.get('listings', [])):,} listings, best of {repeats})")
+    print("=" * 70)
+
+    rows = [('json', lambda: json.loads(raw),
+             lambda: json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'))]
+    if msgspec is not None:
+        rows.append(('msgspec', lambda: msgspec.json.decode(raw),
+                     lambda: msgspec.json.format(msgspec.json.encode(data), indent=2)))
+    if orjson is not None:
+        rows.append(('orjson', lambda: orjson.loads(raw),
+                     lambda: orjson.dumps(data, option=orjson.OPT_INDENT_2)))
+
+    print(f"\n  {'codec':10s} {'decode':>10s} {'encode':>10s}  same bytes")
+    baseline = None
+    for name, decode, encode in rows:
+        decode_ms, encode_ms = best_ms(decode), best_ms(encode)
+        baseline = baseline or (decode_ms, encode_ms)
+        same = encode() == rows[0][2]()
+        print(f"  {name:10s} {decode_ms:8.1f}ms {encode_ms:8.1f}ms  {'✓' if same else '✗'}"
+              f"   ({baseline[0] / decode_ms:.1f}x / {baseline[1] / encode_ms:.1f}x)")
+
+    check = 'msgspec' if msgspec is not None else 'python'
+    validate_ms = best_ms(lambda: validate_output(data))
+    python_ms = best_ms(lambda: _check_listings(data))
+    print(f"\n  Validation ({check}):   {validate_ms:8.1f}ms")
+    if msgspec is not None:
+        print(f"  Validation (python):    {python_ms:8.1f}ms")
+    load_ms = best_ms(lambda: decode_output(raw))
+    print(f"\n  read_output ({CODEC} + {check} check): {load_ms:.1f}ms "
+          f"vs json.load {baseline[0]:.1f}ms ({baseline[0] / load_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description='Scraper output codec: check, summary, benchmark')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    check_parser = sub.add_parser('check', help='Validate an output; exit 1 if it is malformed')
+    check_parser.add_argument('input', type=str, help='Scraper JSON output')
+
+    summary_parser = sub.add_parser('summary', help='Markdown run summary for the workflow')
+    summary_parser.add_argument('input', type=str, help='Scraper JSON output')
+
+    bench_parser = sub.add_parser('bench', help='Compare codecs on an output file')
+    bench_parser.add_argument('input', type=str, help='Scraper JSON output')
+    bench_parser.add_argument('--repeats', type=int, default=10, help='Runs per timing (best is kept)')
+
+    args = parser.parse_args()
+
+    if args.command == 'check':
+        try:
+            data = read_output(args.input)
+        except ListingSchemaError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✓ {args.input}: {len(data['listings']):,} listings match the schema ({CODEC})")
+    elif args.command == 'summary':
+        print_summary(args.input)
+    else:
+        run_benchmark(args.input, args.repeats)
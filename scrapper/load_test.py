@@ -0,0 +1,128 @@
+"""
+Load Test - Throughput and latency of the read API
+Fires a mix of stats, estimate, recommendation and search requests at a
+running read_api.py from concurrent asyncio clients for a fixed duration, then
+reports requests/sec and latency percentiles per endpoint.
+"""
+
+import asyncio
+import random
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+import aiohttp
+
+
+BUDGETS = [1500, 2500, 4000, 6000, 9000, 15000, 25000]
+
+# Share of each request type in the mix
+MIX = [
+    ('stats', 0.15),
+    ('estimate', 0.35),
+    ('recommendations', 0.25),
+    ('listings', 0.25),
+]
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)]
+
+
+def build_requests(locations, count, seed=7):
+    """Random request paths; a finite pool so the LRU cache sees realistic repeats."""
+    rng = random.Random(seed)
+    kinds = [kind for kind, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    paths = []
+    for _ in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        location = rng.choice(locations)
+        bedrooms = rng.randint(1, 5)
+        if kind == 'stats':
+            params = {'location': location}
+        elif kind == 'estimate':
+            params = {'location': location, 'bedrooms': bedrooms}
+        elif kind == 'recommendations':
+            params = {'budget': rng.choice(BUDGETS), 'location': location, 'bedrooms': bedrooms}
+        else:
+            params = {'location': location, 'min_bedrooms': bedrooms,
+                      'max_price': rng.choice(BUDGETS), 'limit': 20}
+        paths.append((kind, f"/{kind}?{urlencode(params)}"))
+    return paths
+
+
+async def run_load_test(base_url, concurrency=32, duration=10.0, pool_size=2000):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{base_url}/stats") as response:
+            stats = await response.json()
+        locations = [s['location'] for s in stats['locations']]
+        paths = build_requests(locations, pool_size)
+
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        cache_hits = 0
+        deadline = time.perf_counter() + duration
+
+        async def client(worker_id):
+            nonlocal cache_hits
+            rng = random.Random(worker_id)
+            while time.perf_counter() < deadline:
+                kind, path = rng.choice(paths)
+                start = time.perf_counter()
+                try:
+                    async with session.get(base_url + path) as response:
+                        await response.read()
+                        if response.status >= 500:
+                            errors[kind] += 1
+                            continue
+                        if response.headers.get('X-Cache') == 'hit':
+                            cache_hits += 1
+                except aiohttp.ClientError:
+                    errors[kind] += 1
+                    continue
+                latencies[kind].append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return latencies, errors, cache_hits, elapsed
+
+
+def print_results(latencies, errors, cache_hits, elapsed, concurrency):
+    total = sum(len(v) for v in latencies.values())
+    print("=" * 70)
+    print("READ API LOAD TEST")
+    print("=" * 70)
+    print(f"  {concurrency} clients, {elapsed:.1f}s, {total:,} requests, "
+          f"{sum(errors.values())} errors, {cache_hits / max(total, 1):.0%} cache hits")
+    print(f"  Throughput: {total / elapsed:,.0f} requests/sec\n")
+    print(f"  {'endpoint':18s} {'requests':>9s} {'p50':>9s} {'p95':>9s} {'p99':>9s}")
+    everything = []
+    for kind, _ in MIX:
+        values = sorted(latencies[kind])
+        everything.extend(values)
+        print(f"  {kind:18s} {len(values):>9,} {percentile(values, 0.50) * 1000:>7.2f}ms "
+              f"{percentile(values, 0.95) * 1000:>7.2f}ms {percentile(values, 0.99) * 1000:>7.2f}ms")
+    everything.sort()
+    print(f"  {'all':18s} {len(everything):>9,} {percentile(everything, 0.50) * 1000:>7.2f}ms "
+          f"{percentile(everything, 0.95) * 1000:>7.2f}ms {percentile(everything, 0.99) * 1000:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Load test the read API')
+    parser.add_argument('--url', type=str, default='http://127.0.0.1:8080',
+                        help='Base URL of a running read_api.py')
+    parser.add_argument('--concurrency', '-c', type=int, default=32)
+    parser.add_argument('--duration', '-d', type=float, default=10.0, help='Seconds to run')
+    parser.add_argument('--pool', type=int, default=2000,
+                        help='Distinct request paths to draw from (default: 2000)')
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load_test(args.url.rstrip('/'), args.concurrency,
+                                        args.duration, args.pool))
+    print_results(*results, concurrency=args.concurrency)
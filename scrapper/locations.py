@@ -0,0 +1,73 @@
+"""
+Location Normalization - Python mirror of lib/data.ts normalizeLocation
+Keeps the scraper-side tooling grouping listings the same way the app does.
+"""
+
+# Greater Accra location aliases for normalization (keep in sync with lib/data.ts)
+LOCATION_ALIASES = {
+    # Spelling variations
+    'cantonment': 'Cantonments',
+    'airport residential area': 'Airport Residential',
+    'airport res': 'Airport Residential',
+    'roman ridge area': 'Roman Ridge',
+    'east legon hills': 'East Legon',
+    'east legon extension': 'East Legon',
+    'spintex road': 'Spintex',
+    'tema community 25': 'Community 25',
+    'comm 25': 'Community 25',
+    'tema comm 25': 'Community 25',
+    'north legon': 'Legon',
+    'west legon': 'West Legon',
+    'madina estates': 'Madina',
+    'adenta housing down': 'Adenta',
+    'adentan': 'Adenta',
+    'kasoa millennium city': 'Kasoa',
+    'mccarthy hills': 'McCarthy Hill',
+    'macarthy hill': 'McCarthy Hill',
+    'dzorwulu area': 'Dzorwulu',
+    'dansoman exhibition': 'Dansoman',
+    'dansoman last stop': 'Dansoman',
+    'asylum down area': 'Asylum Down',
+    'north ridge area': 'North Ridge',
+    'osu re': 'Osu',
+    'osu oxford street': 'Osu',
+    'labone junction': 'Labone',
+    'la dade': 'La',
+    'la palm': 'La',
+    'labadi beach': 'Labadi',
+    'teshie nungua': 'Teshie',
+    'teshie estates': 'Teshie',
+    'sakumono estates': 'Sakumono',
+    'tema sakumono': 'Sakumono',
+    'achimota golf hills': 'Achimota',
+    'achimota mile 7': 'Achimota',
+    'tantra hills': 'Tantra Hill',
+    'dome pillar 2': 'Dome',
+    'dome kwabenya': 'Dome',
+    'haatso ecomog': 'Haatso',
+    'haatso atomic': 'Haatso',
+    'pig farm junction': 'Pig Farm',
+    'lapaz': 'Lapaz',
+    'la paz': 'Lapaz',
+    'circle odorkor': 'Circle',
+    'kwame nkrumah circle': 'Circle',
+    'east airport': 'Airport Residential',
+    'airport hills': 'Airport Residential',
+    'american house east legon': 'American House',
+    'trasacco valley': 'Trasacco',
+}
+
+
+def normalize_location(location):
+    """Normalize a location name to its canonical form."""
+    if not location:
+        return location
+
+    lower = location.lower().strip()
+
+    # Check aliases first
+    if lower in LOCATION_ALIASES:
+        return LOCATION_ALIASES[lower]
+
+    # Title case the location if no alias found (split on single spaces like the app)
+    return ' '.join(word[:1].upper() + word[1:].lower() for word in location.split(' '))
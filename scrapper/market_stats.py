@@ -0,0 +1,213 @@
+"""
+Market Stats - Python port of the app's pricing logic
+Line-for-line ports of getLocationStats / estimatePrice (lib/data.ts) and
+getRecommendations (lib/recommendations.ts), as documented in CALCULATIONS.md,
+so Python services answer exactly what the app would. Listings are the JSON
+listing dicts; results use the same field names as the TypeScript types.
+"""
+
+import math
+
+
+def js_round(value):
+    """Math.round (halves round towards +infinity)."""
+    return math.floor(value + 0.5)
+
+
+def to_locale_string(value):
+    """Number.prototype.toLocaleString('en-US'): grouping, up to 3 decimals."""
+    if float(value).is_integer():
+        return f"{int(value):,}"
+    return f"{value:,.3f}".rstrip('0').rstrip('.')
+
+
+def confidence_for(count, high=10, medium=5):
+    return 'high' if count >= high else 'medium' if count >= medium else 'low'
+
+
+def location_stats(listings):
+    """getLocationStats: per-location stats, most listings first."""
+    by_location = {}
+    for listing in listings:
+        by_location.setdefault(listing['location'], []).append(listing)
+
+    stats = []
+    for location, items in by_location.items():
+        prices = [l['price'] for l in items]
+        price_by_bedroom = {}
+        for beds in (1, 2, 3, 4, 5):
+            bedroom_prices = [l['price'] for l in items if l.get('bedrooms') == beds]
+            if bedroom_prices:
+                price_by_bedroom[beds] = sum(bedroom_prices) / len(bedroom_prices)
+        stats.append({
+            'location': location,
+            'averagePrice': sum(prices) / len(prices),
+            'minPrice': min(prices),
+            'maxPrice': max(prices),
+            'count': len(items),
+            'priceByBedroom': price_by_bedroom,
+        })
+    stats.sort(key=lambda s: -s['count'])
+    return stats
+
+
+def estimate_price(location, bedrooms, listings):
+    """estimatePrice: price range for a location and bedroom count, or None."""
+    wanted = location.lower()
+    filtered = [l for l in listings
+                if l['location'].lower() == wanted and l.get('bedrooms') == bedrooms
+                and l['price'] > 0]
+
+    if filtered:
+        prices = sorted(l['price'] for l in filtered)
+        return {
+            'low': js_round(prices[0]),
+            'average': js_round(sum(prices) / len(prices)),
+            'high': js_round(prices[-1]),
+            'count': len(filtered),
+            'confidence': confidence_for(len(filtered)),
+        }
+
+    location_only = [l for l in listings
+                     if l['location'].lower() == wanted and l['price'] > 0]
+    if not location_only:
+        return None
+
+    with_bedrooms = [l for l in location_only if l.get('bedrooms')]
+    if not with_bedrooms:
+        avg = sum(l['price'] for l in location_only) / len(location_only)
+        return {
+            'low': js_round(avg * 0.8),
+            'average': js_round(avg),
+            'high': js_round(avg * 1.2),
+            'count': len(location_only),
+            'confidence': 'low',
+        }
+
+    same_bed_all = [l for l in listings if l.get('bedrooms') == bedrooms and l['price'] > 0]
+    if same_bed_all:
+        market_avg_for_bedroom = sum(l['price'] for l in same_bed_all) / len(same_bed_all)
+        location_avg = sum(l['price'] for l in with_bedrooms) / len(with_bedrooms)
+        all_with_beds = [l for l in listings if l.get('bedrooms') and l['price'] > 0]
+        market_avg = 0
+        for l in all_with_beds:
+            market_avg += l['price'] / len(all_with_beds)
+        premium = location_avg / market_avg if market_avg > 0 else 1
+        estimated = market_avg_for_bedroom * premium
+
+        same_bed_prices = sorted(l['price'] for l in same_bed_all)
+        p10 = same_bed_prices[math.floor(len(same_bed_prices) * 0.1)] or same_bed_prices[0]
+        p90 = same_bed_prices[math.floor(len(same_bed_prices) * 0.9)] or same_bed_prices[-1]
+        return {
+            'low': js_round(min(p10 * premium, estimated * 0.85)),
+            'average': js_round(estimated),
+            'high': js_round(max(p90 * premium, estimated * 1.15)),
+            'count': len(same_bed_all),
+            'confidence': 'low',
+        }
+
+    total_price = sum(l['price'] for l in with_bedrooms)
+    total_beds = sum(l['bedrooms'] or 0 for l in with_bedrooms)
+    estimated = total_price / total_beds * bedrooms
+    return {
+        'low': js_round(estimated * 0.8),
+        'average': js_round(estimated),
+        'high': js_round(estimated * 1.2),
+        'count': len(with_bedrooms),
+        'confidence': 'low',
+    }
+
+
+def _bed_or_avg(stat, bedrooms):
+    return stat['priceByBedroom'].get(bedrooms) or stat['averagePrice']
+
+
+def _count_confidence(stat):
+    return 'high' if stat['count'] >= 5 else 'medium' if stat['count'] >= 3 else 'low'
+
+
+def get_recommendations(budget, preferred_location, bedrooms, listings=None, stats=None):
+    """getRecommendations; pass precomputed location_stats() as stats to skip the rebuild."""
+    if stats is None:
+        stats = location_stats(listings)
+    recommendations = []
+
+    current = next((s for s in stats if s['location'] == preferred_location), None)
+    current_price = (current and (current['priceByBedroom'].get(bedrooms)
+                                  or current['averagePrice'])) or budget
+
+    # 1. Cheaper alternatives
+    cheaper = []
+    for s in stats:
+        price = _bed_or_avg(s, bedrooms)
+        if price > 0 and price < current_price * 0.85 and s['location'] != preferred_location:
+            cheaper.append({
+                'type': 'cheaper_alternative',
+                'location': s['location'],
+                'price': price,
+                'bedrooms': bedrooms,
+                'savings': current_price - price,
+                'reason': f"Save GH₵{to_locale_string(current_price - price)}/month "
+                          f"vs {preferred_location}",
+                'confidence': _count_confidence(s),
+            })
+    cheaper.sort(key=lambda r: -(r['savings'] or 0))
+    recommendations.extend(cheaper[:3])
+
+    # 2. Affordable upgrades
+    if bedrooms < 5:
+        upgrades = []
+        for s in stats:
+            price = s['priceByBedroom'].get(bedrooms + 1)
+            if price and price > 0 and price <= budget * 1.1:
+                upgrades.append({
+                    'type': 'affordable_upgrade',
+                    'location': s['location'],
+                    'price': price,
+                    'bedrooms': bedrooms + 1,
+                    'reason': f"Get {bedrooms + 1} bedrooms for just "
+                              f"GH₵{to_locale_string(price)}/month",
+                    'confidence': _count_confidence(s),
+                })
+        upgrades.sort(key=lambda r: r['price'])
+        recommendations.extend(upgrades[:2])
+
+    # 3. Best deals vs the market average for this bedroom count
+    bedroom_prices = [s['priceByBedroom'][bedrooms] for s in stats
+                      if s['priceByBedroom'].get(bedrooms, 0) > 0]
+    market_avg = sum(bedroom_prices) / len(bedroom_prices) if bedroom_prices else 0
+    if market_avg > 0:
+        deals = []
+        for s in stats:
+            price = s['priceByBedroom'].get(bedrooms)
+            if (price and price > 0 and price < market_avg * 0.85 and price <= budget
+                    and s['location'] != preferred_location):
+                deals.append({
+                    'type': 'best_deal',
+                    'location': s['location'],
+                    'price': price,
+                    'bedrooms': bedrooms,
+                    'reason': f"{js_round((market_avg - price) / market_avg * 100)}% "
+                              f"below market avg for {bedrooms}BR",
+                    'confidence': 'high' if s['count'] >= 5 else 'medium',
+                })
+        deals.sort(key=lambda r: r['price'])
+        recommendations.extend(deals[:2])
+
+    # 4. Budget stretch (up to 15% over budget)
+    stretch = []
+    for s in stats:
+        price = _bed_or_avg(s, bedrooms)
+        if budget < price <= budget * 1.15 and s['location'] != preferred_location:
+            stretch.append({
+                'type': 'budget_stretch',
+                'location': s['location'],
+                'price': price,
+                'bedrooms': bedrooms,
+                'reason': f"Premium area for GH₵{to_locale_string(price - budget)} more/month",
+                'confidence': 'high' if s['count'] >= 5 else 'medium',
+            })
+    stretch.sort(key=lambda r: r['price'])
+    recommendations.extend(stretch[:2])
+
+    return recommendations
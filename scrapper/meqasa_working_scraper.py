@@ -1,15 +1,21 @@
 """
 Meqasa Greater Accra Scraper - Full Region Coverage
 Scrapes rental apartments from all major areas in Greater Accra Region
+
+The area list and the page parsers live here; the crawl itself is the shared
+pipeline (pipeline.run_source with source_adapters.MeqasaAdapter), so retries,
+pagination, area pruning, incremental runs, hedging and the health check work
+the same as for every other source.
 """
 
-from playwright.sync_api import sync_playwright
-import json
-import time
-from datetime import datetime
 import re
 from pathlib import Path
-from collections import Counter
+
+from area_overlap import FULL_SWEEP_EVERY
+from listing import Listing, now_epoch
+from pipeline import run_source
+from profiling import get_profile_prefix
+from seen_filter import DEFAULT_FP_RATE, INCREMENTAL_STOP_PAGES
 
 
 # Greater Accra Region areas to scrape
@@ -114,6 +120,15 @@ GREATER_ACCRA_AREAS = [
 ]
 
 
+# Titles with these words aren't apartments
+EXCLUDED_TITLE_TERMS = ['house', 'villa', 'mansion', 'townhouse', 'bungalow',
+                        'office', 'shop', 'warehouse', 'land', 'plot', 'store',
+                        'commercial', 'retail', 'industrial', 'factory']
+
+# Prices quoted per year, not per month
+YEARLY_TERMS = ['/year', 'per year', 'p.a', 'per annum', '/yr', 'yearly']
+
+
 def get_output_path():
     """Get the correct output path for the JSON file."""
     script_dir = Path(__file__).parent.absolute()
@@ -122,9 +137,37 @@ def get_output_path():
     return public_dir / 'meqasa_data.json'
 
 
-def extract_from_html(html_content, page_num, area_name):
+def card_urls(html_content):
+    """Listing URLs of every card on a page, in order, before any filtering"""
+    urls = []
+    for section in html_content.split('class="mqs-prop-dt-wrapper"')[1:]:
+        href_match = re.search(r'<h2>\s*<a[^>]*href="([^"]*)"', section)
+        if href_match:
+            href = href_match.group(1)
+            urls.append(href if href.startswith('http') else f"https://meqasa.com{href}")
+    return urls
+
+
+def location_from_title(title, default):
+    """Location named in a listing title ("... for rent at East Legon"), else default"""
+    loc_match = re.search(
+        r'(?:for rent|apartment|flat|studio)\s+(?:at|in)\s+([A-Z][a-zA-Z\s\-]+?)(?:\s*[-,]|\s+Ghana|\s*$)', title, re.IGNORECASE)
+    if loc_match:
+        extracted_loc = loc_match.group(1).strip()
+        # Clean up location
+        extracted_loc = re.sub(r'\s+', ' ', extracted_loc)
+        extracted_loc = extracted_loc.replace('Accra-Ghana', '').replace('Ghana', '').strip()
+        extracted_loc = extracted_loc.strip(' -,')
+        if extracted_loc and len(extracted_loc) > 2:
+            return extracted_loc
+    return default
+
+
+def extract_from_html(html_content, page_num, area_name, scraped_at=None):
     """Extract listings directly from HTML string"""
     listings = []
+    if scraped_at is None:
+        scraped_at = now_epoch()
 
     # Split by mqs-prop-dt-wrapper divs
     sections = html_content.split('class="mqs-prop-dt-wrapper"')
@@ -145,10 +188,7 @@ def extract_from_html(html_content, page_num, area_name):
 
             # Filter out non-apartments
             title_lower = title.lower()
-            excluded = ['house', 'villa', 'mansion', 'townhouse', 'bungalow',
-                        'office', 'shop', 'warehouse', 'land', 'plot', 'store',
-                        'commercial', 'retail', 'industrial', 'factory']
-            if any(term in title_lower for term in excluded):
+            if any(term in title_lower for term in EXCLUDED_TITLE_TERMS):
                 continue
 
             # Extract price - handle various formats
@@ -164,7 +204,7 @@ def extract_from_html(html_content, page_num, area_name):
 
             # Check if it's monthly (skip yearly)
             section_lower = section.lower()
-            if any(term in section_lower for term in ['/year', 'per year', 'p.a', 'per annum', '/yr', 'yearly']):
+            if any(term in section_lower for term in YEARLY_TERMS):
                 continue
 
             # Validate price range for monthly (500 - 100,000 GHS)
@@ -182,36 +222,25 @@ def extract_from_html(html_content, page_num, area_name):
                     pass
 
             # Extract location from title or use area name
-            location = area_name
-            loc_match = re.search(
-                r'(?:for rent|apartment|flat|studio)\s+(?:at|in)\s+([A-Z][a-zA-Z\s\-]+?)(?:\s*[-,]|\s+Ghana|\s*$)', title, re.IGNORECASE)
-            if loc_match:
-                extracted_loc = loc_match.group(1).strip()
-                # Clean up location
-                extracted_loc = re.sub(r'\s+', ' ', extracted_loc)
-                extracted_loc = extracted_loc.replace('Accra-Ghana', '').replace('Ghana', '').strip()
-                extracted_loc = extracted_loc.strip(' -,')
-                if extracted_loc and len(extracted_loc) > 2:
-                    location = extracted_loc
+            location = location_from_title(title, area_name)
 
             # Build full URL
             full_url = f"https://meqasa.com{href}" if not href.startswith(
                 'http') else href
 
-            listing = {
-                'title': title,
-                'price': price,
-                'price_text': f"GH₵{price:,}/month",
-                'price_period': 'month',
-                'property_type': 'apartment',
-                'bedrooms': bedrooms,
-                'location': location,
-                'area': area_name,  # Store the search area for reference
-                'url': full_url,
-                'source': 'meqasa',
-                'scraped_at': datetime.now().isoformat(),
-                'page': page_num
-            }
+            listing = Listing(
+                title=title,
+                price=price,
+                price_period='month',
+                property_type='apartment',
+                bedrooms=bedrooms,
+                location=location,
+                area=area_name,  # Store the search area for reference
+                url=full_url,
+                source='meqasa',
+                scraped_at=scraped_at,
+                page=page_num
+            )
 
             listings.append(listing)
 
@@ -221,197 +250,66 @@ def extract_from_html(html_content, page_num, area_name):
     return listings
 
 
-def scrape_meqasa_greater_accra(output_path=None, max_pages_per_area=10):
-    """Scrape Meqasa for all Greater Accra areas"""
-
-    print("=" * 70)
-    print("MEQASA GREATER ACCRA REGION SCRAPER")
-    print("=" * 70)
-    print(f"\nScraping {len(GREATER_ACCRA_AREAS)} areas across Greater Accra")
-    print(f"Max {max_pages_per_area} pages per area\n")
-
-    all_listings = []
-    seen_urls = set()  # Track URLs to avoid duplicates
-    area_stats = {}
-
-    with sync_playwright() as p:
-        print("Launching browser...")
-        browser = p.chromium.launch(headless=True)
-
-        context = browser.new_context(
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
-        page = context.new_page()
-        page.set_viewport_size({"width": 1920, "height": 1080})
-
-        for area_idx, area in enumerate(GREATER_ACCRA_AREAS):
-            area_name = area["name"]
-            area_url_path = area["url"]
-            area_listings = 0
+def listing_from_detail(html_content, url, scraped_at=None):
+    """Listing from a detail page (discovery mode), or None if it isn't a monthly apartment"""
+    if scraped_at is None:
+        scraped_at = now_epoch()
+
+    title_match = (re.search(r'<h1[^>]*>(.*?)</h1>', html_content, re.DOTALL)
+                   or re.search(r'<meta[^>]*property="og:title"[^>]*content="([^"]+)"', html_content))
+    if not title_match:
+        return None
+    title = re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', ' ', title_match.group(1))).strip()
+    if len(title) < 10 or any(term in title.lower() for term in EXCLUDED_TITLE_TERMS):
+        return None
+
+    # The first price after the heading; similar listings further down quote their own
+    body = html_content[title_match.end():]
+    price_match = re.search(r'GH₵\s*([\d,]+)', body, re.IGNORECASE)
+    if not price_match:
+        return None
+    try:
+        price = int(price_match.group(1).replace(',', ''))
+    except ValueError:
+        return None
+    price_context = body[price_match.start():price_match.end() + 80].lower()
+    if any(term in price_context for term in YEARLY_TERMS):
+        return None
+    if price < 500 or price > 100000:
+        return None
+
+    bed_match = re.search(r'<li class="bed"><span>(\d+)</span>', html_content)
+    bedrooms = int(bed_match.group(1)) if bed_match else None
+
+    return Listing(
+        title=title,
+        price=price,
+        price_period='month',
+        property_type='apartment',
+        bedrooms=bedrooms,
+        location=location_from_title(title, 'Accra'),
+        url=url,
+        source='meqasa',
+        scraped_at=scraped_at,
+    )
 
-            print(f"\n{'='*50}")
-            print(f"[{area_idx + 1}/{len(GREATER_ACCRA_AREAS)}] Scraping: {area_name}")
-            print(f"{'='*50}")
 
-            for page_num in range(1, max_pages_per_area + 1):
-                if page_num == 1:
-                    url = f"https://meqasa.com/{area_url_path}"
-                else:
-                    url = f"https://meqasa.com/{area_url_path}?page={page_num}"
+def scrape_meqasa_greater_accra(output_path=None, max_pages_per_area=10, parquet=False,
+                                outliers='flag', prune_areas=False, parse_processes=0,
+                                incremental=False, seen_fp_rate=None, hedge=False,
+                                health_check=False, profile_prefix=None):
+    """
+    Scrape Meqasa for all Greater Accra areas through the shared pipeline.
+    Returns the exit status (0 ok, 1 nothing scraped, 2 failed health check).
+    """
+    from source_adapters import MeqasaAdapter
 
-                try:
-                    # Load page
-                    response = page.goto(
-                        url, wait_until='domcontentloaded', timeout=30000)
-
-                    if not response:
-                        print(f"  Page {page_num}: No response")
-                        break
-
-                    if response.status == 404:
-                        print(f"  Page {page_num}: 404 - Area not found, skipping")
-                        break
-
-                    if response.status != 200:
-                        print(f"  Page {page_num}: Status {response.status}")
-                        if page_num == 1:
-                            break
-                        continue
-
-                    # Wait for content
-                    time.sleep(3)
-
-                    # Get the HTML
-                    html_content = page.content()
-
-                    # Extract listings from HTML
-                    page_listings = extract_from_html(html_content, page_num, area_name)
-
-                    if not page_listings:
-                        if page_num == 1:
-                            print(f"  No listings in {area_name}")
-                        break
-
-                    # Filter out duplicates
-                    new_listings = []
-                    for listing in page_listings:
-                        if listing['url'] not in seen_urls:
-                            seen_urls.add(listing['url'])
-                            new_listings.append(listing)
-                            all_listings.append(listing)
-                            area_listings += 1
-
-                    if new_listings:
-                        print(f"  Page {page_num}: +{len(new_listings)} new listings")
-                        for listing in new_listings[:3]:  # Show first 3
-                            beds = listing['bedrooms'] or '?'
-                            price = listing['price']
-                            loc = listing['location']
-                            print(f"    - {loc} | {beds}BR | GH₵{price:,}/mo")
-                        if len(new_listings) > 3:
-                            print(f"    ... and {len(new_listings) - 3} more")
-                    else:
-                        print(f"  Page {page_num}: All duplicates")
-
-                    # Small delay between pages
-                    time.sleep(2)
-
-                except Exception as e:
-                    print(f"  Page {page_num}: Error - {str(e)[:50]}")
-                    if page_num == 1:
-                        break
-                    continue
-
-            area_stats[area_name] = area_listings
-            print(f"  Total for {area_name}: {area_listings} unique listings")
-
-            # Small delay between areas
-            time.sleep(1)
-
-        browser.close()
-
-    # Summary
-    print(f"\n{'='*70}")
-    print("SCRAPING COMPLETE")
-    print(f"{'='*70}")
-    print(f"\nTotal unique listings: {len(all_listings)}")
-    print(f"Areas with listings: {sum(1 for v in area_stats.values() if v > 0)}/{len(area_stats)}")
-
-    if len(all_listings) == 0:
-        print("\n❌ No listings extracted!")
-        return False
-
-    # Determine output path
-    if output_path is None:
-        output_path = get_output_path()
-
-    # Save
-    output_data = {
-        'scraped_at': datetime.now().isoformat(),
-        'total_listings': len(all_listings),
-        'source': 'meqasa',
-        'region': 'Greater Accra',
-        'property_type': 'apartments',
-        'price_period': 'monthly',
-        'currency': 'GHS',
-        'currency_symbol': 'GH₵',
-        'areas_scraped': len(GREATER_ACCRA_AREAS),
-        'area_stats': area_stats,
-        'listings': all_listings
-    }
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
-
-    print(f"\n✓ Saved to {output_path}")
-
-    # Statistics
-    print(f"\n{'='*70}")
-    print("STATISTICS")
-    print(f"{'='*70}")
-
-    prices = [l['price'] for l in all_listings]
-    print(f"\n💰 MONTHLY RENT PRICES")
-    print(f"  Total listings:  {len(all_listings)}")
-    print(f"  Average:         GH₵{sum(prices)/len(prices):,.0f}/month")
-    print(f"  Median:          GH₵{sorted(prices)[len(prices)//2]:,}/month")
-    print(f"  Min:             GH₵{min(prices):,}/month")
-    print(f"  Max:             GH₵{max(prices):,}/month")
-
-    # Location stats
-    locations = Counter(l['location'] for l in all_listings)
-    print(f"\n📍 TOP 25 LOCATIONS (out of {len(locations)} unique)")
-    for loc, count in locations.most_common(25):
-        pct = (count / len(all_listings)) * 100
-        bar = '█' * min(int(count / 5), 30)
-        print(f"  {loc:25s}: {count:4d} ({pct:4.1f}%) {bar}")
-
-    # Bedroom stats
-    bedrooms = [l['bedrooms'] for l in all_listings if l.get('bedrooms')]
-    if bedrooms:
-        bed_counts = Counter(bedrooms)
-        print(f"\n🛏️  BEDROOMS")
-        for beds in sorted(bed_counts.keys()):
-            count = bed_counts[beds]
-            pct = (count / len(bedrooms)) * 100
-            bar = '█' * min(int(count / 10), 30)
-            print(f"  {beds} BR: {count:4d} ({pct:4.1f}%) {bar}")
-
-    # Areas with most listings
-    print(f"\n📊 AREAS BY LISTING COUNT (Top 20)")
-    sorted_areas = sorted(area_stats.items(), key=lambda x: x[1], reverse=True)
-    for area, count in sorted_areas[:20]:
-        if count > 0:
-            bar = '█' * min(int(count / 5), 30)
-            print(f"  {area:25s}: {count:4d} {bar}")
-
-    print(f"\n{'='*70}")
-    print("✅ SUCCESS!")
-    print(f"{'='*70}")
-    print(f"\nData saved to: {output_path}")
-    print("Your app will automatically use the updated data!")
-
-    return True
+    formats = ['json', 'compact', 'snapshot'] + (['parquet'] if parquet else [])
+    return run_source(MeqasaAdapter(), output_path=output_path or get_output_path(),
+                      pages=max_pages_per_area, parse_processes=parse_processes,
+                      formats=formats, outliers=outliers, profile_prefix=profile_prefix,
+                      hedge=hedge, prune_areas=prune_areas, health_check=health_check,
+                      incremental=incremental, seen_fp_rate=seen_fp_rate)
 
 
 if __name__ == "__main__":
@@ -420,10 +318,47 @@ if __name__ == "__main__":
     parser.add_argument('--output', '-o', type=str, help='Custom output path')
     parser.add_argument('--pages', '-p', type=int, default=10,
                         help='Max pages per area (default: 10)')
+    parser.add_argument('--parquet', action='store_true',
+                        help='Also write a Parquet copy next to the output (needs pyarrow)')
+    parser.add_argument('--outliers', choices=['off', 'flag', 'quarantine'], default='flag',
+                        help='Price outlier handling (default: flag, report only)')
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='PREFIX',
+                        help='Profile the run; writes PREFIX.collapsed and PREFIX.stages.txt '
+                             '(default prefix: profiles/meqasa-<time>)')
+    parser.add_argument('--parse-processes', type=int, default=0,
+                        help='Parse pages in this many worker processes while the '
+                             'browser loads the next one (0 = threads)')
+    parser.add_argument('--prune-areas', action='store_true',
+                        help='Skip areas other areas already cover (full sweep every '
+                             f'{FULL_SWEEP_EVERY} runs); history in <output>.areas.json')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'Stop an area after {INCREMENTAL_STOP_PAGES} pages of listings '
+                             'seen in earlier runs (history in <output>.seen.bin)')
+    parser.add_argument('--seen-fp-rate', type=float,
+                        help=f'False-positive rate of the seen-URL Bloom filter '
+                             f'(default: {DEFAULT_FP_RATE})')
+    parser.add_argument('--hedge', action='store_true',
+                        help='Re-request pages still loading after the run\'s p95 latency '
+                             '(at most 5%% extra requests)')
+    parser.add_argument('--health-check', action='store_true',
+                        help='Probe the site first; stop if it is down, and crawl over '
+                             'plain HTTP when that works')
     args = parser.parse_args()
 
-    success = scrape_meqasa_greater_accra(
+    profile_prefix = None
+    if args.profile is not None:
+        profile_prefix = args.profile or get_profile_prefix('meqasa')
+
+    exit(scrape_meqasa_greater_accra(
         output_path=args.output,
-        max_pages_per_area=args.pages
-    )
-    exit(0 if success else 1)
+        max_pages_per_area=args.pages,
+        parquet=args.parquet,
+        outliers=args.outliers,
+        prune_areas=args.prune_areas,
+        parse_processes=args.parse_processes,
+        incremental=args.incremental,
+        seen_fp_rate=args.seen_fp_rate,
+        hedge=args.hedge,
+        health_check=args.health_check,
+        profile_prefix=profile_prefix
+    ))
@@ -3,17 +3,20 @@ Multi-Source Scraper - Combines Meqasa, Tonaton, and Jiji
 Run all scrapers and merge data into one comprehensive dataset
 """
 
-import json
 from datetime import datetime
 from collections import Counter, defaultdict
 import subprocess
 import os
 
+from listing_io import read_output, write_output
+from snapshot import Snapshot, get_snapshot_path
+
 
 class MultiSourceScraper:
     def __init__(self):
         """Initialize multi-source scraper"""
         self.all_listings = []
+        self.snapshots = []  # kept open while their rows are in all_listings
         self.sources = {
             'meqasa': {'file': 'meqasa_data.json', 'count': 0},
             'tonaton': {'file': 'tonaton_data.json', 'count': 0},
@@ -53,20 +56,30 @@ class MultiSourceScraper:
 
         for source, info in self.sources.items():
             filename = info['file']
+            snapshot_path = get_snapshot_path(filename)
+            if os.path.exists(snapshot_path) and (
+                    not os.path.exists(filename)
+                    or os.path.getmtime(snapshot_path) >= os.path.getmtime(filename)):
+                # Snapshot is as fresh as the JSON: mmap it instead of parsing.
+                # Rows stay lazy, so dedup and analysis only decode the fields
+                # they read, and only the kept rows are fully built on save
+                try:
+                    snapshot = Snapshot(snapshot_path)
+                    self.snapshots.append(snapshot)
+                    listings = snapshot.rows()
+                    self._add_listings(source, listings)
+                    print(
+                        f"✓ Loaded {len(listings)} listings from {source} (snapshot)")
+                    continue
+                except Exception as e:
+                    print(f"⚠️  Error loading {snapshot_path}: {e}")
+
             if os.path.exists(filename):
                 try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        listings = data.get('listings', [])
-
-                        # Ensure each listing has source marked
-                        for listing in listings:
-                            listing['source'] = source
-
-                        self.all_listings.extend(listings)
-                        self.sources[source]['count'] = len(listings)
-                        print(
-                            f"✓ Loaded {len(listings)} listings from {source}")
+                    listings = read_output(filename)['listings']
+                    self._add_listings(source, listings)
+                    print(
+                        f"✓ Loaded {len(listings)} listings from {source}")
                 except Exception as e:
                     print(f"⚠️  Error loading {filename}: {e}")
             else:
@@ -74,6 +87,14 @@ class MultiSourceScraper:
 
         print(f"\nTotal listings loaded: {len(self.all_listings)}")
 
+    def _add_listings(self, source, listings):
+        """Add loaded listings, making sure each one has its source marked"""
+        for listing in listings:
+            listing['source'] = source
+
+        self.all_listings.extend(listings)
+        self.sources[source]['count'] = len(listings)
+
     def deduplicate(self):
         """Remove duplicate listings"""
         print(f"\n{'='*70}")
@@ -126,14 +147,20 @@ class MultiSourceScraper:
                 source: info['count']
                 for source, info in self.sources.items()
             },
-            'listings': self.all_listings
+            'listings': [l if isinstance(l, dict) else dict(l) for l in self.all_listings]
         }
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        write_output(output, filename)
 
         print(f"\n✓ Saved {len(self.all_listings)} listings to {filename}")
 
+    def close(self):
+        """Drop the loaded listings and unmap the snapshots they came from"""
+        self.all_listings = []
+        for snapshot in self.snapshots:
+            snapshot.close()
+        self.snapshots = []
+
     def analyze_combined_data(self):
         """Analyze the combined dataset"""
         if not self.all_listings:
@@ -224,15 +251,12 @@ class MultiSourceScraper:
         print(f"  Complete data: {complete:4d} ({complete/total*100:5.1f}%)")
 
 
-def main():
+def main(run_scrapers=False, output_file='combined_rentals.json'):
     """Run the multi-source scraper"""
     scraper = MultiSourceScraper()
 
-    # Option 1: Run all scrapers first
-    print("\nDo you want to run all scrapers now? (y/n): ", end='')
-    choice = input().lower().strip()
-
-    if choice == 'y':
+    # Optionally run all scrapers first (no prompt, so this works unattended)
+    if run_scrapers:
         scraper.run_all_scrapers()
 
     # Load existing data
@@ -246,7 +270,7 @@ def main():
     scraper.deduplicate()
 
     # Save combined data
-    scraper.save_combined_data('combined_rentals.json')
+    scraper.save_combined_data(output_file)
 
     # Analyze
     scraper.analyze_combined_data()
@@ -254,10 +278,20 @@ def main():
     print(f"\n{'='*70}")
     print("✅ MULTI-SOURCE SCRAPING COMPLETE!")
     print(f"{'='*70}")
-    print(f"\nData saved to: combined_rentals.json")
+    print(f"\nData saved to: {output_file}")
     print(f"Total unique listings: {len(scraper.all_listings)}")
-    print(f"\nYou can now use combined_rentals.json in your Next.js app!")
+    print(f"\nYou can now use {output_file} in your Next.js app!")
+
+    scraper.close()
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description='Merge Meqasa, Tonaton and Jiji data')
+    parser.add_argument('--run-scrapers', action='store_true',
+                        help='Run all three scrapers before merging')
+    parser.add_argument('--output', '-o', type=str, default='combined_rentals.json',
+                        help='Combined output path (default: combined_rentals.json)')
+    args = parser.parse_args()
+
+    main(run_scrapers=args.run_scrapers, output_file=args.output)
@@ -0,0 +1,305 @@
+"""
+Outlier Filter - Robust price anomaly detection for scraped listings
+Mispriced listings (yearly rents, USD prices, typos, Jiji's daily-price guess)
+skew every average the app shows. This stage computes a robust baseline
+(median and MAD) per (location, bedrooms) cell from the current crawl plus
+historical data, in one vectorized pass, then flags or quarantines listings
+whose modified z-score is too far out. Prices that become normal after
+dividing by 12 or 30, or converting from USD, are reported as likely period
+or currency errors with a suggested correction.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from changefeed import load_output
+from listing import canonical_url
+from locations import normalize_location
+
+
+# Iglewicz-Hoaglin cutoff for the modified z-score 0.6745 * (x - median) / MAD
+Z_THRESHOLD = 3.5
+
+# A cell needs this many listings before its own baseline is trusted;
+# smaller cells fall back to the bedroom-wide, then the market-wide baseline
+MIN_CELL_SIZE = 5
+
+# MAD floor as a fraction of the median (cells where most prices are identical)
+MIN_MAD_RATIO = 0.05
+
+# A corrected price must land this close to the cell median to count as a
+# period/currency error rather than a genuinely expensive (or cheap) listing
+CORRECTION_Z = 1.0
+
+# GH₵ per US$, used to spot USD prices entered as cedis
+USD_TO_GHS = 15.0
+
+# (verdict, factor): price * factor is the corrected monthly GH₵ price
+CORRECTIONS = [
+    ('likely_yearly', 1 / 12),
+    ('likely_daily', 1 / 30),
+    ('likely_usd', USD_TO_GHS),
+]
+
+
+def get_report_path(output_path):
+    """Get the outlier report path for a scraper JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.outliers.json")
+
+
+def _field(listing, name):
+    if isinstance(listing, dict):
+        return listing.get(name)
+    return getattr(listing, name)
+
+
+def _group_median(sorted_values, starts, counts):
+    """Median of each contiguous group in an array sorted within groups."""
+    result = np.full(len(counts), np.nan)
+    present = counts > 0
+    lo = (starts + (counts - 1) // 2)[present]
+    hi = (starts + counts // 2)[present]
+    result[present] = (sorted_values[lo] + sorted_values[hi]) / 2
+    return result
+
+
+def robust_stats(group_ids, values, n_groups):
+    """Per-group (median, MAD, count) with sorting instead of Python loops."""
+    counts = np.bincount(group_ids, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    order = np.lexsort((values, group_ids))
+    medians = _group_median(values[order], starts, counts)
+
+    deviations = np.abs(values - medians[group_ids])
+    order = np.lexsort((deviations, group_ids))
+    mads = _group_median(deviations[order], starts, counts)
+
+    mads = np.maximum(mads, medians * MIN_MAD_RATIO)
+    return medians, mads, counts
+
+
+def _encode(keys):
+    """Dictionary-encode hashable keys to dense integer ids."""
+    ids = {}
+    codes = np.fromiter((ids.setdefault(k, len(ids)) for k in keys),
+                        dtype=np.int64, count=len(keys))
+    return codes, ids
+
+
+def score_listings(listings, history=()):
+    """
+    Robust z-scores for listings against baselines built from listings + history.
+
+    Returns a dict of numpy arrays aligned with listings: median, mad, z,
+    baseline level ('cell', 'bedrooms' or 'market') and cell key.
+    """
+    # Baselines count each listing once: the current crawl first, then
+    # history, deduplicated by canonical URL
+    n_current = len(listings)
+    rows = list(listings)
+    baseline_idx = []
+    seen = set()
+    for i, listing in enumerate(rows):
+        key = canonical_url(_field(listing, 'url'))
+        if key not in seen:
+            seen.add(key)
+            baseline_idx.append(i)
+    for listing in history:
+        key = canonical_url(_field(listing, 'url'))
+        if key and key not in seen and _field(listing, 'price'):
+            seen.add(key)
+            baseline_idx.append(len(rows))
+            rows.append(listing)
+
+    prices = np.array([float(_field(l, 'price') or 0) for l in rows])
+    # Unknown bedroom counts are their own group (None), not studios
+    bedrooms = [_field(l, 'bedrooms') for l in rows]
+    locations = [normalize_location(_field(l, 'location') or '') for l in rows]
+
+    cell_codes, cell_ids = _encode(list(zip(locations, bedrooms)))
+    bed_codes, bed_ids = _encode(bedrooms)
+
+    base = np.array(baseline_idx, dtype=np.int64)
+    base_prices = prices[base]
+    cell_median, cell_mad, cell_count = robust_stats(cell_codes[base], base_prices, len(cell_ids))
+    bed_median, bed_mad, bed_count = robust_stats(bed_codes[base], base_prices, len(bed_ids))
+    market_median, market_mad, _ = robust_stats(
+        np.zeros(len(base), dtype=np.int64), base_prices, 1)
+
+    cur_cells = cell_codes[:n_current]
+    cur_beds = bed_codes[:n_current]
+    use_cell = cell_count[cur_cells] >= MIN_CELL_SIZE
+    use_beds = ~use_cell & (bed_count[cur_beds] >= MIN_CELL_SIZE)
+
+    median = np.where(use_cell, cell_median[cur_cells],
+                      np.where(use_beds, bed_median[cur_beds], market_median[0]))
+    mad = np.where(use_cell, cell_mad[cur_cells],
+                   np.where(use_beds, bed_mad[cur_beds], market_mad[0]))
+    z = 0.6745 * (prices[:n_current] - median) / mad
+    level = np.where(use_cell, 'cell', np.where(use_beds, 'bedrooms', 'market'))
+
+    return {
+        'price': prices[:n_current],
+        'median': median,
+        'mad': mad,
+        'z': z,
+        'level': level,
+        'cells': list(zip(locations[:n_current], bedrooms[:n_current])),
+    }
+
+
+def classify(price, median, mad, z):
+    """Verdict and suggested price for one scored listing."""
+    if abs(z) <= Z_THRESHOLD:
+        return 'ok', None
+    best = None
+    for verdict, factor in CORRECTIONS:
+        # Only corrections that move the price towards the median
+        if (factor < 1) != (z > 0):
+            continue
+        corrected = price * factor
+        corrected_z = abs(0.6745 * (corrected - median) / mad)
+        if corrected_z <= CORRECTION_Z and (best is None or corrected_z < best[0]):
+            best = (corrected_z, verdict, int(round(corrected)))
+    if best:
+        return best[1], best[2]
+    return ('high' if z > 0 else 'low'), None
+
+
+def filter_outliers(listings, history=(), mode='flag'):
+    """
+    Run the outlier stage over a crawl.
+
+    mode 'flag' keeps every listing and only reports; 'quarantine' removes
+    flagged listings from the kept set. Returns (kept, quarantined, report).
+    """
+    if not listings:
+        return list(listings), [], []
+
+    scores = score_listings(listings, history)
+    flagged_idx = np.nonzero(np.abs(scores['z']) > Z_THRESHOLD)[0]
+
+    report = []
+    for idx in flagged_idx:
+        listing = listings[idx]
+        price, median, mad, z = (scores['price'][idx], scores['median'][idx],
+                                 scores['mad'][idx], scores['z'][idx])
+        verdict, suggested = classify(price, median, mad, z)
+        location, bedrooms = scores['cells'][idx]
+        report.append({
+            'url': _field(listing, 'url'),
+            'title': _field(listing, 'title'),
+            'price': int(price),
+            'location': location,
+            'bedrooms': bedrooms,
+            'baseline': scores['level'][idx].item(),
+            'median': int(round(median)),
+            'mad': int(round(mad)),
+            'z': round(float(z), 2),
+            'verdict': verdict,
+            'suggested_price': suggested,
+        })
+
+    if mode != 'quarantine':
+        return list(listings), [], report
+
+    flagged = set(flagged_idx.tolist())
+    kept = [l for i, l in enumerate(listings) if i not in flagged]
+    quarantined = [listings[i] for i in sorted(flagged)]
+    return kept, quarantined, report
+
+
+def load_history(paths):
+    """Listing dicts from earlier scraper outputs (missing files are skipped)."""
+    history = []
+    for path in paths:
+        data = load_output(path)
+        if data is not None:
+            history.extend(data.get('listings', []))
+    return history
+
+
+def write_report(report, report_path, mode):
+    """Save the flagged listings, grouped by verdict counts."""
+    counts = {}
+    for item in report:
+        counts[item['verdict']] = counts.get(item['verdict'], 0) + 1
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'mode': mode,
+            'threshold': Z_THRESHOLD,
+            'flagged': len(report),
+            'verdicts': counts,
+            'listings': sorted(report, key=lambda r: -abs(r['z'])),
+        }, f, indent=2, ensure_ascii=False)
+    return report_path
+
+
+def run_outlier_stage(listings, output_path, mode='flag', history_paths=(), previous=None):
+    """
+    Outlier stage for a finished crawl, before its outputs are written.
+
+    The previous output at output_path (still on disk) is used as history;
+    pass its listings as previous if the caller already loaded them.
+    Writes <output>.outliers.json and returns the listings to save.
+    """
+    if mode == 'off' or not listings:
+        return listings
+    if previous is None:
+        history = load_history([output_path, *history_paths])
+    else:
+        history = list(previous) + load_history(history_paths)
+    kept, quarantined, report = filter_outliers(listings, history, mode=mode)
+    print_report(report, len(listings))
+    if quarantined:
+        print(f"  Quarantined {len(quarantined)} listings (kept out of the published data)")
+    print(f"✓ Saved {write_report(report, get_report_path(output_path), mode)}")
+    return kept
+
+
+def print_report(report, total):
+    print(f"\n🚩 OUTLIERS: {len(report)} of {total} listings flagged (|z| > {Z_THRESHOLD})")
+    counts = {}
+    for item in report:
+        counts[item['verdict']] = counts.get(item['verdict'], 0) + 1
+    for verdict, count in sorted(counts.items(), key=lambda x: -x[1]):
+        print(f"  {verdict:15s}: {count:4d}")
+    shown = set()
+    for item in sorted(report, key=lambda r: -abs(r['z'])):
+        if len(shown) == 5:
+            break
+        if canonical_url(item['url']) in shown:
+            continue
+        shown.add(canonical_url(item['url']))
+        suggestion = f" -> GH₵{item['suggested_price']:,}" if item['suggested_price'] else ''
+        beds = '?' if item['bedrooms'] is None else item['bedrooms']
+        print(f"    - {item['location']:20s} {beds}BR GH₵{item['price']:,} "
+              f"(median GH₵{item['median']:,}, z={item['z']}) {item['verdict']}{suggestion}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Flag price outliers in scraped listings')
+    parser.add_argument('input', type=str, help='Scraper JSON output')
+    parser.add_argument('--history', action='append', default=[],
+                        help='Earlier scraper outputs to include in the baseline (repeatable)')
+    parser.add_argument('--mode', choices=['flag', 'quarantine'], default='flag')
+    parser.add_argument('--report', type=str,
+                        help='Report path (default: <input>.outliers.json)')
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        scraped = json.load(f)
+    listings = scraped.get('listings', [])
+
+    kept, quarantined, report = filter_outliers(
+        listings, load_history(args.history), mode=args.mode)
+    print_report(report, len(listings))
+
+    report_path = args.report or get_report_path(args.input)
+    write_report(report, report_path, args.mode)
+    print(f"\n✓ Report saved to {report_path}")
@@ -0,0 +1,49 @@
+"""
+Pagination - Detect search pages that run past the last real page
+Some sites answer an out-of-range ?page=N with the last page again, or keep
+padding results with the same featured cards, so "no listings" never comes
+and the crawler pays a load and a politeness delay for every page up to the
+limit. Each page is fingerprinted by a hash of its ordered listing URLs; an
+area stops as soon as a page repeats an earlier fingerprint, or every URL on
+it has already been seen on earlier pages of the same area.
+"""
+
+import hashlib
+
+from listing import canonical_url
+
+
+def page_fingerprint(urls):
+    """Hash of a page's ordered (canonical) listing URLs."""
+    return hashlib.sha1('\n'.join(urls).encode('utf-8')).hexdigest()[:16]
+
+
+class PageFingerprints:
+    def __init__(self):
+        """Pages seen so far in one area."""
+        self.fingerprints = set()
+        self.urls = set()
+
+    def check(self, urls):
+        """
+        Record a page's listing URLs. Returns why the area should stop
+        ('repeat' or 'subset'), or None for a page with something new.
+        Pages without listings are left to the caller's own end check.
+        """
+        urls = [canonical_url(url) for url in urls]
+        if not urls:
+            return None
+        fingerprint = page_fingerprint(urls)
+        if fingerprint in self.fingerprints:
+            return 'repeat'
+        if self.urls.issuperset(urls):
+            return 'subset'
+        self.fingerprints.add(fingerprint)
+        self.urls.update(urls)
+        return None
+
+
+def describe_stop(reason):
+    if reason == 'repeat':
+        return 'same listings as an earlier page'
+    return 'only listings from earlier pages'
@@ -0,0 +1,197 @@
+"""
+Parquet Export - Columnar listing files for analytics
+Writes scraper output as typed, dictionary-encoded Parquet with one row group
+per search area, plus a query helper that pushes filters down to row groups.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for the analytics export
+    pa = None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed (pip install pyarrow)")
+
+
+def get_schema():
+    """Arrow schema for listings (low-cardinality strings are dictionaries)."""
+    _require_pyarrow()
+    dict_string = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('title', pa.string()),
+        ('price', pa.int32()),
+        ('bedrooms', pa.int8()),
+        ('location', dict_string),
+        ('area', dict_string),
+        ('source', dict_string),
+        ('price_period', dict_string),
+        ('property_type', dict_string),
+        ('url', pa.string()),
+        ('scraped_at', pa.timestamp('s')),
+        ('page', pa.int16()),
+    ])
+
+
+def get_parquet_path(output_path):
+    """Get the Parquet sibling path for a JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_suffix('.parquet')
+
+
+def _parse_timestamp(value, fallback):
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return fallback
+
+
+def listings_to_table(listings, scraped_at=None):
+    """Build an Arrow table from listing dicts, sorted by area then price."""
+    _require_pyarrow()
+    fallback = _parse_timestamp(scraped_at, None)
+    ordered = sorted(
+        listings, key=lambda l: (l.get('area') or '', l.get('price') or 0))
+
+    columns = {name: [] for name in get_schema().names}
+    for listing in ordered:
+        for name in columns:
+            if name == 'scraped_at':
+                columns[name].append(
+                    _parse_timestamp(listing.get('scraped_at'), fallback))
+            else:
+                columns[name].append(listing.get(name))
+
+    return pa.Table.from_pydict(columns, schema=get_schema())
+
+
+def write_parquet(data, parquet_path):
+    """Write scraper output to Parquet, one row group per area."""
+    _require_pyarrow()
+    table = listings_to_table(data.get('listings', []), data.get('scraped_at'))
+    metadata = {
+        key: json.dumps(value, ensure_ascii=False)
+        for key, value in data.items() if key != 'listings'
+    }
+    schema = table.schema.with_metadata(metadata)
+
+    with pq.ParquetWriter(parquet_path, schema, compression='zstd') as writer:
+        if table.num_rows == 0:
+            return parquet_path
+        # Rows are sorted by area, so each area is one contiguous slice
+        areas = table.column('area').to_pylist()
+        start = 0
+        for idx in range(1, len(areas) + 1):
+            if idx == len(areas) or areas[idx] != areas[start]:
+                writer.write_table(
+                    table.slice(start, idx - start).replace_schema_metadata(metadata),
+                    row_group_size=idx - start)
+                start = idx
+
+    return parquet_path
+
+
+def build_filters(locations=None, areas=None, bedrooms=None,
+                  min_price=None, max_price=None, sources=None):
+    """Build a pyarrow filter list from simple query arguments."""
+    filters = []
+    if locations:
+        filters.append(('location', 'in', list(locations)))
+    if areas:
+        filters.append(('area', 'in', list(areas)))
+    if sources:
+        filters.append(('source', 'in', list(sources)))
+    if bedrooms is not None:
+        if isinstance(bedrooms, (tuple, list)):
+            low, high = bedrooms
+            filters.append(('bedrooms', '>=', low))
+            filters.append(('bedrooms', '<=', high))
+        else:
+            filters.append(('bedrooms', '==', bedrooms))
+    if min_price is not None:
+        filters.append(('price', '>=', min_price))
+    if max_price is not None:
+        filters.append(('price', '<=', max_price))
+    return filters or None
+
+
+def query_listings(parquet_path, columns=None, **criteria):
+    """
+    Read only matching rows and the requested columns.
+
+    Filters are pushed down, so row groups whose statistics cannot match
+    (e.g. other areas, or all prices above max_price) are never decoded.
+    Example: query_listings(path, locations=['Osu'], bedrooms=2, max_price=8000)
+    """
+    _require_pyarrow()
+    return pq.read_table(
+        parquet_path,
+        columns=columns,
+        filters=build_filters(**criteria),
+    )
+
+
+def row_group_summary(parquet_path):
+    """Return (area, rows, min price, max price) for each row group."""
+    _require_pyarrow()
+    metadata = pq.ParquetFile(parquet_path).metadata
+    price_idx = metadata.schema.names.index('price')
+    area_idx = metadata.schema.names.index('area')
+    summary = []
+    for i in range(metadata.num_row_groups):
+        group = metadata.row_group(i)
+        area_stats = group.column(area_idx).statistics
+        price_stats = group.column(price_idx).statistics
+        summary.append((
+            area_stats.min if area_stats is not None else None,
+            group.num_rows,
+            price_stats.min if price_stats is not None else None,
+            price_stats.max if price_stats is not None else None,
+        ))
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Export or query listings as Parquet')
+    parser.add_argument('input', type=str, help='Scraper JSON output or .parquet file')
+    parser.add_argument('--output', '-o', type=str,
+                        help='Parquet output path (default: <input>.parquet)')
+    parser.add_argument('--location', action='append', help='Filter by location (repeatable)')
+    parser.add_argument('--area', action='append', help='Filter by search area (repeatable)')
+    parser.add_argument('--bedrooms', type=int, help='Filter by bedroom count')
+    parser.add_argument('--max-price', type=int, help='Maximum monthly price')
+    parser.add_argument('--min-price', type=int, help='Minimum monthly price')
+    args = parser.parse_args()
+
+    if args.input.endswith('.parquet'):
+        result = query_listings(
+            args.input,
+            columns=['title', 'price', 'bedrooms', 'location', 'area', 'url'],
+            locations=args.location, areas=args.area, bedrooms=args.bedrooms,
+            min_price=args.min_price, max_price=args.max_price,
+        )
+        prices = pc.min_max(result.column('price')) if result.num_rows else None
+        print(f"Matched {result.num_rows} listings")
+        if prices is not None:
+            print(f"  Price range: GH₵{prices['min'].as_py():,} - GH₵{prices['max'].as_py():,}")
+        for row in result.sort_by('price').slice(0, 10).to_pylist():
+            beds = row['bedrooms'] or '?'
+            print(f"  - {row['location']:20s} | {beds}BR | GH₵{row['price']:,} | {row['title'][:40]}")
+    else:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            scraped = json.load(f)
+        target = args.output or get_parquet_path(args.input)
+        write_parquet(scraped, target)
+        groups = row_group_summary(target)
+        print(f"✓ Wrote {target} ({Path(target).stat().st_size:,} bytes, "
+              f"{len(groups)} row groups)")
@@ -0,0 +1,140 @@
+"""
+Parse Pool - HTML parsing in worker processes, overlapped with fetching
+Parsing a ~300 KB results page (regex scans, BeautifulSoup trees) is pure
+Python, so on the fetch thread it stalls the browser or HTTP session, and in
+threads it is serialized by the GIL. A ParsePool hands raw pages to a
+ProcessPoolExecutor: the fetcher submits a page and moves straight on to the
+next one while parsing runs on the other cores.
+
+Results come back in submission order, so dedup and output order match the
+inline parse exactly. At most max_pending pages are in flight; submitting
+another first waits for the oldest, which bounds memory and keeps a slow
+parser from falling behind unnoticed.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline import PageTask
+
+
+def default_workers():
+    # Leave a core for the fetcher and the browser
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def make_executor(workers):
+    """
+    Worker processes are started lazily, usually after Playwright's threads
+    are running, and forking a threaded process is unsafe: spawn them fresh.
+    """
+    return ProcessPoolExecutor(max_workers=workers,
+                               mp_context=multiprocessing.get_context('spawn'))
+
+
+class ParsePool:
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or default_workers()
+        self.max_pending = max_pending or 2 * self.workers
+        self._executor = make_executor(self.workers)
+        self._pending = deque()   # (tag, future) in submission order
+
+    def submit(self, fn, *args, tag=None):
+        """
+        Queue fn(*args) in a worker process. Returns the (tag, result) pairs
+        that had to be collected to make room, oldest first.
+        """
+        collected = []
+        while len(self._pending) >= self.max_pending:
+            collected.append(self._pop())
+        self._pending.append((tag, self._executor.submit(fn, *args)))
+        return collected
+
+    def ready(self):
+        """Finished results at the head of the queue, without waiting."""
+        collected = []
+        while self._pending and self._pending[0][1].done():
+            collected.append(self._pop())
+        return collected
+
+    def drain(self):
+        """Every outstanding result, waiting as needed."""
+        collected = []
+        while self._pending:
+            collected.append(self._pop())
+        return collected
+
+    def _pop(self):
+        tag, future = self._pending.popleft()
+        try:
+            return tag, future.result()
+        except Exception as e:
+            return tag, e
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# One adapter per worker process, built on first use
+_adapters = {}
+
+
+def parse_page(source, html, page_num, area, url, fetched_at):
+    """Worker-process side of Pipeline's parse stage: adapter.parse on one page."""
+    adapter = _adapters.get(source)
+    if adapter is None:
+        from source_adapters import ADAPTERS
+        adapter = _adapters[source] = ADAPTERS[source]()
+    task = PageTask(source, area, page_num, url, html=html, status=200, fetched_at=fetched_at)
+    return adapter.parse(task, fetched_at)
+
+
+def run_benchmark(html_path, pages=200, workers=None):
+    """Parse one saved Meqasa page many times inline, then through the pool."""
+    import time
+    from meqasa_working_scraper import extract_from_html
+
+    html = open(html_path, 'r', encoding='utf-8').read()
+    workers = workers or default_workers()
+    print("=" * 70)
+    print(f"PARSE POOL BENCHMARK ({pages} x {len(html) / 1024:,.0f} KB page, {workers} processes)")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    inline = [extract_from_html(html, 1, 'Bench', scraped_at=0) for _ in range(pages)]
+    inline_seconds = time.perf_counter() - start
+    print(f"\n  Inline:  {inline_seconds:6.2f}s  ({pages / inline_seconds:,.0f} pages/s)")
+
+    with ParsePool(workers) as pool:
+        pool.submit(extract_from_html, html, 1, 'Bench', 0)   # start the workers
+        pool.drain()
+        start = time.perf_counter()
+        results = []
+        for i in range(pages):
+            results.extend(pool.submit(extract_from_html, html, 1, 'Bench', 0, tag=i))
+        results.extend(pool.drain())
+        pool_seconds = time.perf_counter() - start
+    print(f"  Pool:    {pool_seconds:6.2f}s  ({pages / pool_seconds:,.0f} pages/s, "
+          f"{inline_seconds / pool_seconds:.1f}x)")
+
+    same = [r for _, r in results] == inline
+    print(f"\n  {'✓' if same else '✗'} Pool output {'matches' if same else 'differs from'} inline parsing")
+    return same
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark process-pool parsing on a saved page')
+    parser.add_argument('html', type=str, help='Saved Meqasa search page (e.g. meqasa_page1.html)')
+    parser.add_argument('--pages', type=int, default=200, help='Times to parse it (default: 200)')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: cores - 1)')
+    args = parser.parse_args()
+    exit(0 if run_benchmark(args.html, args.pages, args.workers) else 1)
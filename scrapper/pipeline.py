@@ -0,0 +1,773 @@
+"""
+Scrape Pipeline - Shared engine for all listing sources
+Each site is a small adapter (see source_adapters.py) that declares its search
+pages and a parse function. The engine runs every source the same way:
+
+    fetch -> parse -> normalize -> dedup -> sink
+
+Stages run in their own threads with bounded queues between them, so fetching,
+parsing and writing overlap, and a slow stage applies back-pressure instead of
+buffering the whole crawl. Concurrency, caching, metrics and output formats are
+configured here once for every source.
+"""
+
+import hashlib
+import queue
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from aggregates import update_aggregates
+from changefeed import load_output, record_changes
+from deals import update_deals
+from compact_export import get_compact_path, write_compact
+from listing import Listing, canonical_url, listings_to_dicts, now_epoch
+from listing_io import write_output
+from pagination import PageFingerprints, describe_stop
+from profiling import get_profile_prefix, profile_run, span
+from resilience import CircuitOpen, FetchError, Resilience
+from seen_filter import (DEFAULT_FP_RATE, INCREMENTAL_STOP_PAGES, carry_stopped_areas,
+                         count_unseen, open_seen, update_seen)
+from snapshot import get_snapshot_path, write_snapshot
+
+try:
+    import requests
+except ImportError:  # HTTP sources fall back to urllib
+    requests = None
+
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+OUTPUT_FORMATS = ('json', 'compact', 'snapshot', 'parquet')
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+@dataclass(slots=True)
+class PageTask:
+    source: str
+    area: str | None
+    page_num: int
+    url: str
+    html: str | None = None
+    status: int | None = None
+    error: str | None = None
+    fetch_seconds: float = 0.0
+    fetched_at: int = 0
+
+
+class SourceAdapter:
+    """
+    Base class for a listing source. Subclasses set the class attributes and
+    implement areas() and parse(); everything else has working defaults.
+    """
+    name = None
+    fetch_mode = 'http'      # 'http' or 'browser'
+    max_pages = 10           # pages per area
+    wait_seconds = 0         # settle time after a browser navigation
+    page_delay = 2.0         # politeness delay between pages of one area
+    timeout = 30             # seconds per page load
+    output_file = None
+    listing_selectors = ()   # listing containers, first match wins (health probe)
+    probe_selectors = ()     # extra selectors reported by the health probe
+    feed_urls = ()           # robots.txt / sitemaps / RSS for discovery mode, if any
+    listing_href_re = None   # regex whose group 1 is a listing link (cheap page_urls)
+    site_url = None          # prefix for relative listing links
+
+    def areas(self):
+        """List of (area name, first page URL) to crawl."""
+        raise NotImplementedError
+
+    def page_url(self, first_url, page_num):
+        """URL of page_num for an area (Jiji, Meqasa and Tonaton all use ?page=N)."""
+        if page_num == 1:
+            return first_url
+        separator = '&' if '?' in first_url else '?'
+        return f"{first_url}{separator}page={page_num}"
+
+    def is_last_page(self, task):
+        """Checked right after each fetch so pagination stops without waiting on parse."""
+        if task.status != 200 or not task.html:
+            return True
+        # No listing links at all: the results ran out
+        return self.listing_href_re is not None and not self.listing_href_re.search(task.html)
+
+    def parse(self, task, scraped_at):
+        """Return the Listing records found in a fetched page."""
+        raise NotImplementedError
+
+    def page_urls(self, task):
+        """
+        Ordered listing URLs of a fetched page, used to spot pages that repeat
+        earlier ones. Runs on the fetch thread, so it matches listing_href_re
+        against the raw HTML; only adapters without one pay for a full parse.
+        """
+        if self.listing_href_re is None:
+            return [listing.url for listing in self.parse(task, 0)]
+        urls = {}
+        for href in self.listing_href_re.findall(task.html or ''):
+            urls.setdefault(href if href.startswith('http') else f"{self.site_url}{href}")
+        return list(urls)
+
+    def is_listing_url(self, url):
+        """Whether a (canonical) URL from a feed is a listing worth fetching."""
+        return False
+
+    def parse_detail(self, html, url, scraped_at):
+        """Listing from its detail page (discovery mode); None to skip it."""
+        raise NotImplementedError
+
+    def normalize(self, listing):
+        """Clean up a parsed listing; return None to drop it."""
+        if not listing.url or not listing.price:
+            return None
+        return listing
+
+    def output_path(self):
+        return Path(self.output_file)
+
+    def build_output(self, listings, area_stats):
+        """File-level JSON output for a finished crawl."""
+        return {
+            'scraped_at': datetime.now().isoformat(),
+            'total_listings': len(listings),
+            'source': self.name,
+            'listings': listings_to_dicts(listings),
+        }
+
+
+class HttpFetcher:
+    def __init__(self, headers=None):
+        """Plain HTTP fetcher (one connection pool per fetch worker)."""
+        self.headers = headers or DEFAULT_HEADERS
+        self.session = requests.Session() if requests is not None else None
+
+    def fetch(self, url, timeout, wait_seconds=0):
+        """Return (status, html) for a URL."""
+        if self.session is not None:
+            with span('fetch'):
+                response = self.session.get(url, headers=self.headers, timeout=timeout)
+            with span('content'):
+                if 'charset' not in response.headers.get('content-type', ''):
+                    # requests assumes ISO-8859-1 here, which garbles "GH₵"
+                    response.encoding = 'utf-8'
+                return response.status_code, response.text
+
+        import urllib.error
+        import urllib.request
+        request = urllib.request.Request(url, headers=self.headers)
+        try:
+            with span('fetch'), urllib.request.urlopen(request, timeout=timeout) as response:
+                charset = response.headers.get_content_charset() or 'utf-8'
+                return response.status, response.read().decode(charset, errors='replace')
+        except urllib.error.HTTPError as e:
+            return e.code, ''
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+
+class BrowserFetcher:
+    def __init__(self, headless=True):
+        """Chromium fetcher; the browser is launched on first use in the owning thread."""
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._page = None
+
+    def _start(self):
+        from playwright.sync_api import sync_playwright
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        context = self._browser.new_context(user_agent=USER_AGENT)
+        self._page = context.new_page()
+        self._page.set_viewport_size({"width": 1920, "height": 1080})
+
+    def fetch(self, url, timeout, wait_seconds=0):
+        """Return (status, html) for a URL."""
+        if self._page is None:
+            self._start()
+        with span('fetch'):
+            response = self._page.goto(url, wait_until='domcontentloaded',
+                                       timeout=timeout * 1000)
+        if not response:
+            return None, ''
+        if response.status != 200:
+            return response.status, ''
+        if wait_seconds:
+            with span('wait'):
+                time.sleep(wait_seconds)
+        with span('content'):
+            return response.status, self._page.content()
+
+    def close(self):
+        if self._browser is not None:
+            self._browser.close()
+        if self._playwright is not None:
+            self._playwright.stop()
+
+
+class CachedFetcher:
+    def __init__(self, fetcher, cache_dir, ttl_seconds=6 * 3600):
+        """Serve recent successful pages from disk (for re-runs and development)."""
+        self.fetcher = fetcher
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, url):
+        return self.cache_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.html"
+
+    def fetch(self, url, timeout, wait_seconds=0):
+        path = self._path(url)
+        if path.exists() and time.time() - path.stat().st_mtime < self.ttl_seconds:
+            return 200, path.read_text(encoding='utf-8')
+        status, html = self.fetcher.fetch(url, timeout, wait_seconds)
+        if status == 200 and html:
+            path.write_text(html, encoding='utf-8')
+        return status, html
+
+    def close(self):
+        self.fetcher.close()
+
+
+class PipelineMetrics:
+    def __init__(self):
+        """Thread-safe counters and per-stage busy time."""
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self.seconds = Counter()
+        self.queue_peak = Counter()
+
+    def add(self, stage, seconds, **counts):
+        with self._lock:
+            self.seconds[stage] += seconds
+            self.counts.update(counts)
+
+    def observe_queue(self, name, q):
+        size = q.qsize()
+        with self._lock:
+            if size > self.queue_peak[name]:
+                self.queue_peak[name] = size
+
+    def print_report(self, wall_seconds):
+        print(f"\n{'='*70}")
+        print("PIPELINE METRICS")
+        print(f"{'='*70}")
+        print(f"\n  Wall time: {wall_seconds:.1f}s")
+        print(f"\n  {'stage':12s} {'busy':>10s}")
+        for stage in ('fetch', 'parse', 'normalize', 'dedup', 'sink'):
+            print(f"  {stage:12s} {self.seconds[stage]:>9.2f}s")
+        print()
+        for name in sorted(self.counts):
+            print(f"  {name:20s} {self.counts[name]:>8,}")
+        for name in sorted(self.queue_peak):
+            print(f"  peak {name + ' queue':15s} {self.queue_peak[name]:>8,}")
+
+
+def write_outputs(output_data, output_path, formats=('json', 'compact', 'snapshot')):
+    """Write scraper output in each requested format. Returns written paths."""
+    output_path = Path(output_path)
+    written = []
+    if 'json' in formats:
+        written.append(write_output(output_data, output_path))
+    if 'compact' in formats:
+        written.extend(write_compact(output_data, get_compact_path(output_path)))
+    if 'snapshot' in formats:
+        written.append(write_snapshot(output_data, get_snapshot_path(output_path)))
+    if 'parquet' in formats:
+        from parquet_export import get_parquet_path, write_parquet
+        written.append(write_parquet(output_data, get_parquet_path(output_path)))
+    return written
+
+
+class Pipeline:
+    def __init__(self, adapter, fetch_workers=1, parse_workers=2, queue_size=8,
+                 cache_dir=None, max_pages=None, areas=None, resilience=None, hedge=False,
+                 recorder=None, parse_processes=0, seen=None, incremental=False):
+        """
+        Streaming crawl of one source adapter. With parse_processes, pages
+        are parsed in that many worker processes instead of parser threads.
+        seen is the seen_filter.SeenFilter of earlier runs; with incremental,
+        areas stop after a few pages of nothing but seen listings.
+        """
+        self.adapter = adapter
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = max(1, parse_workers)
+        self.parse_processes = parse_processes
+        self._process_pool = None
+        self.queue_size = queue_size
+        self.cache_dir = cache_dir
+        self.max_pages = max_pages or adapter.max_pages
+        self.areas = areas
+        self.metrics = PipelineMetrics()
+        self.resilience = resilience or Resilience()
+        self.recorder = recorder   # area_overlap.AreaRecorder, when pruning areas
+        self.seen = seen
+        self.incremental = incremental and seen is not None
+        self.card_links = set()    # every listing link fetched, filtered-out ones included
+        self.stopped_areas = set()
+        self.hedge_stats = None
+        if hedge:
+            from hedging import HedgeStats
+            self.hedge_stats = HedgeStats()
+
+        self.listings = []
+        self.area_stats = {}
+
+    def _make_base_fetcher(self):
+        if self.adapter.fetch_mode == 'browser':
+            return BrowserFetcher()
+        return HttpFetcher()
+
+    def _make_fetcher(self):
+        if self.hedge_stats is not None:
+            from hedging import HedgedFetcher
+            fetcher = HedgedFetcher(self._make_base_fetcher, self.hedge_stats)
+        else:
+            fetcher = self._make_base_fetcher()
+        if self.cache_dir:
+            fetcher = CachedFetcher(fetcher, self.cache_dir)
+        return fetcher
+
+    def fetch_area(self, fetcher, area, first_url):
+        """
+        Fetch the pages of one area in order, stopping when pagination ends.
+        Transient errors are retried; a page that still fails is yielded with
+        task.error set and skipped, until the area or host breaker opens.
+        """
+        adapter = self.adapter
+        breaker_area = area or first_url
+        self.resilience.start_area(breaker_area)
+        pages = PageFingerprints()
+        seen_pages = 0
+        for page_num in range(1, self.max_pages + 1):
+            task = PageTask(adapter.name, area, page_num,
+                            adapter.page_url(first_url, page_num))
+            start = time.perf_counter()
+            try:
+                task.status, task.html = self.resilience.call(
+                    task.url, breaker_area,
+                    lambda: fetcher.fetch(task.url, adapter.timeout, adapter.wait_seconds))
+            except CircuitOpen as e:
+                task.error = str(e)
+                self.metrics.add('fetch', 0, pages_refused=1)
+                print(f"  [{area or adapter.name}] page {page_num}: skipped, {e}")
+                yield task
+                return
+            except FetchError as e:
+                task.error = str(e)[:200]
+            if task.error and self.recorder:
+                self.recorder.fail(area or adapter.name)
+            task.fetch_seconds = time.perf_counter() - start
+            task.fetched_at = now_epoch()
+            self.metrics.add('fetch', task.fetch_seconds, pages_fetched=1,
+                             fetch_errors=1 if task.error else 0)
+
+            if task.error is None:
+                last_page = adapter.is_last_page(task)
+                urls = adapter.page_urls(task) if not last_page or self.seen is not None else []
+                stop = None if last_page else pages.check(urls)
+                if stop:
+                    # Past the real last page: don't parse it or fetch the rest
+                    print(f"  [{area or adapter.name}] page {page_num}: "
+                          f"{describe_stop(stop)}, end of results")
+                    self.metrics.add('fetch', 0, overflow_stops=1,
+                                     pages_skipped=self.max_pages - page_num)
+                    return
+                self.card_links.update(urls)
+                if self.incremental and urls:
+                    known = all(self.seen.contains(url) for url in urls)
+                    seen_pages = seen_pages + 1 if known else 0
+                    if seen_pages >= INCREMENTAL_STOP_PAGES and not last_page:
+                        # Still parsed (prices may have moved), but the rest is skipped
+                        print(f"  [{area or adapter.name}] page {page_num}: {seen_pages} "
+                              f"pages of previously seen listings, stopping")
+                        self.metrics.add('fetch', 0, incremental_stops=1,
+                                         pages_skipped=self.max_pages - page_num)
+                        self.stopped_areas.add(area or adapter.name)
+                        if self.recorder:
+                            self.recorder.fail(area or adapter.name)
+                        last_page = True
+            else:
+                print(f"  [{area or adapter.name}] page {page_num}: {task.error}")
+                last_page = self.resilience.area_open(breaker_area)
+            yield task
+
+            if last_page:
+                break
+            with span('wait'):
+                time.sleep(adapter.page_delay)
+
+    def _fetch_worker(self, area_queue, page_queue):
+        """Fetch every page of each area taken from area_queue."""
+        fetcher = self._make_fetcher()
+        try:
+            while True:
+                try:
+                    area, first_url = area_queue.get_nowait()
+                except queue.Empty:
+                    return
+
+                for task in self.fetch_area(fetcher, area, first_url):
+                    if task.status == 200 and task.html:
+                        page_queue.put(task)
+                        self.metrics.observe_queue('page', page_queue)
+        finally:
+            fetcher.close()
+
+    def _parse_worker(self, page_queue, result_queue):
+        """Turn fetched pages into Listing records."""
+        while True:
+            task = page_queue.get()
+            if task is _DONE:
+                return
+            start = time.perf_counter()
+            try:
+                with span('parse'):
+                    listings = self._parse(task)
+            except Exception as e:
+                print(f"  ⚠️  Parse error on {task.url}: {e}")
+                listings = []
+            task.html = None  # drop the page body as soon as it is parsed
+            self.metrics.add('parse', time.perf_counter() - start,
+                             pages_parsed=1, listings_parsed=len(listings))
+            result_queue.put((task, listings))
+            self.metrics.observe_queue('result', result_queue)
+
+    def _parse(self, task):
+        if self._process_pool is None:
+            return self.adapter.parse(task, task.fetched_at)
+        from parse_pool import parse_page
+        # This thread just waits; the GIL-bound work happens in the worker process
+        listings = self._process_pool.submit(parse_page, self.adapter.name, task.html,
+                                             task.page_num, task.area, task.url,
+                                             task.fetched_at).result()
+        for listing in listings:
+            listing.__post_init__()   # unpickled strings are no longer interned
+        return listings
+
+    def _consume(self, result_queue, producers):
+        """Normalize, dedup and collect results (single thread, so no locking)."""
+        seen_urls = set()
+        finished = 0
+        while finished < producers:
+            item = result_queue.get()
+            if item is _DONE:
+                finished += 1
+                continue
+
+            task, listings = item
+            area = task.area or self.adapter.name
+            if self.recorder and listings:
+                self.recorder.record_page(area, [listing.url for listing in listings])
+            with span('dedup'):
+                new_count = self._collect(listings, seen_urls)
+
+            self.area_stats[area] = self.area_stats.get(area, 0) + new_count
+            print(f"  [{area}] page {task.page_num}: +{new_count} new "
+                  f"({len(listings)} parsed, {task.fetch_seconds:.1f}s fetch)")
+
+    def _collect(self, listings, seen_urls):
+        """Normalize and dedup one page of listings; returns how many were new."""
+        new_count = 0
+        for listing in listings:
+            start = time.perf_counter()
+            listing = self.adapter.normalize(listing)
+            normalized = time.perf_counter()
+            self.metrics.add('normalize', normalized - start)
+            if listing is None:
+                self.metrics.add('dedup', 0, dropped=1)
+                continue
+
+            key = canonical_url(listing.url)
+            is_new = key not in seen_urls
+            if is_new:
+                seen_urls.add(key)
+            deduped = time.perf_counter()
+            self.metrics.add('dedup', deduped - normalized,
+                             duplicates=0 if is_new else 1)
+            if not is_new:
+                continue
+
+            self.listings.append(listing)
+            new_count += 1
+            self.metrics.add('sink', time.perf_counter() - deduped, kept=1)
+
+        return new_count
+
+    def run(self):
+        """Crawl all areas; returns the deduplicated Listing records."""
+        area_queue = queue.Queue()
+        areas = self.adapter.areas()
+        if self.areas:
+            wanted = set(self.areas)
+            areas = [a for a in areas if (a[0] or self.adapter.name) in wanted]
+        for area in areas:
+            area_queue.put(area)
+            self.area_stats.setdefault(area[0] or self.adapter.name, 0)
+            if self.recorder:
+                self.recorder.start(area[0] or self.adapter.name)
+
+        page_queue = queue.Queue(maxsize=self.queue_size)
+        result_queue = queue.Queue(maxsize=self.queue_size)
+
+        start = time.time()
+        parse_workers = self.parse_workers
+        if self.parse_processes:
+            from parse_pool import make_executor
+            self._process_pool = make_executor(self.parse_processes)
+            # One feeding thread per process keeps every process busy
+            parse_workers = self.parse_processes
+        fetchers = [
+            threading.Thread(target=self._fetch_worker, args=(area_queue, page_queue),
+                             name=f'fetch-{i}', daemon=True)
+            for i in range(self.fetch_workers)
+        ]
+        parsers = [
+            threading.Thread(target=self._parse_worker, args=(page_queue, result_queue),
+                             name=f'parse-{i}', daemon=True)
+            for i in range(parse_workers)
+        ]
+        for thread in fetchers + parsers:
+            thread.start()
+
+        def close_stages():
+            for thread in fetchers:
+                thread.join()
+            for _ in parsers:
+                page_queue.put(_DONE)
+            for thread in parsers:
+                thread.join()
+            for _ in parsers:
+                result_queue.put(_DONE)
+
+        closer = threading.Thread(target=close_stages, name='closer', daemon=True)
+        closer.start()
+        # Results are consumed in the main thread while the stages run
+        self._consume(result_queue, producers=len(parsers))
+        closer.join()
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+
+        self.wall_seconds = time.time() - start
+        return self.listings
+
+    def filter_outliers(self, output_path=None, mode='flag', previous_output=None):
+        """Outlier stage: flag or quarantine mispriced listings before saving."""
+        from outliers import run_outlier_stage
+
+        output_path = output_path or self.adapter.output_path()
+        previous = previous_output.get('listings', []) if previous_output else None
+        start = time.perf_counter()
+        with span('outliers'):
+            self.listings = run_outlier_stage(self.listings, output_path, mode,
+                                              previous=previous)
+        self.metrics.add('outliers', time.perf_counter() - start, listings=len(self.listings))
+        return self.listings
+
+    def save(self, output_path=None, formats=('json', 'compact', 'snapshot'),
+             previous_output=None):
+        """
+        Write the crawl in every requested output format. previous_output is
+        the output still at output_path, if the caller already loaded it.
+        """
+        output_path = output_path or self.adapter.output_path()
+        output_data = self.adapter.build_output(self.listings, self.area_stats)
+        if 'json' in formats:
+            if previous_output is None:
+                previous_output = load_output(output_path)
+            previous = previous_output.get('listings', []) if previous_output else None
+            changeset = record_changes(output_data, output_path, previous_output)
+            update_aggregates(changeset, output_data['listings'], output_path, previous)
+            update_deals(changeset, output_data['listings'], output_path, previous)
+        start = time.perf_counter()
+        with span('write'):
+            written = write_outputs(output_data, output_path, formats)
+        self.metrics.add('sink', time.perf_counter() - start)
+        if self.seen is not None and 'json' in formats:
+            links = self.card_links | {listing.url for listing in self.listings}
+            update_seen(self.seen, links, output_path)
+        return written
+
+
+def print_listing_stats(listings, area_stats=None):
+    """Price, location and bedroom summary for a crawl (plus listings per area)."""
+    if not listings:
+        return
+    prices = sorted(l.price for l in listings)
+    print(f"\n💰 MONTHLY RENT PRICES")
+    print(f"  Total listings:  {len(listings)}")
+    print(f"  Average:         GH₵{sum(prices)/len(prices):,.0f}/month")
+    print(f"  Median:          GH₵{prices[len(prices)//2]:,}/month")
+    print(f"  Min:             GH₵{prices[0]:,}/month")
+    print(f"  Max:             GH₵{prices[-1]:,}/month")
+
+    locations = Counter(l.location for l in listings)
+    print(f"\n📍 TOP 15 LOCATIONS (out of {len(locations)} unique)")
+    for loc, count in locations.most_common(15):
+        print(f"  {loc:25s}: {count:4d} ({count / len(listings) * 100:4.1f}%)")
+
+    bed_counts = Counter(l.bedrooms for l in listings if l.bedrooms)
+    if bed_counts:
+        print(f"\n🛏️  BEDROOMS")
+        for beds in sorted(bed_counts):
+            print(f"  {beds} BR: {bed_counts[beds]:4d}")
+
+    if area_stats and len(area_stats) > 1:
+        print(f"\n📊 AREAS BY LISTING COUNT (Top 20)")
+        for area, count in sorted(area_stats.items(), key=lambda x: x[1], reverse=True)[:20]:
+            if count > 0:
+                print(f"  {area:25s}: {count:4d} {'█' * min(int(count / 5), 30)}")
+
+
+def run_source(adapter, output_path=None, pages=None, areas=None, fetch_workers=1,
+               parse_workers=2, parse_processes=0, queue_size=8, cache_dir=None,
+               formats=('json', 'compact', 'snapshot'), outliers='flag', profile_prefix=None,
+               hedge=False, prune_areas=False, health_check=False, incremental=False,
+               seen_fp_rate=None):
+    """
+    One full scraper run of a source: optional health check, crawl, carry-over
+    of areas that were skipped, outlier stage, change feed/aggregates/deals and
+    every output format. Every scraper CLI goes through here. Returns the exit
+    status: 0 on success, 1 if nothing was scraped, 2 if the site failed its
+    health check.
+    """
+    if prune_areas and areas:
+        raise ValueError('prune_areas picks the areas itself')
+
+    if health_check:
+        from health import apply_verdict, print_health_report, run_health_check
+        report = run_health_check([adapter])
+        print_health_report(report)
+        if not apply_verdict(adapter, report):
+            print(f"\n❌ {adapter.name} failed its health check, not crawling")
+            return 2
+        print(f"\n→ Crawling {adapter.name} over {adapter.fetch_mode}\n")
+
+    # Every listing URL earlier runs saw (Bloom filter + exact store, mmapped)
+    output_path = output_path or adapter.output_path()
+    previous_output = load_output(output_path)
+    seen = open_seen(output_path, seen_fp_rate, previous_output)
+
+    recorder = None
+    if prune_areas:
+        from area_overlap import AreaRecorder, carry_forward, finish_run, plan_run
+        recorder = AreaRecorder()
+        coverage, areas, full_sweep = plan_run(
+            output_path, [name or adapter.name for name, _ in adapter.areas()])
+    pipeline = Pipeline(adapter, fetch_workers=fetch_workers, parse_workers=parse_workers,
+                        queue_size=queue_size, cache_dir=cache_dir, max_pages=pages,
+                        areas=areas, hedge=hedge, recorder=recorder,
+                        parse_processes=parse_processes, seen=seen, incremental=incremental)
+
+    print("=" * 70)
+    print(f"{adapter.name.upper()} PIPELINE")
+    print("=" * 70)
+    with profile_run(profile_prefix):
+        listings = pipeline.run()
+
+        if not listings:
+            print("\n❌ No listings extracted!")
+            return 1
+        print(f"\n🆕 {count_unseen(seen, listings)} listings never seen in earlier runs")
+
+        if prune_areas:
+            if not full_sweep:
+                # Listings only the skipped areas return weren't removed, just not looked for
+                crawled = set(areas) - recorder.failed
+                found = {canonical_url(l.url) for l in listings}
+                carried = carry_forward(previous_output, found, coverage, crawled)
+                pipeline.listings.extend(Listing.from_dict(l) for l in carried)
+                print(f"Carried over {len(carried)} listings only skipped areas return")
+            finish_run(coverage, recorder, full_sweep, output_path)
+
+        if pipeline.stopped_areas:
+            # Listings past where an incremental run stopped weren't looked for
+            found = {canonical_url(l.url) for l in pipeline.listings}
+            carried = carry_stopped_areas(previous_output, found, pipeline.stopped_areas)
+            pipeline.listings.extend(Listing.from_dict(l) for l in carried)
+            print(f"Carried over {len(carried)} listings from pages incremental stops skipped")
+
+        listings = pipeline.filter_outliers(output_path, outliers, previous_output)
+
+        for path in pipeline.save(output_path, formats, previous_output):
+            print(f"✓ Saved {path}")
+
+    print_listing_stats(listings, pipeline.area_stats)
+    pipeline.metrics.print_report(pipeline.wall_seconds)
+    pipeline.resilience.print_report()
+    seen.print_report()
+    if pipeline.hedge_stats is not None:
+        pipeline.hedge_stats.print_report()
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+    from source_adapters import ADAPTERS
+
+    parser = argparse.ArgumentParser(description='Run a source through the shared scrape pipeline')
+    parser.add_argument('source', choices=sorted(ADAPTERS), help='Source to crawl')
+    parser.add_argument('--output', '-o', type=str, help='Custom output path')
+    parser.add_argument('--pages', '-p', type=int, help='Max pages per area')
+    parser.add_argument('--area', action='append', help='Only crawl these areas (repeatable)')
+    parser.add_argument('--fetch-workers', type=int, default=1,
+                        help='Concurrent fetchers (each with its own browser/session)')
+    parser.add_argument('--parse-workers', type=int, default=2, help='Parser threads')
+    parser.add_argument('--parse-processes', type=int, default=0,
+                        help='Parse in this many worker processes instead of threads '
+                             '(uses every core; 0 = threads)')
+    parser.add_argument('--queue-size', type=int, default=8, help='Bound on each stage queue')
+    parser.add_argument('--cache-dir', type=str, help='Cache fetched pages here')
+    parser.add_argument('--formats', type=str, default='json,compact,snapshot',
+                        help=f"Comma-separated output formats from {','.join(OUTPUT_FORMATS)}")
+    parser.add_argument('--outliers', choices=['off', 'flag', 'quarantine'], default='flag',
+                        help='Price outlier handling (default: flag, report only)')
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='PREFIX',
+                        help='Profile the run; writes PREFIX.collapsed and PREFIX.stages.txt '
+                             '(default prefix: profiles/<source>-<time>)')
+    parser.add_argument('--hedge', action='store_true',
+                        help='Re-request pages still loading after the run\'s p95 latency '
+                             '(at most 5%% extra requests)')
+    parser.add_argument('--prune-areas', action='store_true',
+                        help='Skip areas other areas already cover (full sweep every few '
+                             'runs); history in <output>.areas.json')
+    parser.add_argument('--health-check', action='store_true',
+                        help='Probe the site first; stop if it is down, and crawl over '
+                             'plain HTTP when that works')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'Stop an area after {INCREMENTAL_STOP_PAGES} pages of listings '
+                             'seen in earlier runs (history in <output>.seen.bin)')
+    parser.add_argument('--seen-fp-rate', type=float,
+                        help=f'False-positive rate of the seen-URL Bloom filter '
+                             f'(default: {DEFAULT_FP_RATE})')
+    args = parser.parse_args()
+    if args.prune_areas and args.area:
+        parser.error('--prune-areas picks the areas itself; drop --area')
+
+    adapter = ADAPTERS[args.source]()
+    profile_prefix = None
+    if args.profile is not None:
+        profile_prefix = args.profile or get_profile_prefix(adapter.name)
+
+    exit(run_source(adapter, output_path=args.output, pages=args.pages, areas=args.area,
+                    fetch_workers=args.fetch_workers, parse_workers=args.parse_workers,
+                    parse_processes=args.parse_processes, queue_size=args.queue_size,
+                    cache_dir=args.cache_dir,
+                    formats=[f.strip() for f in args.formats.split(',') if f.strip()],
+                    outliers=args.outliers, profile_prefix=profile_prefix, hedge=args.hedge,
+                    prune_areas=args.prune_areas, health_check=args.health_check,
+                    incremental=args.incremental, seen_fp_rate=args.seen_fp_rate))
@@ -0,0 +1,186 @@
+"""
+Scrape Profiler - Per-stage timing spans and flame data for scrape runs
+With --profile, a scraper run is wrapped in a sampling profiler: a background
+thread snapshots every thread's Python stack every few milliseconds, tagged
+with the stage the thread is in (fetch, wait, content, parse, dedup, write...).
+The run produces a collapsed-stack file for flamegraph.pl / speedscope and a
+per-stage time breakdown, so it is clear whether a slow night was spent in
+Chromium navigation, page.content(), regex parsing or sleeps.
+
+Without --profile, span() is a no-op context manager.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+
+# Stages in report order; anything else is listed after these
+STAGES = ['fetch', 'wait', 'content', 'parse', 'dedup', 'outliers', 'write']
+
+DEFAULT_INTERVAL = 0.005
+
+_active = None
+
+
+def span(stage):
+    """Time a block as one stage of the run (no-op unless profiling)."""
+    if _active is None:
+        return nullcontext()
+    return _active.span(stage)
+
+
+def get_profile_prefix(name):
+    """Default output prefix for a profiled run, e.g. profiles/meqasa-20250101-0300."""
+    return Path('profiles') / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RunProfiler:
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        """Sampling profiler plus stage spans for every thread of a run."""
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stage_stacks = {}  # thread id -> list of open stages
+        self.stage_seconds = Counter()
+        self.stage_calls = Counter()
+        self.samples = Counter()
+        self.sample_count = 0
+        self.wall_seconds = 0.0
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started = None
+
+    @contextmanager
+    def span(self, stage):
+        stack = self._stage_stacks.setdefault(threading.get_ident(), [])
+        stack.append(stage)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            # Nested spans (e.g. wait inside fetch) are only charged to the inner stage
+            with self._lock:
+                self.stage_seconds[stage] += elapsed
+                self.stage_calls[stage] += 1
+                if stack:
+                    self.stage_seconds[stack[-1]] -= elapsed
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            frames.reverse()
+            stages = list(self._stage_stacks.get(thread_id, ())) or ['-']
+            thread_name = names.get(thread_id, 'thread')
+            key = ';'.join([thread_name, *(f"[{s}]" for s in stages), *frames])
+            self.samples[key] += 1
+        self.sample_count += 1
+
+    def _run_sampler(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        global _active
+        _active = self
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run_sampler, name='profiler', daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        global _active
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.wall_seconds = time.perf_counter() - self._started
+        _active = None
+        return self
+
+    def stage_samples(self):
+        """Sample counts per innermost stage (busy time as seen by the sampler)."""
+        counts = Counter()
+        for key, count in self.samples.items():
+            stages = [part[1:-1] for part in key.split(';') if part.startswith('[')]
+            counts[stages[-1] if stages else '-'] += count
+        return counts
+
+    def breakdown(self):
+        """Rows of (stage, calls, seconds, share of wall time, samples)."""
+        sampled = self.stage_samples()
+        order = STAGES + sorted(set(self.stage_seconds) - set(STAGES))
+        rows = []
+        for stage in order:
+            if not self.stage_calls[stage]:
+                continue
+            seconds = self.stage_seconds[stage]
+            rows.append((stage, self.stage_calls[stage], seconds,
+                         seconds / self.wall_seconds if self.wall_seconds else 0.0,
+                         sampled[stage]))
+        return rows
+
+    def format_table(self):
+        lines = [
+            f"Wall time: {self.wall_seconds:.2f}s, {self.sample_count:,} samples "
+            f"every {self.interval * 1000:.0f}ms",
+            "",
+            f"{'stage':10s} {'calls':>7s} {'total':>10s} {'avg':>10s} {'% wall':>7s} {'samples':>8s}",
+        ]
+        for stage, calls, seconds, share, samples in self.breakdown():
+            lines.append(f"{stage:10s} {calls:>7,} {seconds:>9.2f}s "
+                         f"{seconds / calls * 1000:>8.1f}ms {share * 100:>6.1f}% {samples:>8,}")
+        lines.append("")
+        lines.append("Stage times are summed over threads, so they can exceed wall time.")
+        return '\n'.join(lines)
+
+    def write(self, prefix):
+        """Write <prefix>.collapsed (flamegraph input) and <prefix>.stages.txt."""
+        prefix = Path(prefix)
+        prefix.parent.mkdir(parents=True, exist_ok=True)
+        collapsed_path = prefix.with_name(prefix.name + '.collapsed')
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            for key, count in sorted(self.samples.items()):
+                f.write(f"{key} {count}\n")
+        table_path = prefix.with_name(prefix.name + '.stages.txt')
+        table_path.write_text(self.format_table() + '\n', encoding='utf-8')
+        return [collapsed_path, table_path]
+
+    def print_report(self):
+        print(f"\n{'='*70}")
+        print("PROFILE")
+        print(f"{'='*70}")
+        print(self.format_table())
+
+
+@contextmanager
+def profile_run(prefix, interval=DEFAULT_INTERVAL):
+    """Profile the enclosed run when prefix is set; writes and prints the results."""
+    if not prefix:
+        yield None
+        return
+    profiler = RunProfiler(interval).start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        profiler.print_report()
+        for path in profiler.write(prefix):
+            print(f"✓ Saved {path}")
+        print("  Render with: flamegraph.pl <file>.collapsed > flame.svg "
+              "(or open it in speedscope.app)")
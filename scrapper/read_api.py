@@ -0,0 +1,326 @@
+"""
+Read API - Local HTTP service over the scraped dataset
+Serves location stats, price estimates, recommendations and filtered listing
+search without shipping every listing to the browser. The dataset is loaded
+once into memory with its aggregates precomputed (location stats, the query
+index), responses go through an LRU cache, and a new scrape is picked up
+automatically when the data file changes on disk.
+
+Endpoints (all GET, JSON):
+    /health
+    /stats                          ?location=
+    /estimate                       ?location=&bedrooms=
+    /recommendations                ?budget=&location=&bedrooms=
+    /listings                       ?location=(repeatable)&min_bedrooms=&max_bedrooms=
+                                    &min_price=&max_price=&limit=
+    /deals                          ?location=&bedrooms=&limit=
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+from aiohttp import web
+
+from deals import DealIndex
+from listing_index import ListingIndex
+from market_stats import estimate_price, location_stats
+from recommender import RecommendationEngine
+
+
+DEFAULT_DATA = Path(__file__).parent.parent / 'public' / 'meqasa_data.json'
+
+CACHE_SIZE = 2048
+RELOAD_INTERVAL = 5.0
+MAX_LIMIT = 500
+
+
+class Dataset:
+    def __init__(self, path):
+        """One immutable load of the data file with its aggregates precomputed."""
+        self.path = Path(path)
+        self.version = os.stat(self.path).st_mtime_ns
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.scraped_at = data.get('scraped_at')
+        self.listings = [l for l in data.get('listings', []) if l.get('price')]
+        self.loaded_at = time.time()
+
+        self.stats = location_stats(self.listings)
+        self.stats_by_location = {s['location']: s for s in self.stats}
+        # Case-insensitive fallback keeps the busiest spelling (stats are sorted by count)
+        for s in self.stats:
+            self.stats_by_location.setdefault(s['location'].lower(), s)
+        self.index = ListingIndex.build(self.listings)
+        self.recommender = RecommendationEngine(self.stats)
+        self.deals = DealIndex.build(self.listings)
+        # Per-dataset memo: the estimate for a cell never changes until the next load
+        self.estimate = lru_cache(maxsize=4096)(self._estimate)
+
+    def _estimate(self, location, bedrooms):
+        return estimate_price(location, bedrooms, self.listings)
+
+    def recommendations(self, budget, location, bedrooms):
+        return self.recommender.recommend(budget, location, bedrooms)
+
+    def search(self, limit, **criteria):
+        return [self.listings[row_id] for _, row_id in self.index.query(limit=limit, **criteria)]
+
+
+class ResponseCache:
+    def __init__(self, maxsize=CACHE_SIZE):
+        """LRU of encoded response bodies keyed by dataset version and request."""
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ApiState:
+    def __init__(self, dataset, cache, reload_interval):
+        """Mutable server state (the app mapping itself is frozen once started)."""
+        self.dataset = dataset
+        self.cache = cache
+        self.reload_interval = reload_interval
+        self.reloads = 0
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _int_param(query, name, required=False, default=None, minimum=None):
+    value = query.get(name)
+    if value is None or value == '':
+        if required:
+            raise BadRequest(f"missing parameter: {name}")
+        return default
+    try:
+        number = int(float(value))
+    except (ValueError, OverflowError):  # 'abc', or inf/nan
+        raise BadRequest(f"{name} must be a number")
+    if minimum is not None and number < minimum:
+        raise BadRequest(f"{name} must be at least {minimum}")
+    return number
+
+
+def _float_param(query, name):
+    value = query.get(name)
+    if not value:
+        raise BadRequest(f"missing parameter: {name}")
+    try:
+        number = float(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be a number")
+    if not math.isfinite(number):
+        raise BadRequest(f"{name} must be a number")
+    return number
+
+
+def _location_param(query):
+    location = query.get('location', '').strip()
+    if not location:
+        raise BadRequest("missing parameter: location")
+    return location
+
+
+# -- handlers: (dataset, query) -> (status, payload) ---------------------------
+
+def handle_stats(dataset, query):
+    location = query.get('location', '').strip()
+    if not location:
+        return 200, {'scraped_at': dataset.scraped_at, 'locations': dataset.stats}
+    stats = (dataset.stats_by_location.get(location)
+             or dataset.stats_by_location.get(location.lower()))
+    if stats is None:
+        return 404, {'error': f"unknown location: {location}"}
+    return 200, stats
+
+
+def handle_estimate(dataset, query):
+    location = _location_param(query)
+    bedrooms = _int_param(query, 'bedrooms', required=True)
+    estimate = dataset.estimate(location, bedrooms)
+    if estimate is None:
+        return 404, {'error': f"no data for {location}"}
+    return 200, estimate
+
+
+def handle_recommendations(dataset, query):
+    budget = _float_param(query, 'budget')
+    if budget.is_integer():
+        budget = int(budget)
+    location = _location_param(query)
+    bedrooms = _int_param(query, 'bedrooms', required=True)
+    return 200, {'recommendations': dataset.recommendations(budget, location, bedrooms)}
+
+
+def handle_listings(dataset, query):
+    locations = [l for l in query.getall('location', []) if l.strip()] or None
+    limit = min(_int_param(query, 'limit', default=50, minimum=1), MAX_LIMIT)
+    listings = dataset.search(
+        limit,
+        locations=locations,
+        min_bedrooms=_int_param(query, 'min_bedrooms'),
+        max_bedrooms=_int_param(query, 'max_bedrooms'),
+        min_price=_int_param(query, 'min_price'),
+        max_price=_int_param(query, 'max_price'),
+    )
+    return 200, {'count': len(listings), 'listings': listings}
+
+
+def handle_deals(dataset, query):
+    limit = min(_int_param(query, 'limit', default=10, minimum=1), dataset.deals.top_n)
+    bedrooms = _int_param(query, 'bedrooms')
+    location = query.get('location', '').strip()
+    if location:
+        if bedrooms is None:
+            raise BadRequest("location needs bedrooms")
+        deals = dataset.deals.top(location, bedrooms, limit)
+    else:
+        deals = dataset.deals.best(limit, bedrooms)
+    return 200, {'count': len(deals), 'deals': deals}
+
+
+ROUTES = {
+    '/stats': handle_stats,
+    '/estimate': handle_estimate,
+    '/recommendations': handle_recommendations,
+    '/listings': handle_listings,
+    '/deals': handle_deals,
+}
+
+
+# -- app -----------------------------------------------------------------------
+
+def _json_response(status, body, cache_state):
+    return web.Response(body=body, status=status, content_type='application/json',
+                        headers={'X-Cache': cache_state})
+
+
+def make_handler(route):
+    async def handler(request):
+        state = request.app['state']
+        dataset = state.dataset
+        key = (dataset.version, request.path_qs)
+        cache = state.cache
+        cached = cache.get(key)
+        if cached is not None:
+            status, body = cached
+            return _json_response(status, body, 'hit')
+
+        try:
+            status, payload = route(dataset, request.query)
+        except BadRequest as e:
+            status, payload = 400, {'error': str(e)}
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        if status != 400:
+            cache.put(key, (status, body))
+        return _json_response(status, body, 'miss')
+    return handler
+
+
+async def health(request):
+    state = request.app['state']
+    dataset = state.dataset
+    cache = state.cache
+    return web.json_response({
+        'status': 'ok',
+        'data': str(dataset.path),
+        'scraped_at': dataset.scraped_at,
+        'listings': len(dataset.listings),
+        'locations': len(dataset.stats),
+        'loaded_at': dataset.loaded_at,
+        'reloads': state.reloads,
+        'cache_entries': len(cache),
+        'cache_hits': cache.hits,
+        'cache_misses': cache.misses,
+    })
+
+
+async def watch_data(state):
+    """Swap in a fresh Dataset whenever the data file's mtime changes."""
+    while True:
+        await asyncio.sleep(state.reload_interval)
+        dataset = state.dataset
+        try:
+            version = os.stat(dataset.path).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        if version == dataset.version:
+            continue
+        try:
+            # Parse off the event loop; requests keep using the old dataset meanwhile
+            fresh = await asyncio.to_thread(Dataset, dataset.path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Reload failed, keeping previous data: {e}")
+            continue
+        state.dataset = fresh
+        state.cache.clear()
+        state.reloads += 1
+        print(f"↻ Reloaded {len(fresh.listings)} listings (scraped {fresh.scraped_at})")
+
+
+async def _start_watcher(app):
+    app['watcher'] = asyncio.create_task(watch_data(app['state']))
+
+
+async def _stop_watcher(app):
+    app['watcher'].cancel()
+
+
+def create_app(data_path=DEFAULT_DATA, cache_size=CACHE_SIZE, reload_interval=RELOAD_INTERVAL):
+    app = web.Application()
+    app['state'] = ApiState(Dataset(data_path), ResponseCache(cache_size), reload_interval)
+    app.router.add_get('/health', health)
+    for path, route in ROUTES.items():
+        app.router.add_get(path, make_handler(route))
+    if reload_interval:
+        app.on_startup.append(_start_watcher)
+        app.on_cleanup.append(_stop_watcher)
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Serve rental stats over HTTP')
+    parser.add_argument('--data', type=str, default=str(DEFAULT_DATA),
+                        help='Scraper JSON output to serve (default: public/meqasa_data.json)')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE,
+                        help=f'Cached responses (default: {CACHE_SIZE})')
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL,
+                        help='Seconds between data file checks, 0 to disable (default: 5)')
+    args = parser.parse_args()
+
+    app = create_app(args.data, args.cache_size, args.reload_interval)
+    dataset = app['state'].dataset
+    print(f"Serving {len(dataset.listings)} listings from {dataset.path}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
@@ -0,0 +1,335 @@
+"""
+Recommender - Vectorized port of getRecommendations (lib/recommendations.ts)
+getRecommendations rebuilds the location stats on every call and makes four
+filter/map/sort passes over every location. This engine builds a location x
+bedroom price matrix once per dataset, so answering the four recommendation
+types (cheaper alternatives, affordable upgrades, best deals, budget stretch)
+is a few masked NumPy operations. It can answer a single query or a whole
+batch at once. The rules and tie-breaking match the TypeScript exactly.
+
+--check compares the engine with market_stats.get_recommendations, the Python
+port of the TypeScript, so it needs nothing but Python. --check-ts compares it
+with lib/recommendations.ts itself, run under node by ts_recommendations.mjs
+(needs node and the repo's node_modules).
+"""
+
+import json
+import random
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+import numpy as np
+
+from market_stats import get_recommendations, js_round, location_stats, to_locale_string
+
+
+# priceByBedroom only covers 1-5 bedrooms; column 0 stays empty and absorbs
+# every other bedroom count, which the TypeScript treats as "no price"
+BEDROOM_COLUMNS = 6
+
+# How many of each type getRecommendations keeps
+LIMITS = {
+    'cheaper_alternative': 3,
+    'affordable_upgrade': 2,
+    'best_deal': 2,
+    'budget_stretch': 2,
+}
+
+# Queries evaluated together in one (queries x locations) block
+BATCH_CHUNK = 4096
+
+# Node runner for lib/recommendations.ts
+TS_RUNNER = Path(__file__).with_name('ts_recommendations.mjs')
+
+
+def _bedroom_column(bedrooms):
+    return bedrooms if 1 <= bedrooms <= 5 else 0
+
+
+def _top_k(keys, valid, k):
+    """Column indices of the k smallest valid keys per row, stable like Array.sort."""
+    keys = np.where(valid, keys, np.inf)
+    k = min(k, keys.shape[1])
+    order = np.argsort(keys, axis=1, kind='stable')[:, :k]
+    return order, np.take_along_axis(valid, order, axis=1)
+
+
+class RecommendationEngine:
+    def __init__(self, stats):
+        """Precompute price matrices from location_stats() output."""
+        self.stats = stats
+        self.locations = [s['location'] for s in stats]
+        self.location_ids = {name: i for i, name in enumerate(self.locations)}
+        self.counts = np.array([s['count'] for s in stats], dtype=np.int64)
+        self.average = np.array([s['averagePrice'] for s in stats], dtype=np.float64)
+
+        # bedroom_price[loc, beds]: average price for that bedroom count, 0 if none
+        self.bedroom_price = np.zeros((len(stats), BEDROOM_COLUMNS), dtype=np.float64)
+        for i, s in enumerate(stats):
+            for beds, price in s['priceByBedroom'].items():
+                self.bedroom_price[i, int(beds)] = price
+        # priceByBedroom[bedrooms] || averagePrice
+        self.price_or_average = np.where(self.bedroom_price > 0, self.bedroom_price,
+                                         self.average[:, None])
+        self.price_or_average[:, 0] = self.average
+
+        # Market average per bedroom count, summed in stats order like reduce()
+        self.market_average = np.zeros(BEDROOM_COLUMNS)
+        for beds in range(1, BEDROOM_COLUMNS):
+            prices = [p for p in self.bedroom_price[:, beds].tolist() if p > 0]
+            total = 0
+            for price in prices:
+                total += price
+            self.market_average[beds] = total / len(prices) if prices else 0
+
+    @classmethod
+    def from_listings(cls, listings):
+        return cls(location_stats(listings))
+
+    def recommend(self, budget, preferred_location, bedrooms):
+        """Same result as get_recommendations(budget, preferred_location, bedrooms)."""
+        return self.recommend_batch([(budget, preferred_location, bedrooms)])[0]
+
+    def recommend_batch(self, queries):
+        """Recommendations for many (budget, location, bedrooms) queries."""
+        results = []
+        for start in range(0, len(queries), BATCH_CHUNK):
+            results.extend(self._recommend_chunk(queries[start:start + BATCH_CHUNK]))
+        return results
+
+    def _recommend_chunk(self, queries):
+        n_locations = len(self.locations)
+        if not queries:
+            return []
+        if not n_locations:
+            return [[] for _ in queries]
+
+        budgets = np.array([float(q[0]) for q in queries])
+        preferred = np.array([self.location_ids.get(q[1], -1) for q in queries])
+        bedrooms = [q[2] for q in queries]
+        columns = np.array([_bedroom_column(b) for b in bedrooms])
+        upgrade_columns = np.array([_bedroom_column(b + 1) if b < 5 else 0 for b in bedrooms])
+
+        # (queries, locations) blocks
+        price = self.price_or_average[:, columns].T
+        bedroom_price = self.bedroom_price[:, columns].T
+        upgrade_price = self.bedroom_price[:, upgrade_columns].T
+        other = np.arange(n_locations)[None, :] != preferred[:, None]
+
+        # Preferred location's price, or the budget when it has none
+        current = np.where(preferred >= 0, self.price_or_average[preferred, columns], 0.0)
+        current = np.where(current != 0, current, budgets)
+        market = self.market_average[columns]
+
+        b = budgets[:, None]
+        savings = current[:, None] - price
+        cheaper = _top_k(-savings, (price > 0) & (price < current[:, None] * 0.85) & other,
+                         LIMITS['cheaper_alternative'])
+        upgrades = _top_k(upgrade_price, (upgrade_price > 0) & (upgrade_price <= b * 1.1),
+                          LIMITS['affordable_upgrade'])
+        deals = _top_k(bedroom_price,
+                       (market[:, None] > 0) & (bedroom_price > 0)
+                       & (bedroom_price < market[:, None] * 0.85) & (bedroom_price <= b) & other,
+                       LIMITS['best_deal'])
+        stretch = _top_k(price, (price > b) & (price <= b * 1.15) & other,
+                         LIMITS['budget_stretch'])
+
+        results = []
+        for q, (budget, preferred_location, beds) in enumerate(queries):
+            recommendations = []
+            cur = float(current[q])
+
+            for i in self._picked(cheaper, q):
+                p = float(price[q, i])
+                recommendations.append({
+                    'type': 'cheaper_alternative',
+                    'location': self.locations[i],
+                    'price': p,
+                    'bedrooms': beds,
+                    'savings': cur - p,
+                    'reason': f"Save GH₵{to_locale_string(cur - p)}/month vs {preferred_location}",
+                    'confidence': self._count_confidence(i),
+                })
+
+            if beds < 5:
+                for i in self._picked(upgrades, q):
+                    p = float(upgrade_price[q, i])
+                    recommendations.append({
+                        'type': 'affordable_upgrade',
+                        'location': self.locations[i],
+                        'price': p,
+                        'bedrooms': beds + 1,
+                        'reason': f"Get {beds + 1} bedrooms for just GH₵{to_locale_string(p)}/month",
+                        'confidence': self._count_confidence(i),
+                    })
+
+            m = float(market[q])
+            for i in self._picked(deals, q):
+                p = float(bedroom_price[q, i])
+                recommendations.append({
+                    'type': 'best_deal',
+                    'location': self.locations[i],
+                    'price': p,
+                    'bedrooms': beds,
+                    'reason': f"{js_round((m - p) / m * 100)}% below market avg for {beds}BR",
+                    'confidence': 'high' if self.counts[i] >= 5 else 'medium',
+                })
+
+            for i in self._picked(stretch, q):
+                p = float(price[q, i])
+                recommendations.append({
+                    'type': 'budget_stretch',
+                    'location': self.locations[i],
+                    'price': p,
+                    'bedrooms': beds,
+                    'reason': f"Premium area for GH₵{to_locale_string(p - budget)} more/month",
+                    'confidence': 'high' if self.counts[i] >= 5 else 'medium',
+                })
+            results.append(recommendations)
+        return results
+
+    @staticmethod
+    def _picked(top, row):
+        order, valid = top
+        return order[row][valid[row]].tolist()
+
+    def _count_confidence(self, i):
+        count = self.counts[i]
+        return 'high' if count >= 5 else 'medium' if count >= 3 else 'low'
+
+
+def random_queries(locations, count, seed=7):
+    """Random queries covering known and unknown locations and odd bedroom counts."""
+    rng = random.Random(seed)
+    budgets = [800, 1500, 2500, 3500, 4000, 6000, 9000, 15000, 25000, 60000]
+    queries = []
+    for _ in range(count):
+        location = rng.choice(locations) if rng.random() < 0.9 else 'Nowhere'
+        budget = rng.choice(budgets) if rng.random() < 0.7 else rng.randint(500, 40000)
+        queries.append((budget, location, rng.choice([0, 1, 1, 2, 2, 3, 3, 4, 5, 6])))
+    return queries
+
+
+def check_parity(listings, count=2000):
+    """Compare the engine with market_stats.get_recommendations (the Python port); returns mismatches."""
+    stats = location_stats(listings)
+    engine = RecommendationEngine(stats)
+    queries = random_queries(engine.locations or ['Nowhere'], count)
+    expected = [get_recommendations(*q, stats=stats) for q in queries]
+    actual = engine.recommend_batch(queries)
+    mismatches = [(q, e, a) for q, e, a in zip(queries, expected, actual) if e != a]
+    single = [q for q, e in zip(queries[:200], expected) if engine.recommend(*q) != e]
+    return len(queries), mismatches, single
+
+
+def run_typescript(listings, queries):
+    """getRecommendations from lib/recommendations.ts under node, one result list per query."""
+    node = shutil.which('node')
+    if node is None:
+        raise RuntimeError("node is not installed")
+    result = subprocess.run([node, str(TS_RUNNER)], capture_output=True, text=True,
+                            input=json.dumps({'listings': listings, 'queries': queries}))
+    if result.returncode != 0:
+        raise RuntimeError(f"{TS_RUNNER.name} failed (run `npm install` first?):\n"
+                           f"{result.stderr.strip()}")
+    return json.loads(result.stdout)
+
+
+def check_ts_parity(listings, count=2000):
+    """Compare the engine with the TypeScript getRecommendations; returns mismatches."""
+    engine = RecommendationEngine.from_listings(listings)
+    queries = random_queries(engine.locations or ['Nowhere'], count)
+    expected = run_typescript(listings, [list(q) for q in queries])
+    actual = engine.recommend_batch(queries)
+    return len(queries), [(q, e, a) for q, e, a in zip(queries, expected, actual) if e != a]
+
+
+def run_benchmark(listings, count=2000):
+    print("=" * 70)
+    print(f"RECOMMENDER BENCHMARK ({len(listings):,} listings, {count:,} queries)")
+    print("=" * 70)
+    queries = random_queries(sorted({l['location'] for l in listings}), count)
+
+    sample = queries[:200]
+    start = time.perf_counter()
+    for q in sample:
+        get_recommendations(*q, listings=listings)
+    rebuild = (time.perf_counter() - start) / len(sample) * 1000
+    print(f"\n  getRecommendations (stats per call): {rebuild:8.3f}ms/query")
+
+    stats = location_stats(listings)
+    start = time.perf_counter()
+    for q in queries:
+        get_recommendations(*q, stats=stats)
+    cached = (time.perf_counter() - start) / count * 1000
+    print(f"  getRecommendations (cached stats):   {cached:8.3f}ms/query")
+
+    start = time.perf_counter()
+    engine = RecommendationEngine(stats)
+    print(f"  Engine build:                        {(time.perf_counter() - start) * 1000:8.3f}ms")
+
+    start = time.perf_counter()
+    for q in queries:
+        engine.recommend(*q)
+    single = (time.perf_counter() - start) / count * 1000
+    print(f"  Engine, one query at a time:         {single:8.3f}ms/query")
+
+    start = time.perf_counter()
+    engine.recommend_batch(queries)
+    batch = (time.perf_counter() - start) / count * 1000
+    print(f"  Engine, batched:                     {batch:8.3f}ms/query")
+    print(f"\n  Speedup vs per-call stats: {rebuild / batch:,.0f}x batched, {rebuild / single:,.0f}x single")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Vectorized rental recommendations')
+    parser.add_argument('input', type=str, help='Scraper JSON output')
+    parser.add_argument('--budget', type=float, help='Monthly budget (GH₵)')
+    parser.add_argument('--location', type=str, help='Preferred location')
+    parser.add_argument('--bedrooms', type=int, default=2)
+    parser.add_argument('--check', action='store_true',
+                        help='Compare against the Python port (market_stats) on random queries')
+    parser.add_argument('--check-ts', action='store_true',
+                        help='Compare against lib/recommendations.ts run under node on random queries')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Time the engine against getRecommendations')
+    parser.add_argument('--queries', type=int, default=2000,
+                        help='Random queries for --check/--check-ts/--benchmark (default: 2000)')
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        listings = [l for l in json.load(f).get('listings', []) if l.get('price')]
+
+    if args.check:
+        total, mismatches, single = check_parity(listings, args.queries)
+        if mismatches or single:
+            for q, expected, actual in mismatches[:5]:
+                print(f"✗ {q}\n  expected: {expected}\n  actual:   {actual}")
+            print(f"✗ {len(mismatches)} batch and {len(single)} single mismatches in {total} queries")
+            raise SystemExit(1)
+        print(f"✓ {total} queries match market_stats.get_recommendations exactly")
+    elif args.check_ts:
+        try:
+            total, mismatches = check_ts_parity(listings, args.queries)
+        except RuntimeError as e:
+            print(f"✗ {e}")
+            raise SystemExit(2)
+        if mismatches:
+            for q, expected, actual in mismatches[:5]:
+                print(f"✗ {q}\n  expected: {expected}\n  actual:   {actual}")
+            print(f"✗ {len(mismatches)} mismatches with lib/recommendations.ts in {total} queries")
+            raise SystemExit(1)
+        print(f"✓ {total} queries match lib/recommendations.ts exactly")
+    elif args.benchmark:
+        run_benchmark(listings, args.queries)
+    elif args.budget is not None and args.location:
+        budget = int(args.budget) if args.budget.is_integer() else args.budget
+        engine = RecommendationEngine.from_listings(listings)
+        for r in engine.recommend(budget, args.location, args.bedrooms):
+            print(f"  [{r['type']:20s}] {r['location']:25s} {r['bedrooms']}BR "
+                  f"GH₵{r['price']:>10,.0f}  {r['reason']}")
+    else:
+        parser.print_help()
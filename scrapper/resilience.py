@@ -0,0 +1,269 @@
+"""
+Resilience - Retries and circuit breakers for page fetches
+Every fetch goes through Resilience.call, which:
+
+    - classifies the outcome (timeout, network, 4xx, 5xx, throttled, challenge)
+    - retries transient failures with capped, fully jittered exponential backoff
+    - keeps a circuit breaker per area and per host
+
+An area whose pages keep failing is abandoned after a couple of pages instead
+of burning a 30 s timeout on every remaining page. When a whole host keeps
+failing, its breaker opens and every fetch to it fails immediately; after a
+cool-down a single trial request decides whether it closes again. A site
+outage then costs seconds instead of the job's time budget.
+"""
+
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+# Lower-cased markers of interstitial / challenge pages
+CHALLENGE_MARKERS = [
+    'cf-browser-verification',
+    'challenge-platform',
+    'cf-chl-',
+    '<title>just a moment',
+    'attention required! | cloudflare',
+    'g-recaptcha',
+    'h-captcha',
+    'hcaptcha.com',
+    'access denied',
+    'are you a robot',
+    'unusual traffic',
+]
+
+# Failure kinds worth retrying; the others won't change on a second try
+RETRYABLE = {'timeout', 'network', 'server', 'throttled'}
+
+# Attempts per page and backoff bounds (seconds)
+MAX_ATTEMPTS = 3
+BASE_DELAY = 1.0
+MAX_DELAY = 20.0
+
+# Consecutive failed pages before an area is abandoned for the run
+AREA_FAILURE_THRESHOLD = 2
+
+# Consecutive failed pages (across areas) before a host's breaker opens, and
+# how long it stays open before a trial request is let through
+HOST_FAILURE_THRESHOLD = 4
+HOST_RESET_SECONDS = 60.0
+
+
+def find_challenge_markers(html):
+    lower = html.lower()
+    return [marker for marker in CHALLENGE_MARKERS if marker in lower]
+
+
+class FetchError(Exception):
+    def __init__(self, kind, url, detail=''):
+        """A page that failed for good (after any retries)."""
+        super().__init__(f"{kind}: {detail}" if detail else kind)
+        self.kind = kind
+        self.url = url
+
+
+class CircuitOpen(FetchError):
+    def __init__(self, scope, name, url):
+        """Fetch refused without trying: the area or host breaker is open."""
+        super().__init__('circuit_open', url, f"{scope} {name}")
+        self.scope = scope
+
+
+def classify_response(status, html):
+    """None for a usable page, else the failure kind."""
+    if status is None:
+        return 'network'
+    if status in (404, 410):
+        return 'not_found'
+    if status == 429:
+        return 'throttled'
+    if status >= 500:
+        return 'server'
+    if status >= 400:
+        return 'client'
+    if html and find_challenge_markers(html[:20000]):
+        return 'challenge'
+    return None
+
+
+def classify_exception(exc):
+    """Failure kind for an exception raised by a fetcher."""
+    name = type(exc).__name__.lower()
+    message = str(exc).lower()
+    if 'timeout' in name or 'timed out' in message or 'timeout' in message:
+        return 'timeout'
+    return 'network'
+
+
+class CircuitBreaker:
+    def __init__(self, threshold, reset_seconds=None, clock=time.monotonic):
+        """
+        Opens after threshold consecutive failures. With reset_seconds it
+        half-opens after that long and lets one trial call through; without,
+        it stays open.
+        """
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self.reset_seconds is not None and self.clock() - self.opened_at >= self.reset_seconds:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_in_flight or (self.opened_at is None and self.failures >= self.threshold):
+            if self.opened_at is None:
+                self.trips += 1
+            self.opened_at = self.clock()
+        self.trial_in_flight = False
+
+
+class RetryPolicy:
+    def __init__(self, attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY,
+                 rng=None):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt):
+        """Full jitter: uniform in [0, min(max_delay, base * 2**attempt)]."""
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class Resilience:
+    def __init__(self, policy=None, area_threshold=AREA_FAILURE_THRESHOLD,
+                 host_threshold=HOST_FAILURE_THRESHOLD, host_reset=HOST_RESET_SECONDS,
+                 sleep=time.sleep):
+        """Retry policy plus area and host breakers, shared by every fetch worker."""
+        self.policy = policy or RetryPolicy()
+        self.area_threshold = area_threshold
+        self.host_threshold = host_threshold
+        self.host_reset = host_reset
+        self.sleep = sleep
+        self.hosts = {}
+        self.areas = {}
+        self.failures = Counter()
+        self.retries = Counter()
+        self.refused = Counter()
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = CircuitBreaker(self.host_threshold, self.host_reset)
+        return host, self.hosts[host]
+
+    def _area(self, area):
+        if area not in self.areas:
+            # No reset: an abandoned area stays skipped for the rest of the run
+            self.areas[area] = CircuitBreaker(self.area_threshold)
+        return self.areas[area]
+
+    def start_area(self, area):
+        """Fresh area breaker for a new pass over an area (the daemon revisits them)."""
+        with self._lock:
+            self.areas.pop(area, None)
+
+    def area_open(self, area):
+        with self._lock:
+            return self._area(area).state != 'closed'
+
+    def host_open(self, url):
+        with self._lock:
+            return self._host(url)[1].state == 'open'
+
+    def call(self, url, area, fetch):
+        """
+        Run fetch() -> (status, html) under the retry policy and breakers.
+        Returns (status, html) for usable pages and 404/410; raises FetchError
+        (or CircuitOpen) otherwise.
+        """
+        kind, detail = None, ''
+        for attempt in range(self.policy.attempts):
+            with self._lock:
+                host, host_breaker = self._host(url)
+                if not self._area(area).allow():
+                    self.refused['area'] += 1
+                    raise CircuitOpen('area', area, url)
+                if not host_breaker.allow():
+                    self.refused['host'] += 1
+                    raise CircuitOpen('host', host, url)
+
+            try:
+                status, html = fetch()
+                kind = classify_response(status, html)
+                detail = f"HTTP {status}" if status else ''
+            except Exception as e:
+                status, html = None, ''
+                kind = classify_exception(e)
+                detail = str(e)[:120]
+
+            with self._lock:
+                if kind is None or kind == 'not_found':
+                    host_breaker.record_success()
+                    self._area(area).record_success()
+                    return status, html
+                self.failures[kind] += 1
+                retry = kind in RETRYABLE and attempt + 1 < self.policy.attempts
+                if retry:
+                    self.retries[kind] += 1
+            if not retry:
+                break
+            self.sleep(self.policy.delay(attempt))
+
+        with self._lock:
+            self._area(area).record_failure()
+            host_breaker.record_failure()
+        raise FetchError(kind, url, detail)
+
+    def summary(self):
+        with self._lock:
+            return {
+                'failures': dict(self.failures),
+                'retries': dict(self.retries),
+                'refused': dict(self.refused),
+                'areas_abandoned': sorted(str(name) for name, b in self.areas.items() if b.trips),
+                'host_trips': {host: b.trips for host, b in self.hosts.items() if b.trips},
+            }
+
+    def print_report(self):
+        summary = self.summary()
+        if not (summary['failures'] or summary['refused']):
+            return
+        print(f"\n🛡️  RESILIENCE")
+        for kind, count in sorted(summary['failures'].items()):
+            print(f"  {kind:12s} {count:4d} failed attempts, "
+                  f"{summary['retries'].get(kind, 0)} retried")
+        for scope, count in sorted(summary['refused'].items()):
+            print(f"  {count} fetches skipped by open {scope} breakers")
+        if summary['areas_abandoned']:
+            print(f"  Areas abandoned: {', '.join(summary['areas_abandoned'])}")
+        for host, trips in summary['host_trips'].items():
+            print(f"  Host breaker for {host} opened {trips}x")
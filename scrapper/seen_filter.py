@@ -0,0 +1,448 @@
+"""
+Seen Filter - Every listing URL ever scraped, in a memory-mapped file
+"Have we ever seen this listing?" needs the whole URL history, which grows
+with every daily run. Instead of a Python set rebuilt from every past output,
+the history is one file next to the output, memory-mapped on load:
+
+    bloom      a scalable Bloom filter: layers of growing capacity and
+               tightening error rate, so the overall false-positive rate stays
+               near the configured one however many URLs are added
+    store      every canonical URL, sorted (offsets + UTF-8 blob), binary
+               searched to confirm Bloom positives
+
+A Bloom negative is a definite "never seen" without touching the store, and a
+positive is always confirmed exactly, so false positives cost one lookup but
+never a wrong answer. The file is rewritten at the end of each run.
+
+File layout (little-endian, every section 8-byte aligned):
+    header     magic, version, false-positive rate, layer count, URL count,
+               blob length
+    layers     bits, hashes, capacity, count per layer, then each bit array
+    offsets    uint32[URL count + 1] byte offsets into the blob
+    blob       sorted canonical URLs
+"""
+
+import hashlib
+import heapq
+import math
+import mmap
+import struct
+from array import array
+from pathlib import Path
+
+from listing import canonical_url
+
+
+SEEN_MAGIC = b'SEEN'
+SEEN_VERSION = 1
+
+# magic, version, false-positive rate, layer count, URL count, blob bytes
+HEADER = struct.Struct('<4sIdIIQ')
+# bits, hashes, capacity, count, reserved
+LAYER = struct.Struct('<QIIII')
+
+# Target false-positive rate of the whole filter
+DEFAULT_FP_RATE = 0.001
+
+# First layer capacity; each new layer holds GROWTH times more URLs at
+# TIGHTENING times the error rate, so the layer errors sum to the target
+INITIAL_CAPACITY = 4096
+GROWTH = 2
+TIGHTENING = 0.5
+
+# Incremental crawls stop an area after this many pages in a row with
+# nothing but previously seen listings
+INCREMENTAL_STOP_PAGES = 2
+
+
+def get_seen_path(output_path):
+    """Get the seen-URL history path for a scraper JSON output path."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.seen.bin")
+
+
+def _pad(length):
+    return -length % 8
+
+
+def _hashes(key):
+    """Two independent 64-bit hashes of a canonical URL (double hashing)."""
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    h1, h2 = struct.unpack('<QQ', digest)
+    return h1, h2 | 1
+
+
+class BloomLayer:
+    def __init__(self, capacity, fp_rate, bits=None, num_bits=None, num_hashes=None, count=0):
+        """
+        One fixed-size Bloom filter. New layers are sized for capacity at
+        fp_rate; loaded layers pass their stored bits (an mmap view).
+        """
+        if num_bits is None:
+            num_bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+            num_bits += -num_bits % 64
+            num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self.capacity = capacity
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.count = count
+        self.bits = bits if bits is not None else bytearray(num_bits // 8)
+
+    def _positions(self, h1, h2):
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, hashes):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(*hashes))
+
+    def add(self, hashes):
+        if not isinstance(self.bits, bytearray):
+            # Copy a memory-mapped layer before its first change
+            view, self.bits = self.bits, bytearray(self.bits)
+            view.release()
+        for pos in self._positions(*hashes):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+
+class SeenFilter:
+    def __init__(self, fp_rate=DEFAULT_FP_RATE):
+        """An empty history; use SeenFilter.load for a saved one."""
+        self.fp_rate = fp_rate
+        self.layers = []
+        self.pending = set()   # canonical URLs added since load, as bytes
+        self._mmap = None
+        self._offsets = None
+        self._blob = None
+        self.stored = 0
+        # Lookup counters for the report
+        self.checks = 0
+        self.bloom_negatives = 0
+        self.false_positives = 0
+
+    @classmethod
+    def load(cls, path, fp_rate=None):
+        """
+        Memory-map a saved history (an empty one if the file doesn't exist).
+        fp_rate, if given, replaces the stored rate for layers added later.
+        """
+        path = Path(path)
+        seen = cls(fp_rate or DEFAULT_FP_RATE)
+        if not path.exists() or path.stat().st_size == 0:
+            return seen
+        with open(path, 'rb') as f:
+            seen._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(seen._mmap)
+
+        magic, version, stored_rate, layer_count, url_count, blob_len = HEADER.unpack_from(view)
+        if magic != SEEN_MAGIC or version != SEEN_VERSION:
+            seen.close()
+            raise ValueError(f"{path} is not a seen-URL history (v{SEEN_VERSION})")
+        seen.fp_rate = fp_rate or stored_rate
+
+        offset = HEADER.size
+        specs = []
+        for _ in range(layer_count):
+            specs.append(LAYER.unpack_from(view, offset)[:4])
+            offset += LAYER.size
+        for num_bits, num_hashes, capacity, count in specs:
+            size = num_bits // 8
+            seen.layers.append(BloomLayer(capacity, None, view[offset:offset + size],
+                                          num_bits, num_hashes, count))
+            offset += size + _pad(size)
+
+        offsets_len = (url_count + 1) * 4
+        seen._offsets = view[offset:offset + offsets_len].cast('I')
+        offset += offsets_len + _pad(offsets_len)
+        seen._blob = view[offset:offset + blob_len]
+        seen.stored = url_count
+        return seen
+
+    def close(self):
+        """Release the mapping (layers still backed by it are copied first)."""
+        if self._mmap is None:
+            return
+        for layer in self.layers:
+            if not isinstance(layer.bits, bytearray):
+                view, layer.bits = layer.bits, bytearray(layer.bits)
+                view.release()
+        for view in (self._offsets, self._blob):
+            if view is not None:
+                view.release()
+        self._offsets = self._blob = None
+        self._mmap.close()
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.stored + len(self.pending)
+
+    def _stored_url(self, idx):
+        return bytes(self._blob[self._offsets[idx]:self._offsets[idx + 1]])
+
+    def _in_store(self, key):
+        """Exact check: binary search of the sorted URL store."""
+        lo, hi = 0, self.stored
+        while lo < hi:
+            mid = (lo + hi) // 2
+            url = self._stored_url(mid)
+            if url == key:
+                return True
+            if url < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return key in self.pending
+
+    def might_contain(self, url):
+        """Bloom check only: False means never seen, True means probably seen."""
+        hashes = _hashes(canonical_url(url).encode('utf-8'))
+        return any(hashes in layer for layer in self.layers)
+
+    def contains(self, url):
+        """Exact: has this listing URL been seen in any saved (or added) run?"""
+        key = canonical_url(url).encode('utf-8')
+        self.checks += 1
+        hashes = _hashes(key)
+        if not any(hashes in layer for layer in self.layers):
+            self.bloom_negatives += 1
+            return False
+        if self._in_store(key):
+            return True
+        self.false_positives += 1
+        return False
+
+    __contains__ = contains
+
+    def add(self, urls):
+        """Add URLs to the history; returns how many were new. Saved by save()."""
+        added = 0
+        for url in urls:
+            if not url:
+                continue
+            key = canonical_url(url).encode('utf-8')
+            hashes = _hashes(key)
+            if any(hashes in layer for layer in self.layers) and self._in_store(key):
+                continue
+            if not self.layers or self.layers[-1].full:
+                capacity = INITIAL_CAPACITY * GROWTH ** len(self.layers)
+                rate = self.fp_rate * (1 - TIGHTENING) * TIGHTENING ** len(self.layers)
+                self.layers.append(BloomLayer(capacity, rate))
+            self.layers[-1].add(hashes)
+            self.pending.add(key)
+            added += 1
+        return added
+
+    def save(self, path):
+        """Write the history with this run's URLs merged in. Returns the path."""
+        stored = (self._stored_url(i) for i in range(self.stored))
+        urls = list(heapq.merge(stored, sorted(self.pending)))
+        offsets = array('I', [0])
+        for url in urls:
+            offsets.append(offsets[-1] + len(url))
+        blob = b''.join(urls)
+
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(SEEN_MAGIC, SEEN_VERSION, self.fp_rate, len(self.layers),
+                                len(urls), len(blob)))
+            for layer in self.layers:
+                f.write(LAYER.pack(layer.num_bits, layer.num_hashes, layer.capacity,
+                                   layer.count, 0))
+            sections = [layer.bits for layer in self.layers] + [offsets.tobytes(), blob]
+            for section in sections:
+                f.write(section)
+                f.write(b'\0' * _pad(len(section)))
+        # The mapping may still point at the old file: drop it before replacing,
+        # then map the new one so lookups keep working
+        self.close()
+        tmp_path.replace(path)
+        saved = SeenFilter.load(path, self.fp_rate)
+        self.layers, self._mmap = saved.layers, saved._mmap
+        self._offsets, self._blob, self.stored = saved._offsets, saved._blob, saved.stored
+        self.pending = set()
+        return path
+
+    def filter_bytes(self):
+        return sum(len(layer.bits) for layer in self.layers)
+
+    def expected_fp_rate(self):
+        """Current false-positive rate from each layer's fill."""
+        miss = 1.0
+        for layer in self.layers:
+            if layer.count:
+                fill = 1 - math.exp(-layer.num_hashes * layer.count / layer.num_bits)
+                miss *= 1 - fill ** layer.num_hashes
+        return 1 - miss
+
+    def print_report(self):
+        print(f"\n🔎 SEEN URLS: {len(self):,} known, {len(self.layers)} Bloom layers "
+              f"({self.filter_bytes() / 1024:,.0f} KB, ~{self.expected_fp_rate():.3%} "
+              f"false positives, target {self.fp_rate:.3%})")
+        if self.checks:
+            print(f"  Lookups: {self.checks:,}  never seen (Bloom only): "
+                  f"{self.bloom_negatives:,}  Bloom false positives caught: "
+                  f"{self.false_positives:,}")
+
+
+def open_seen(output_path, fp_rate=None, previous_output=None):
+    """
+    The seen-URL history for an output. A missing history starts from the
+    previous output's listings, so the first run doesn't call everything new.
+    """
+    path = get_seen_path(output_path)
+    try:
+        seen = SeenFilter.load(path, fp_rate)
+    except ValueError as e:
+        print(f"  ⚠️  Starting a new seen-URL history: {e}")
+        seen = SeenFilter(fp_rate or DEFAULT_FP_RATE)
+    if not len(seen) and previous_output:
+        seen.add(listing.get('url') for listing in previous_output.get('listings', []))
+    return seen
+
+
+def count_unseen(seen, listings):
+    """How many Listing records the history has never seen."""
+    return sum(1 for listing in listings if not seen.contains(listing.url))
+
+
+def carry_stopped_areas(previous_output, found_urls, stopped_areas):
+    """
+    Listing dicts from the previous output in areas an incremental crawl
+    stopped early: not found now, but never looked for on the skipped pages.
+    """
+    if not previous_output or not stopped_areas:
+        return []
+    carried = {}
+    for listing in previous_output.get('listings', []):
+        key = canonical_url(listing.get('url'))
+        if listing.get('area') in stopped_areas and key not in found_urls:
+            carried.setdefault(key, listing)
+    return list(carried.values())
+
+
+def update_seen(seen, urls, output_path):
+    """Add a finished run's URLs and save the history."""
+    added = seen.add(urls)
+    path = seen.save(get_seen_path(output_path))
+    print(f"✓ Saved {path} (+{added:,} URLs, {len(seen):,} total)")
+    return added
+
+
+def run_benchmark(count=200_000, fp_rate=DEFAULT_FP_RATE, lookups=20_000):
+    """Seen filter vs a Python set of the same synthetic URLs."""
+    import os
+    import random
+    import tempfile
+    import time
+    import tracemalloc
+
+    rng = random.Random(42)
+    def make_url(i):
+        return (f"https://meqasa.com/{rng.randint(1, 4)}-bedroom-apartment-for-rent-in-"
+                f"area-{i % 97}-{i}")
+
+    urls = [make_url(i) for i in range(count)]
+    unknown = [make_url(count + i) for i in range(lookups)]
+    known = rng.sample(urls, lookups)
+
+    print("=" * 70)
+    print(f"SEEN FILTER BENCHMARK ({count:,} URLs, target {fp_rate:.3%} false positives)")
+    print("=" * 70)
+
+    tracemalloc.start()
+    url_set = {canonical_url(url) for url in urls}
+    set_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del url_set
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'bench.seen.bin'
+        start = time.perf_counter()
+        seen = SeenFilter(fp_rate)
+        seen.add(urls)
+        seen.save(path)
+        build_seconds = time.perf_counter() - start
+        file_bytes = os.path.getsize(path)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        seen = SeenFilter.load(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        loaded_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        def per_lookup_us(items):
+            start = time.perf_counter()
+            hits = sum(1 for url in items if seen.contains(url))
+            return hits, (time.perf_counter() - start) / len(items) * 1e6
+
+        known_hits, known_us = per_lookup_us(known)
+        new_hits, new_us = per_lookup_us(unknown)
+        bloom_fp = sum(1 for url in unknown if seen.might_contain(url)) / len(unknown)
+        print(f"\n  Python set:     {set_bytes / 1024 / 1024:8.1f} MB in memory")
+        print(f"  Seen file:      {file_bytes / 1024 / 1024:8.1f} MB on disk "
+              f"(Bloom {seen.filter_bytes() / 1024:,.0f} KB, {len(seen.layers)} layers), "
+              f"{loaded_bytes / 1024:,.0f} KB heap after mmap load in {load_ms:.1f}ms")
+        print(f"  Build + save:   {build_seconds:8.2f}s")
+        print(f"\n  Known URLs:     {known_us:6.1f}µs/lookup  ({known_hits:,}/{len(known):,} found)")
+        print(f"  New URLs:       {new_us:6.1f}µs/lookup  ({new_hits} wrongly found)")
+        print(f"  Bloom false positives: {bloom_fp:.3%} measured, "
+              f"{seen.expected_fp_rate():.3%} expected (all caught by the store)")
+        seen.close()
+    return known_hits == len(known) and new_hits == 0
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from listing_io import read_output
+
+    parser = argparse.ArgumentParser(description='Persistent seen-URL history (Bloom filter + store)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = sub.add_parser('build', help='Add the listings of outputs to a history')
+    build_parser.add_argument('inputs', nargs='+', help='Scraper JSON outputs (history of the first)')
+    build_parser.add_argument('--fp-rate', type=float, help=f'False-positive rate (default: {DEFAULT_FP_RATE})')
+
+    stats_parser = sub.add_parser('stats', help='Describe the history of an output')
+    stats_parser.add_argument('input', help='Scraper JSON output')
+
+    check_parser = sub.add_parser('check', help='Exit 0 if every URL has been seen, 1 if not')
+    check_parser.add_argument('input', help='Scraper JSON output')
+    check_parser.add_argument('urls', nargs='+', help='Listing URLs')
+
+    bench_parser = sub.add_parser('bench', help='Compare with a Python set on synthetic URLs')
+    bench_parser.add_argument('--urls', type=int, default=200_000, help='URLs in the filter')
+    bench_parser.add_argument('--fp-rate', type=float, default=DEFAULT_FP_RATE)
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        seen = SeenFilter.load(get_seen_path(args.inputs[0]), args.fp_rate)
+        urls = [listing['url'] for path in args.inputs
+                for listing in read_output(path, validate=False)['listings']]
+        update_seen(seen, urls, args.inputs[0])
+        seen.print_report()
+    elif args.command == 'stats':
+        with SeenFilter.load(get_seen_path(args.input)) as seen:
+            seen.print_report()
+    elif args.command == 'check':
+        with SeenFilter.load(get_seen_path(args.input)) as seen:
+            results = [(url, seen.contains(url)) for url in args.urls]
+        for url, found in results:
+            print(f"  {'seen' if found else 'new ':4s}  {url}")
+        sys.exit(0 if all(found for _, found in results) else 1)
+    else:
+        sys.exit(0 if run_benchmark(args.urls, args.fp_rate) else 1)
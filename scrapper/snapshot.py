@@ -0,0 +1,318 @@
+"""
+Listing Snapshot - Fixed-width binary snapshot of scraper output
+Readers mmap the file and get zero-copy column views instead of parsing JSON
+into one dict per listing. Strings live once in an interned string table and
+columns hold indexes into it.
+
+File layout (little-endian, every section 8-byte aligned):
+    header     magic, version, row count, string count, metadata and blob lengths
+    metadata   JSON object with the file-level fields (scraped_at, area_stats...)
+    offsets    uint32[string count + 1] byte offsets into the string blob
+    strings    UTF-8 blob of all interned strings (index 0 is '')
+    columns    one fixed-width array per entry in COLUMNS, in order
+"""
+
+import json
+import mmap
+import struct
+import time
+from array import array
+from collections.abc import MutableMapping
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, columns fall back to memoryviews
+    np = None
+
+
+SNAPSHOT_MAGIC = b'LSNP'
+SNAPSHOT_VERSION = 3
+
+# magic, version, row count, string count, metadata bytes, string blob bytes
+HEADER = struct.Struct('<4sIIIII')
+
+# Missing integers (bedrooms/page) are stored as -1
+MISSING = -1
+
+# (column name, array typecode); string columns hold string-table indexes
+COLUMNS = [
+    ('price', 'i'),
+    ('bedrooms', 'h'),
+    ('page', 'h'),
+    ('scraped_at', 'q'),
+    ('title', 'I'),
+    ('price_text', 'I'),
+    ('location', 'I'),
+    ('area', 'I'),
+    ('source', 'I'),
+    ('url', 'I'),
+    ('price_period', 'I'),
+    ('property_type', 'I'),
+]
+STRING_COLUMNS = {'title', 'price_text', 'location', 'area', 'source', 'url',
+                  'price_period', 'property_type'}
+
+# Fields the JSON output leaves out when they are empty (see Listing.to_dict)
+OPTIONAL_COLUMNS = {'page', 'area', 'price_period', 'property_type'}
+
+
+def get_snapshot_path(output_path):
+    """Get the snapshot sibling path for a JSON output path."""
+    return Path(output_path).with_suffix('.snapshot')
+
+
+def _pad(length):
+    return -length % 8
+
+
+def _to_epoch(value, fallback):
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return fallback
+
+
+def write_snapshot(data, snapshot_path):
+    """Write scraper output (the dict that goes to JSON) as a snapshot."""
+    listings = data.get('listings', [])
+    metadata = {key: value for key, value in data.items() if key != 'listings'}
+    fallback_ts = _to_epoch(data.get('scraped_at'), 0)
+
+    strings = {'': 0}
+    columns = {name: array(code) for name, code in COLUMNS}
+    for listing in listings:
+        for name, _ in COLUMNS:
+            value = listing.get(name)
+            if name in STRING_COLUMNS:
+                value = strings.setdefault(value or '', len(strings))
+            elif name == 'scraped_at':
+                value = _to_epoch(value, fallback_ts)
+            elif value is None:
+                value = MISSING
+            columns[name].append(value)
+
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = array('I', [0])
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    blob = b''.join(encoded)
+    metadata_bytes = json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+
+    with open(snapshot_path, 'wb') as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(listings),
+                            len(encoded), len(metadata_bytes), len(blob)))
+        for section in (metadata_bytes, offsets.tobytes(), blob):
+            f.write(section)
+            f.write(b'\0' * _pad(len(section)))
+        for name, _ in COLUMNS:
+            section = columns[name].tobytes()
+            f.write(section)
+            f.write(b'\0' * _pad(len(section)))
+
+    return snapshot_path
+
+
+class Snapshot:
+    def __init__(self, path):
+        """Memory-map a snapshot file. Nothing is decoded up front."""
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        (magic, version, self.row_count, string_count,
+         metadata_len, blob_len) = HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a listing snapshot (v{SNAPSHOT_VERSION})")
+
+        offset = HEADER.size
+        self._metadata_view = view[offset:offset + metadata_len]
+        offset += metadata_len + _pad(metadata_len)
+
+        offsets_len = (string_count + 1) * 4
+        self._offsets = view[offset:offset + offsets_len].cast('I')
+        offset += offsets_len + _pad(offsets_len)
+
+        self._blob = view[offset:offset + blob_len]
+        offset += blob_len + _pad(blob_len)
+
+        self._columns = {}
+        for name, code in COLUMNS:
+            size = self.row_count * array(code).itemsize
+            self._columns[name] = view[offset:offset + size].cast(code)
+            offset += size + _pad(size)
+
+        self._metadata = None
+        self._string_cache = {}
+
+    def __len__(self):
+        return self.row_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the views and the mapping."""
+        for column in self._columns.values():
+            column.release()
+        for view in (self._metadata_view, self._offsets, self._blob):
+            view.release()
+        self._columns = {}
+        self._mmap.close()
+
+    @property
+    def metadata(self):
+        """File-level fields (scraped_at, area_stats, ...), decoded on first use."""
+        if self._metadata is None:
+            self._metadata = json.loads(bytes(self._metadata_view))
+        return self._metadata
+
+    def column(self, name):
+        """Zero-copy view of a column (a numpy array when numpy is installed)."""
+        view = self._columns[name]
+        if np is not None:
+            return np.frombuffer(view, dtype=view.format)
+        return view
+
+    def string(self, idx):
+        """Decode one interned string (cached, each string is decoded once)."""
+        value = self._string_cache.get(idx)
+        if value is None:
+            start, end = self._offsets[idx], self._offsets[idx + 1]
+            value = str(self._blob[start:end], 'utf-8')
+            self._string_cache[idx] = value
+        return value
+
+    def value(self, name, row):
+        """Decode one field of one row."""
+        value = self._columns[name][row]
+        if name in STRING_COLUMNS:
+            # Index 0 is the empty string, also used for missing values
+            return self.string(value)
+        if name == 'scraped_at':
+            return datetime.fromtimestamp(value).isoformat()
+        return None if value == MISSING else value
+
+    def has(self, name, row):
+        """False for an optional field that is empty in this row (the JSON leaves those out)."""
+        if name not in OPTIONAL_COLUMNS:
+            return name in self._columns
+        return self._columns[name][row] != (0 if name in STRING_COLUMNS else MISSING)
+
+    def listing(self, row):
+        """Materialize one row as a listing dict, in the JSON output's shape."""
+        return {name: self.value(name, row) for name, _ in COLUMNS if self.has(name, row)}
+
+    def listings(self):
+        """Iterate over all rows as listing dicts."""
+        for row in range(self.row_count):
+            yield self.listing(row)
+
+    def rows(self):
+        """All rows as lazy SnapshotRow mappings; valid until the snapshot is closed."""
+        return [SnapshotRow(self, row) for row in range(self.row_count)]
+
+
+class SnapshotRow(MutableMapping):
+    def __init__(self, snapshot, row):
+        """
+        One snapshot row as a listing mapping. Fields are decoded when read, so
+        code that only looks at price/location/bedrooms never builds the rest.
+        Assigned fields are kept on the row and shadow the file's values.
+        """
+        self._snapshot = snapshot
+        self._row = row
+        self._assigned = {}
+
+    def __getitem__(self, name):
+        if name in self._assigned:
+            return self._assigned[name]
+        if not self._snapshot.has(name, self._row):
+            raise KeyError(name)
+        return self._snapshot.value(name, self._row)
+
+    def __setitem__(self, name, value):
+        self._assigned[name] = value
+
+    def __delitem__(self, name):
+        if name not in self._assigned:
+            raise TypeError(f"snapshot field {name!r} is read-only")
+        del self._assigned[name]
+
+    def __iter__(self):
+        for name in self._snapshot._columns:
+            if name in self._assigned or self._snapshot.has(name, self._row):
+                yield name
+        for name in self._assigned:
+            if name not in self._snapshot._columns:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def compare_load(json_path, snapshot_path):
+    """Print load time and heap use of JSON vs snapshot."""
+    import tracemalloc
+
+    print("=" * 70)
+    print("SNAPSHOT LOAD COMPARISON")
+    print("=" * 70)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    prices = [l['price'] for l in data['listings']]
+    json_ms = (time.perf_counter() - start) * 1000
+    json_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del data
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    snapshot = Snapshot(snapshot_path)
+    snapshot_prices = snapshot.column('price')
+    snapshot_ms = (time.perf_counter() - start) * 1000
+    snapshot_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f"\n  {len(prices):,} listings")
+    print(f"  json.load + price column: {json_ms:8.2f}ms  peak heap {json_peak / 1024:10,.0f} KB")
+    print(f"  snapshot + price column:  {snapshot_ms:8.2f}ms  peak heap {snapshot_peak / 1024:10,.0f} KB")
+    assert sum(prices) == int(sum(snapshot_prices))
+    del snapshot_prices
+    snapshot.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Write or inspect listing snapshots')
+    parser.add_argument('input', type=str, help='Scraper JSON output or .snapshot file')
+    parser.add_argument('--output', '-o', type=str,
+                        help='Snapshot path (default: <input>.snapshot)')
+    parser.add_argument('--compare', action='store_true',
+                        help='Compare JSON vs snapshot load time and memory')
+    args = parser.parse_args()
+
+    if args.input.endswith('.snapshot'):
+        with Snapshot(args.input) as snap:
+            print(f"{args.input}: {len(snap)} listings, scraped {snap.metadata.get('scraped_at')}")
+            if len(snap):
+                print(f"  First: {snap.listing(0)}")
+    else:
+        target = args.output or get_snapshot_path(args.input)
+        if not args.compare or not Path(target).exists():
+            with open(args.input, 'r', encoding='utf-8') as f:
+                scraped = json.load(f)
+            write_snapshot(scraped, target)
+            print(f"✓ Wrote {target} ({Path(target).stat().st_size:,} bytes)")
+        if args.compare:
+            compare_load(args.input, target)
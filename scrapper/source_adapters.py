@@ -0,0 +1,147 @@
+"""
+Source Adapters - Per-site definitions for the scrape pipeline
+Each adapter only declares where the search pages are and how to parse them;
+fetching, pagination, dedup and saving are handled by pipeline.Pipeline.
+"""
+
+import re
+from datetime import datetime
+
+from listing import listings_to_dicts
+from pipeline import SourceAdapter
+
+
+class MeqasaAdapter(SourceAdapter):
+    name = 'meqasa'
+    fetch_mode = 'browser'
+    max_pages = 10
+    wait_seconds = 3
+    page_delay = 2.0
+    listing_selectors = ('div.mqs-prop-dt-wrapper',)
+    probe_selectors = ('div.mqs-featured-prop-inner-wrap', 'a[href*="for-rent"]',
+                       '[class*="price"]')
+    feed_urls = ('https://meqasa.com/robots.txt', 'https://meqasa.com/sitemap.xml')
+    listing_url_re = re.compile(r'^https://meqasa\.com/([a-z-]+)-for-rent-at-[^/?#]+-\d+$')
+
+    def areas(self):
+        from meqasa_working_scraper import GREATER_ACCRA_AREAS
+        return [(area['name'], f"https://meqasa.com/{area['url']}")
+                for area in GREATER_ACCRA_AREAS]
+
+    def is_last_page(self, task):
+        return (task.status != 200 or not task.html
+                or 'class="mqs-prop-dt-wrapper"' not in task.html)
+
+    def parse(self, task, scraped_at):
+        from meqasa_working_scraper import extract_from_html
+        return extract_from_html(task.html, task.page_num, task.area, scraped_at=scraped_at)
+
+    def page_urls(self, task):
+        from meqasa_working_scraper import card_urls
+        return card_urls(task.html)
+
+    def is_listing_url(self, url):
+        from meqasa_working_scraper import EXCLUDED_TITLE_TERMS
+        match = self.listing_url_re.match(url)
+        # The slug starts with the property type: skip houses, offices, land...
+        return bool(match) and not any(term in match.group(1) for term in EXCLUDED_TITLE_TERMS)
+
+    def parse_detail(self, html, url, scraped_at):
+        from meqasa_working_scraper import listing_from_detail
+        return listing_from_detail(html, url, scraped_at=scraped_at)
+
+    def output_path(self):
+        from meqasa_working_scraper import get_output_path
+        return get_output_path()
+
+    def build_output(self, listings, area_stats):
+        return {
+            'scraped_at': datetime.now().isoformat(),
+            'total_listings': len(listings),
+            'source': 'meqasa',
+            'region': 'Greater Accra',
+            'property_type': 'apartments',
+            'price_period': 'monthly',
+            'currency': 'GHS',
+            'currency_symbol': 'GH₵',
+            'areas_scraped': len(area_stats),
+            'area_stats': area_stats,
+            'listings': listings_to_dicts(listings),
+        }
+
+
+class TonatonAdapter(SourceAdapter):
+    name = 'tonaton'
+    fetch_mode = 'browser'
+    max_pages = 5
+    wait_seconds = 5
+    page_delay = 3.0
+    output_file = 'tonaton_data.json'
+    # Ad pages are .html links; category and navigation links aren't
+    listing_href_re = re.compile(r'href="((?:https://tonaton\.com)?/[^"?#]+\.html)[^"]*"')
+    site_url = 'https://tonaton.com'
+
+    @property
+    def listing_selectors(self):
+        from tonaton_scraper import CONTAINER_SELECTORS
+        return CONTAINER_SELECTORS
+
+    def areas(self):
+        return [(None, 'https://tonaton.com/c_houses-apartments-for-rent')]
+
+    def parse(self, task, scraped_at):
+        from bs4 import BeautifulSoup
+        from tonaton_scraper import CONTAINER_SELECTORS, parse_card
+
+        soup = BeautifulSoup(task.html, 'html.parser')
+        containers = []
+        for selector in CONTAINER_SELECTORS:
+            containers = soup.select(selector)
+            if containers:
+                break
+
+        listings = []
+        for container in containers:
+            link = container.find('a')
+            if not link:
+                continue
+            listing = parse_card(container.get_text('\n'), link.get_text(),
+                                 link.get('href'), scraped_at)
+            if listing:
+                listings.append(listing)
+        return listings
+
+
+class JijiAdapter(SourceAdapter):
+    name = 'jiji'
+    fetch_mode = 'http'
+    max_pages = 10
+    page_delay = 2.0
+    output_file = 'jiji_data.json'
+    # Ads live under the category path and end in .html
+    listing_href_re = re.compile(
+        r'href="((?:https://jiji\.com\.gh)?/[^"?#]*for-rent/[^"?#]+\.html)[^"]*"')
+    site_url = 'https://jiji.com.gh'
+
+    def __init__(self):
+        from jiji_scraper import JijiScraper
+        self._scraper = JijiScraper()
+
+    @property
+    def listing_selectors(self):
+        from jiji_scraper import LISTING_SELECTORS
+        return LISTING_SELECTORS
+
+    def areas(self):
+        return [(None, 'https://jiji.com.gh/accra/houses-apartments-for-rent')]
+
+    def parse(self, task, scraped_at):
+        listings, _ = self._scraper.parse_html(task.html, task.page_num, scraped_at)
+        return listings
+
+
+ADAPTERS = {
+    'meqasa': MeqasaAdapter,
+    'tonaton': TonatonAdapter,
+    'jiji': JijiAdapter,
+}
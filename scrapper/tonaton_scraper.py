@@ -1,13 +1,15 @@
 """
 Tonaton Scraper - Improved with Better Element Detection
+Card parsing and the extraction benchmark for Tonaton. The crawl is the shared
+pipeline (pipeline.run_source with source_adapters.TonatonAdapter).
 """
 
 from playwright.sync_api import sync_playwright
-import json
 import time
-from datetime import datetime
 import re
-from collections import Counter
+
+from listing import Listing
+from pipeline import run_source
 
 
 def clean_price(price_text):
@@ -52,207 +54,202 @@ def extract_bedrooms(text):
     return None
 
 
-def scrape_tonaton():
-    """Scrape Tonaton using Playwright"""
-    print("="*70)
-    print("TONATON SCRAPER - IMPROVED")
-    print("="*70)
+PRICE_PATTERN = re.compile(r'GH₵\s*([\d,]+)')
 
-    all_listings = []
+# Candidate listing containers, in the order they are tried
+CONTAINER_SELECTORS = [
+    'article',
+    'div[data-testid], div[data-id]',
+    'li.item, li[class*="item"], li[class*="listing"]',
+    'div[class*="listing"], div[class*="ad-item"], div[class*="card"]',
+]
 
-    with sync_playwright() as p:
-        print("\nLaunching browser...")
-        # Show browser for debugging
-        browser = p.chromium.launch(headless=False)
-        page = browser.new_page()
 
-        page.set_viewport_size({"width": 1920, "height": 1080})
+def parse_card(text_content, title, href, scraped_at):
+    """Build a Listing from a card's text and its first link, or None"""
+    if not text_content or len(text_content) < 20:
+        return None
+
+    # Find price in text
+    price_match = PRICE_PATTERN.search(text_content)
+    if not price_match:
+        return None
 
-        base_url = "https://tonaton.com/c_houses-apartments-for-rent"
-
-        for page_num in range(1, 6):
-            print(f"\n{'='*70}")
-            print(f"PAGE {page_num}")
-            print(f"{'='*70}")
-
-            if page_num == 1:
-                url = base_url
-            else:
-                url = f"{base_url}?page={page_num}"
-
-            print(f"URL: {url}")
-
-            try:
-                page.goto(url, wait_until='load', timeout=30000)
-                time.sleep(5)  # Wait for dynamic content
-
-                # Try different selectors for listing items
-                print("\nTrying to find listing containers...")
-
-                # Method 1: Look for article elements
-                articles = page.query_selector_all('article')
-                print(f"Found {len(articles)} article elements")
-
-                # Method 2: Look for divs with data attributes
-                data_divs = page.query_selector_all(
-                    'div[data-testid], div[data-id]')
-                print(f"Found {len(data_divs)} divs with data attributes")
-
-                # Method 3: Look for list items
-                list_items = page.query_selector_all(
-                    'li.item, li[class*="item"], li[class*="listing"]')
-                print(f"Found {len(list_items)} list items")
-
-                # Method 4: Look for divs with specific classes
-                listing_divs = page.query_selector_all(
-                    'div[class*="listing"], div[class*="ad-item"], div[class*="card"]')
-                print(f"Found {len(listing_divs)} listing divs")
-
-                # Use whichever found the most
-                containers = articles or data_divs or list_items or listing_divs
-
-                if not containers:
-                    print("⚠️ No listing containers found!")
-
-                    # Fallback: Save page HTML for manual inspection
-                    with open(f'tonaton_page_{page_num}.html', 'w', encoding='utf-8') as f:
-                        f.write(page.content())
-                    print(
-                        f"Saved page HTML to tonaton_page_{page_num}.html for inspection")
-                    continue
-
-                print(f"\nProcessing {len(containers)} containers...")
-
-                for idx, container in enumerate(containers):
-                    try:
-                        # Get all text from this container
-                        text_content = container.text_content()
-
-                        if not text_content or len(text_content) < 20:
-                            continue
-
-                        # Find price in text
-                        price_match = re.search(
-                            r'GH₵\s*([\d,]+)', text_content)
-                        if not price_match:
-                            continue
-
-                        price = clean_price(price_match.group(1))
-                        if not price:
-                            continue
-
-                        # Find link/title
-                        link_elem = container.query_selector('a')
-                        if not link_elem:
-                            continue
-
-                        title = link_elem.text_content().strip()
-                        href = link_elem.get_attribute('href')
-
-                        if not title or len(title) < 10:
-                            continue
-
-                        # Skip sales
-                        if 'for sale' in title.lower() or 'land' in title.lower():
-                            continue
-
-                        # Extract bedrooms
-                        bedrooms = extract_bedrooms(text_content)
-
-                        # Try to find location
-                        location = "Accra"
-                        # Look for location patterns in text
-                        loc_match = re.search(
-                            r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*,\s*Accra', text_content)
-                        if loc_match:
-                            location = loc_match.group(1)
-                        else:
-                            # Try other patterns
-                            lines = text_content.split('\n')
-                            for line in lines:
-                                if len(line) > 3 and len(line) < 30 and ',' in line:
-                                    potential_loc = line.split(',')[0].strip()
-                                    if potential_loc and not any(char.isdigit() for char in potential_loc):
-                                        location = potential_loc
-                                        break
-
-                        # Build URL
-                        full_url = href if href and href.startswith(
-                            'http') else f"https://tonaton.com{href}" if href else ""
-
-                        listing = {
-                            'title': title,
-                            'price': price,
-                            'price_text': f"GH₵{price:,}",
-                            'bedrooms': bedrooms,
-                            'location': location,
-                            'url': full_url,
-                            'source': 'tonaton',
-                            'scraped_at': datetime.now().isoformat()
-                        }
-
-                        # Check duplicates
-                        if full_url and not any(l.get('url') == full_url for l in all_listings):
-                            all_listings.append(listing)
-                            print(
-                                f"  {len(all_listings):3d}. {location:20s} | {bedrooms if bedrooms else '?'}BR | GH₵{price:,} | {title[:40]}")
-
-                    except Exception as e:
-                        continue
-
-                found_this_page = len([l for l in all_listings]) - (
-                    0 if page_num == 1 else len([l for l in all_listings if l]))
-                print(
-                    f"\nPage {page_num}: Found {len(all_listings)} total listings")
-
-                if page_num < 5:
-                    print("Waiting 3s...")
-                    time.sleep(3)
-
-            except Exception as e:
-                print(f"Error on page {page_num}: {e}")
-                break
-
-        print("\n\nClosing browser in 5 seconds (check if you saw listings)...")
-        time.sleep(5)
-        browser.close()
+    price = clean_price(price_match.group(1))
+    if not price:
+        return None
+
+    title = (title or '').strip()
+    if not title or len(title) < 10:
+        return None
 
-    print(f"\n{'='*70}")
-    print(f"SCRAPING COMPLETE")
-    print(f"{'='*70}")
-    print(f"Total listings: {len(all_listings)}")
-
-    if not all_listings:
-        print("\n❌ No listings found!")
-        print("Check the saved HTML files (tonaton_page_*.html) to see the page structure")
-        return
-
-    # Save
-    output = {
-        'scraped_at': datetime.now().isoformat(),
-        'total_listings': len(all_listings),
-        'source': 'tonaton',
-        'listings': all_listings
+    # Skip sales
+    if 'for sale' in title.lower() or 'land' in title.lower():
+        return None
+
+    # Extract bedrooms
+    bedrooms = extract_bedrooms(text_content)
+
+    # Try to find location
+    location = "Accra"
+    # Look for location patterns in text
+    loc_match = re.search(
+        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*,\s*Accra', text_content)
+    if loc_match:
+        location = loc_match.group(1)
+    else:
+        # Try other patterns
+        lines = text_content.split('\n')
+        for line in lines:
+            if len(line) > 3 and len(line) < 30 and ',' in line:
+                potential_loc = line.split(',')[0].strip()
+                if potential_loc and not any(char.isdigit() for char in potential_loc):
+                    location = potential_loc
+                    break
+
+    # Build URL
+    full_url = href if href and href.startswith(
+        'http') else f"https://tonaton.com{href}" if href else ""
+
+    return Listing(
+        title=title,
+        price=price,
+        bedrooms=bedrooms,
+        location=location,
+        url=full_url,
+        source='tonaton',
+        scraped_at=scraped_at
+    )
+
+
+# Collects every candidate card in one round-trip: per-selector match counts,
+# then text, first link and data-* attributes of the first selector that matched
+EXTRACT_CARDS_JS = """
+(selectors) => {
+    const matches = selectors.map(selector => document.querySelectorAll(selector));
+    const containers = matches.find(found => found.length > 0) || [];
+    const cards = [];
+    for (const el of containers) {
+        const link = el.querySelector('a');
+        cards.push({
+            text: el.textContent,
+            link: link ? {text: link.textContent, href: link.getAttribute('href')} : null,
+            data: Object.assign({}, el.dataset),
+        });
     }
+    return {counts: matches.map(found => found.length), cards: cards};
+}
+"""
 
-    with open('tonaton_data.json', 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
 
-    print(f"\n✓ Saved to tonaton_data.json")
+def extract_cards(page):
+    """All candidate cards on the page from a single page.evaluate call"""
+    extracted = page.evaluate(EXTRACT_CARDS_JS, CONTAINER_SELECTORS)
+    extracted['round_trips'] = 1
+    return extracted
+
+
+def extract_cards_per_element(page):
+    """
+    The original extraction: a query_selector_all per selector, then separate
+    text/link/href round-trips for every container. Kept for the benchmark.
+    """
+    round_trips = 0
+    matches = []
+    for selector in CONTAINER_SELECTORS:
+        matches.append(page.query_selector_all(selector))
+        round_trips += 1
+    containers = next((found for found in matches if found), [])
+
+    cards = []
+    for container in containers:
+        text_content = container.text_content()
+        round_trips += 1
+        if not text_content or len(text_content) < 20 or not PRICE_PATTERN.search(text_content):
+            continue
+        link_elem = container.query_selector('a')
+        round_trips += 1
+        if not link_elem:
+            continue
+        cards.append({
+            'text': text_content,
+            'link': {'text': link_elem.text_content(), 'href': link_elem.get_attribute('href')},
+            'data': {},
+        })
+        round_trips += 2
+    return {'counts': [len(found) for found in matches], 'cards': cards,
+            'round_trips': round_trips}
+
+
+def parse_cards(cards, scraped_at):
+    """Listings from extracted cards (cards without a link are skipped)"""
+    listings = []
+    for card in cards:
+        link = card['link']
+        if not link:
+            continue
+        listing = parse_card(card['text'], link['text'], link['href'], scraped_at)
+        if listing:
+            listings.append(listing)
+    return listings
+
+
+def run_benchmark(html_path, repeats=20):
+    """Per-page extraction time, per-element vs bulk, on a saved Tonaton page"""
+    print("="*70)
+    print(f"TONATON EXTRACTION BENCHMARK ({html_path})")
+    print("="*70)
+
+    with open(html_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        # No network: measure extraction on the saved DOM, not on reloaded assets
+        page.route('**/*', lambda route: route.abort())
+        page.set_content(html, wait_until='domcontentloaded')
+
+        results = {}
+        for name, extract in (('per-element', extract_cards_per_element),
+                              ('bulk evaluate', extract_cards)):
+            extract(page)  # warm up
+            start = time.perf_counter()
+            for _ in range(repeats):
+                extracted = extract(page)
+                listings = parse_cards(extracted['cards'], 0)
+            per_page = (time.perf_counter() - start) / repeats * 1000
+            results[name] = (per_page, extracted['round_trips'], listings)
+            print(f"  {name:14s} {per_page:8.1f}ms/page  "
+                  f"{extracted['round_trips']:5d} round-trips  {len(listings)} listings")
+        browser.close()
+
+    slow, fast = results['per-element'], results['bulk evaluate']
+    same = [l.to_dict() for l in slow[2]] == [l.to_dict() for l in fast[2]]
+    print(f"\n  Speedup: {slow[0] / max(fast[0], 1e-9):.1f}x, "
+          f"{'identical' if same else 'DIFFERENT'} listings")
+    return same
 
-    # Analysis
-    if all_listings:
-        prices = [l['price'] for l in all_listings]
-        print(f"\nPRICE STATS:")
-        print(f"  Average: GH₵{sum(prices)/len(prices):,.0f}")
-        print(f"  Range: GH₵{min(prices):,} - GH₵{max(prices):,}")
 
-        locations = [l['location'] for l in all_listings]
-        loc_counts = Counter(locations)
-        print(f"\nTOP LOCATIONS:")
-        for loc, count in loc_counts.most_common(10):
-            print(f"  {loc:20s}: {count}")
+def scrape_tonaton(max_pages=5, output_path=None):
+    """Scrape Tonaton through the shared pipeline; returns the exit status"""
+    from source_adapters import TonatonAdapter
+    return run_source(TonatonAdapter(), output_path=output_path, pages=max_pages)
 
 
 if __name__ == "__main__":
-    scrape_tonaton()
+    import argparse
+    parser = argparse.ArgumentParser(description='Scrape Tonaton rentals')
+    parser.add_argument('--benchmark', type=str, metavar='HTML',
+                        help='Compare per-element and bulk extraction on a saved page instead')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--output', '-o', type=str,
+                        help='Custom output path (default: tonaton_data.json)')
+    parser.add_argument('--pages', '-p', type=int, default=5, help='Max pages (default: 5)')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        if not run_benchmark(args.benchmark, args.repeats):
+            exit(1)
+    else:
+        exit(scrape_tonaton(args.pages, args.output))
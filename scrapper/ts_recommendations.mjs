@@ -0,0 +1,50 @@
+// Runs getRecommendations from lib/recommendations.ts under node for
+// `recommender.py --check-ts`. Reads {"listings": [...], "queries": [[budget,
+// location, bedrooms], ...]} on stdin and prints one result list per query as
+// JSON. The app's TypeScript is transpiled with the repo's own `typescript`
+// devDependency, so run `npm install` in the repo root first.
+import { readFileSync, existsSync } from 'node:fs'
+import { createRequire } from 'node:module'
+import path from 'node:path'
+import { fileURLToPath } from 'node:url'
+
+const root = path.resolve(path.dirname(fileURLToPath(import.meta.url)), '..')
+const ts = createRequire(path.join(root, 'package.json'))('typescript')
+const modules = new Map()
+
+function resolve(specifier, fromDir) {
+  const base = specifier.startsWith('@/')
+    ? path.join(root, specifier.slice(2))
+    : path.resolve(fromDir, specifier)
+  for (const candidate of [base, `${base}.ts`, `${base}.tsx`]) {
+    if (existsSync(candidate) && !candidate.endsWith(path.sep)) return candidate
+  }
+  throw new Error(`Cannot resolve ${specifier} from ${fromDir}`)
+}
+
+function load(file) {
+  if (modules.has(file)) return modules.get(file).exports
+  const module = { exports: {} }
+  modules.set(file, module)
+  if (file.endsWith('.json')) {
+    module.exports = JSON.parse(readFileSync(file, 'utf8'))
+    return module.exports
+  }
+  const { outputText } = ts.transpileModule(readFileSync(file, 'utf8'), {
+    compilerOptions: {
+      module: ts.ModuleKind.CommonJS,
+      target: ts.ScriptTarget.ES2020,
+      esModuleInterop: true,
+    },
+    fileName: file,
+  })
+  const localRequire = (specifier) => load(resolve(specifier, path.dirname(file)))
+  new Function('require', 'module', 'exports', outputText)(localRequire, module, module.exports)
+  return module.exports
+}
+
+const { getRecommendations } = load(path.join(root, 'lib', 'recommendations.ts'))
+const { listings, queries } = JSON.parse(readFileSync(0, 'utf8'))
+const results = queries.map(([budget, location, bedrooms]) =>
+  getRecommendations(budget, location, bedrooms, listings))
+process.stdout.write(JSON.stringify(results))